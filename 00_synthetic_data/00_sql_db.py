@@ -1,10 +1,21 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import random
+import re
 import os
+from datetime import date
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from faker import Faker
+from storage import merge_shards, open_writer, prepare_shards
 
 fake = Faker(['en_IN'])
 
+CITIES = ["Abu Dhabi", "Dubai", "Sharjah", "Ajman"]
+
 # ============================================
 # RESTAURANTS
 # ============================================
@@ -63,7 +74,7 @@ def generate_restaurants():
 # ============================================
 # MENU ITEMS (Master List)
 # ============================================
-def generate_menu_items():
+def generate_menu_items(rnd=random):
     master_menu = [
         # Starters
         {"item_id": "ITEM-101", "name": "Samosa (2 pcs)", "category": "Starter", "price": 18.00, "ingredients": "Potato, Peas, Spices, Pastry", "is_vegetarian": True, "spice_level": "Medium"},
@@ -118,7 +129,7 @@ def generate_menu_items():
         rest_id = restaurant["restaurant_id"]
         
         for item in master_menu:
-            price_multiplier = random.uniform(0.95, 1.05)
+            price_multiplier = rnd.uniform(0.95, 1.05)
             
             menu_items_data.append({
                 "restaurant_id": rest_id,
@@ -137,18 +148,18 @@ def generate_menu_items():
 # ============================================
 # CUSTOMERS
 # ============================================
-def generate_customers(n=500):
+def generate_customers(n=500, start=0, faker=fake, rnd=random):
     customers = []
     
-    for i in range(n):
-        join_date = fake.date_between(start_date='-2y', end_date='today')
+    for i in range(start, start + n):
+        join_date = faker.date_between(start_date='-2y', end_date='today')
         
         customer = {
             "customer_id": f"CUST-{10000 + i}",
-            "name": fake.name(),
-            "email": fake.email(),
-            "phone": fake.phone_number(),
-            "city": random.choice(["Abu Dhabi", "Dubai", "Sharjah", "Ajman"]),
+            "name": faker.name(),
+            "email": faker.email(),
+            "phone": faker.phone_number(),
+            "city": rnd.choice(CITIES),
             "join_date": join_date.strftime("%Y-%m-%d"),
         }
         customers.append(customer)
@@ -156,21 +167,140 @@ def generate_customers(n=500):
     return pd.DataFrame(customers)
 
 
-def generate_data_for_sql_db():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+def build_customer_pools(faker, size=1000):
+    """Draw Faker first names, last names and email domains once for generate_customers_vectorized
+
+    Names keep their Faker spelling; the email parts are lowercase letters only.
+    """
+    first_names = sorted({faker.first_name() for _ in range(size)})
+    last_names = sorted({faker.last_name() for _ in range(size)})
+    domains = sorted({faker.safe_domain_name() for _ in range(20)})
+    
+    def email_part(name):
+        return re.sub(r"[^a-z]", "", name.lower())
+    
+    return {
+        "first_name": pa.array(first_names),
+        "last_name": pa.array(last_names),
+        "first_email": pa.array([email_part(name) for name in first_names]),
+        "last_email": pa.array([email_part(name) for name in last_names]),
+        "domain": pa.array(domains)
+    }
+
+
+def generate_customers_vectorized(n, start, rng, pools, today=None):
+    """Generate customers start..start+n-1 from index draws into the Faker pools, without a per-row loop
+
+    Emails are first.last<customer number>@domain, so they are unique by
+    construction. Phones are Indian mobile numbers and join dates fall in
+    the last two years, both drawn as NumPy arrays.
+    """
+    def as_string(array):
+        return pd.array(array.cast(pa.large_string()), dtype=pd.StringDtype("pyarrow"))
+    
+    first_idx = rng.integers(0, len(pools["first_name"]), n)
+    last_idx = rng.integers(0, len(pools["last_name"]), n)
+    numbers = pa.array(np.arange(10000 + start, 10000 + start + n)).cast(pa.string())
+    
+    names = pc.binary_join_element_wise(
+        pools["first_name"].take(first_idx), pools["last_name"].take(last_idx), " "
+    )
+    emails = pc.binary_join_element_wise(
+        pools["first_email"].take(first_idx), ".", pools["last_email"].take(last_idx), numbers,
+        "@", pools["domain"].take(rng.integers(0, len(pools["domain"]), n)), ""
+    )
+    phones = pc.binary_join_element_wise(
+        "+91", pa.array(rng.integers(6_000_000_000, 10_000_000_000, n)).cast(pa.string()), ""
+    )
+    join_dates = np.datetime64(today or date.today(), "D") - rng.integers(0, 731, n).astype("timedelta64[D]")
+    
+    return pd.DataFrame({
+        "customer_id": as_string(pc.binary_join_element_wise("CUST-", numbers, "")),
+        "name": as_string(names),
+        "email": as_string(emails),
+        "phone": as_string(phones),
+        "city": pd.Categorical.from_codes(rng.integers(0, len(CITIES), n), CITIES),
+        "join_date": as_string(pa.array(join_dates).cast(pa.string()))
+    })
+
+
+def generate_customers_shard(shard, start, n, seed_sequence, output_format, chunk_size, engine="python", pool_seed=None):
+    """Generate and write customers start..start+n-1 with their own seeded Faker/random (runs in a worker process)
+
+    engine="numpy" draws the Faker pools once from pool_seed (shared by all
+    shards) and composes every chunk with generate_customers_vectorized.
+    """
+    faker_seed, random_seed = seed_sequence.generate_state(2)
+    faker = Faker(['en_IN'])
+    faker.seed_instance(int(faker_seed))
+    rnd = random.Random(int(random_seed))
+    
+    if engine == "numpy":
+        pool_faker = Faker(['en_IN'])
+        pool_faker.seed_instance(int(pool_seed.generate_state(1)[0]))
+        pools = build_customer_pools(pool_faker)
+        rng = np.random.default_rng(seed_sequence)
+    
+    with open_writer("customers", output_format, dictionary_cols=["city"], shard=shard) as writer:
+        for offset in range(start, start + n, chunk_size):
+            size = min(chunk_size, start + n - offset)
+            if engine == "numpy":
+                writer.write(generate_customers_vectorized(size, offset, rng, pools))
+            else:
+                writer.write(generate_customers(size, start=offset, faker=faker, rnd=rnd))
+    return writer.rows
+
+
+def generate_data_for_sql_db(num_customers=500, output_format="csv", chunk_size=100_000, seed=None, num_shards=1,
+                             engine="python"):
+    """Write restaurants, menu items and customers; customers are generated and written chunk by chunk
+
+    engine="python" calls Faker for every customer; engine="numpy" draws
+    Faker name/domain pools once and builds customers from array draws,
+    which is the one to use for millions of customers.
+
+    With num_shards > 1 the customer id range is split across a process
+    pool. Every shard's Faker and random are seeded from the master seed, so
+    output is identical for the same seed and num_shards, and with the numpy
+    engine the same chunk_size (on the same day, as join dates are relative
+    to today).
+    """
+    if engine not in ("python", "numpy"):
+        raise ValueError(f"Unknown engine: {engine!r} (expected 'python' or 'numpy')")
+    
+    # The pool seed is spawned last so the menu and shard seeds match the python engine's
+    menu_seed, *shard_seeds, pool_seed = np.random.SeedSequence(seed).spawn(num_shards + 2)
     
     df_restaurants = generate_restaurants()
-    df_menu_items = generate_menu_items()
-    df_customers = generate_customers(500)
+    df_menu_items = generate_menu_items(rnd=random.Random(int(menu_seed.generate_state(1)[0])))
+    
+    with open_writer("restaurants", output_format, dictionary_cols=["city", "country"]) as writer:
+        writer.write(df_restaurants)
+    with open_writer("menu_items", output_format, dictionary_cols=["restaurant_id", "category", "spice_level"]) as writer:
+        writer.write(df_menu_items)
+    
+    bounds = [num_customers * shard // num_shards for shard in range(num_shards + 1)]
+    starts = bounds[:-1]
+    sizes = [end - start for start, end in zip(bounds, bounds[1:])]
     
-    df_restaurants.to_csv(os.path.join(script_dir, "data", "restaurants.csv"), index=False)
-    df_menu_items.to_csv(os.path.join(script_dir, "data", "menu_items.csv"), index=False)
-    df_customers.to_csv(os.path.join(script_dir, "data", "customers.csv"), index=False)
+    if num_shards == 1:
+        rows = [generate_customers_shard(
+            None, 0, num_customers, shard_seeds[0], output_format, chunk_size, engine, pool_seed
+        )]
+    else:
+        prepare_shards("customers", output_format)
+        with ProcessPoolExecutor(max_workers=num_shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+            rows = list(pool.map(
+                generate_customers_shard,
+                range(num_shards), starts, sizes, shard_seeds, repeat(output_format), repeat(chunk_size),
+                repeat(engine), repeat(pool_seed)
+            ))
+        merge_shards("customers", output_format, num_shards)
 
     print(f"Generated {len(df_restaurants)} restaurants")
     print(f"Generated {len(df_menu_items)} menu items")
-    print(f"Generated {len(df_customers)} customers")
+    print(f"Generated {sum(rows)} customers")
 
 
 if __name__ == "__main__":
-    generate_data_for_sql_db()
\ No newline at end of file
+    generate_data_for_sql_db()
@@ -1,16 +1,24 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 import random
 from datetime import datetime, timedelta
 import json
 import os
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from skew import HOURS, day_probabilities, item_weights, order_distributions, order_samplers, resolve_skew
+from storage import merge_shards, open_writer, output_path, prepare_shards, read_table
 
 # ============================================
 # LOAD MASTER DATA
 # ============================================
 script_dir = os.path.dirname(os.path.abspath(__file__))
-df_restaurants = pd.read_csv(os.path.join(script_dir, "data", "restaurants.csv"))
-df_customers = pd.read_csv(os.path.join(script_dir, "data", "customers.csv"))
-df_menu_items = pd.read_csv(os.path.join(script_dir, "data", "menu_items.csv"))
+df_restaurants = read_table("restaurants")
+df_customers = read_table("customers", columns=["customer_id"])
+df_menu_items = read_table("menu_items")
 
 RESTAURANTS = df_restaurants['restaurant_id'].tolist()
 CUSTOMERS = df_customers['customer_id'].tolist()
@@ -22,17 +30,34 @@ ORDER_TYPES = ["dine_in", "takeaway", "delivery"]
 PAYMENT_METHODS = ["cash", "card", "wallet"]
 ORDER_STATUSES = ["delivered", "completed"]  # Only completed orders for historical data
 
+# Uniform pickers: the original random.choice / random.sample draws
+UNIFORM_SAMPLERS = order_samplers(None, RESTAURANTS, CUSTOMERS, MENU_BY_RESTAURANT)
+
+MAX_ITEMS_PER_ORDER = 5
+MAX_QUANTITY = 3
+
+# The six-digit suffix of ORD-YYYYMMDD-nnnnnn: at most this many distinct order ids per day
+ORDER_NUMBER_LOW = 100000
+ORDER_NUMBERS_PER_DAY = 900000
+
+# Dictionary-encoded in Parquet output
+DICTIONARY_COLUMNS = ["restaurant_id", "order_type", "payment_method", "order_status"]
+
+# "json": items as a JSON string column (original layout); "table": slim orders plus an
+# exploded order_items table; "both": the JSON column and the order_items table
+ITEMS_FORMATS = ["json", "table", "both"]
+
 # ============================================
 # GENERATE HISTORICAL ORDER
 # ============================================
-def generate_historical_order(order_date):
-    """Generate single historical order"""
-    restaurant_id = random.choice(RESTAURANTS)
-    customer_id = random.choice(CUSTOMERS)
+def generate_historical_order(order_date, samplers=UNIFORM_SAMPLERS):
+    """Generate single historical order (restaurant, customer and items picked by skew.order_samplers)"""
+    restaurant_id = samplers["restaurant"]()
+    customer_id = samplers["customer"]()
     
     menu_items = MENU_BY_RESTAURANT[restaurant_id]
     num_items = random.randint(1, min(5, len(menu_items)))
-    selected_items = random.sample(menu_items, num_items)
+    selected_items = samplers["items"](restaurant_id, num_items)
     
     items = []
     total_amount = 0.0
@@ -67,31 +92,350 @@ def generate_historical_order(order_date):
     }
 
 # ============================================
-# GENERATE BATCH HISTORICAL ORDERS
+# VECTORIZED ENGINE
 # ============================================
-def generate_historical_orders(num_orders=8000, months_back=6):
-    """Generate historical orders over past X months"""
+def build_price_matrix():
+    """Precompute per-restaurant menu arrays and item JSON fragments for the vectorized engine"""
+    menu_sizes = np.array([len(MENU_BY_RESTAURANT[rest_id]) for rest_id in RESTAURANTS])
+    width = menu_sizes.max()
+
+    prices = np.zeros((len(RESTAURANTS), width))
+    item_ids = sorted({item["item_id"] for menu in MENU_BY_RESTAURANT.values() for item in menu})
+    item_codes = np.zeros((len(RESTAURANTS), width), dtype=np.int64)
+    # item_json[0 or 1, r, k, q] is menu position k at restaurant r ordered q times, encoded as the
+    # first entry of the items list (with "[") or a later one (with ", "); q=0 is an empty fragment
+    item_json = np.full((2, len(RESTAURANTS), width, MAX_QUANTITY + 1), b"", dtype=object)
+
+    for r, rest_id in enumerate(RESTAURANTS):
+        for k, item in enumerate(MENU_BY_RESTAURANT[rest_id]):
+            prices[r, k] = item["price"]
+            item_codes[r, k] = item_ids.index(item["item_id"])
+            for quantity in range(1, MAX_QUANTITY + 1):
+                encoded = json.dumps({
+                    "item_id": item["item_id"],
+                    "name": item["name"],
+                    "category": item["category"],
+                    "quantity": quantity,
+                    "unit_price": item["price"],
+                    "subtotal": round(item["price"] * quantity, 2)
+                }).encode()
+                item_json[0, r, k, quantity] = b"[" + encoded
+                item_json[1, r, k, quantity] = b", " + encoded
+
+    return {
+        "menu_sizes": menu_sizes,
+        "prices": prices,
+        "item_ids": item_ids,
+        "item_codes": item_codes,
+        "item_json": item_json
+    }
+
+def item_log_weights(price_matrix, skew):
+    """log pick weight of every menu position (-inf past the end of a menu), or None for uniform items"""
+    log_weights = np.full(price_matrix["prices"].shape, -np.inf)
+    for r, menu_size in enumerate(price_matrix["menu_sizes"]):
+        weights = item_weights(menu_size, skew)
+        if weights is None:
+            return None
+        log_weights[r, :menu_size] = np.log(weights)
+    return log_weights
+
+def draw_indices(rng, n, size, p=None):
+    """Indices into a population of n: uniform, or weighted by p"""
+    return rng.integers(0, n, size) if p is None else rng.choice(n, size, p=p)
+
+def join_fragments(fragments, fragment_idx):
+    """Concatenate fragments[fragment_idx[i, :]] for every row i into an Arrow-backed string array
+
+    All rows are written with one bytes join and wrapped as Arrow buffers,
+    so no Python string is built per row.
+    """
+    fragments = np.asarray(fragments, dtype=object)
+    lengths = np.array([len(fragment) for fragment in fragments])
+
+    data = b"".join(fragments[fragment_idx].ravel().tolist())
+    offsets = np.zeros(len(fragment_idx) + 1, dtype=np.int64)
+    np.cumsum(lengths[fragment_idx].sum(axis=1), out=offsets[1:])
+
+    strings = pa.LargeStringArray.from_buffers(len(fragment_idx), pa.py_buffer(offsets), pa.py_buffer(data))
+    return pd.array(strings, dtype=pd.StringDtype("pyarrow"))
+
+def draw_order_seconds(rng, num_orders, hour_p=None):
+    """Random second of the day between 10:00 and 22:59 (hours weighted by hour_p when given)"""
+    hours = rng.integers(10, 23, num_orders) if hour_p is None else HOURS[rng.choice(len(HOURS), num_orders, p=hour_p)]
+    return (
+        hours * 3600
+        + rng.integers(0, 60, num_orders) * 60
+        + rng.integers(0, 60, num_orders)
+    )
+
+def iter_order_seconds(orders_per_day, rng, chunk_size, hour_p=None):
+    """Yield the second of day of every order, chunk_size orders at a time, sorted within each day
+
+    Times are always drawn for whole days, and whatever a chunk does not use
+    of its last day carries over to the next one, so a day split across two
+    chunks is still in order as a whole.
+    """
+    day_ends = np.cumsum(orders_per_day)
+    num_orders = int(day_ends[-1]) if len(day_ends) else 0
+    drawn = 0
+    pending = np.empty(0, dtype=np.int64)
+
+    for offset in range(0, num_orders, chunk_size):
+        end = min(offset + chunk_size, num_orders)
+        if end > drawn:
+            # Rows are exchangeable, so sorting the times within each day is enough
+            last_day = np.searchsorted(day_ends, end - 1, side="right")
+            day_offset = np.searchsorted(day_ends, np.arange(drawn, day_ends[last_day]), side="right")
+            seconds = draw_order_seconds(rng, len(day_offset), hour_p)
+            pending = np.concatenate([pending, seconds[np.lexsort((seconds, day_offset))]])
+            drawn = int(day_ends[last_day])
+        yield pending[:end - offset]
+        pending = pending[end - offset:]
+
+def draw_day_order_numbers(rng, num_orders):
+    """num_orders distinct order numbers for one day, drawn without replacement"""
+    return rng.choice(ORDER_NUMBERS_PER_DAY, size=num_orders, replace=False) + ORDER_NUMBER_LOW
+
+def generate_historical_orders_vectorized(day_offset, seconds, order_numbers, start_date, end_date, rng, price_matrix,
+                                          items_format="json", distributions=None):
+    """Generate a batch of historical orders with NumPy array draws instead of a per-order loop
+
+    day_offset holds the (sorted) day index of every order in the batch and
+    seconds its time of day (sorted within each day, see
+    iter_order_seconds), so the batch comes out in timestamp order.
+    order_numbers are the ids' numeric suffixes, distinct within each day
+    (see iter_historical_order_chunks). Returns
+    (df_orders, df_order_items); df_order_items is None for
+    items_format="json". distributions (see iter_historical_order_chunks)
+    skews the restaurant, customer and item draws; None keeps them uniform.
+    """
+    distributions = distributions or {}
+    num_orders = len(day_offset)
+    menu_sizes = price_matrix["menu_sizes"]
+    item_json = price_matrix["item_json"]
+    max_items = min(MAX_ITEMS_PER_ORDER, price_matrix["prices"].shape[1])
+
+    restaurant_idx = draw_indices(rng, len(RESTAURANTS), num_orders, distributions.get("restaurant_p"))
+    customer_idx = draw_indices(rng, len(CUSTOMERS), num_orders, distributions.get("customer_p"))
+    num_items = rng.integers(1, np.minimum(max_items, menu_sizes[restaurant_idx]) + 1)
+    selected = np.arange(max_items) < num_items[:, None]
+
+    if distributions.get("item_log_w") is None:
+        # Distinct menu positions per order via Floyd's sampling, one column at a time
+        slots = np.zeros((num_orders, max_items), dtype=np.int64)
+        for j in range(max_items):
+            upper = menu_sizes[restaurant_idx] - num_items + j
+            pick = (rng.random(num_orders) * (upper + 1)).astype(np.int64)
+            taken = (slots[:, :j] == pick[:, None]).any(axis=1)
+            slots[:, j] = np.where(selected[:, j], np.where(taken, upper, pick), 0)
+    else:
+        # Weighted picks without replacement: the top Gumbel-perturbed log weights of each row
+        log_weights = distributions["item_log_w"][restaurant_idx]
+        keys = log_weights + rng.gumbel(size=log_weights.shape)
+        slots = np.where(selected, np.argsort(-keys, axis=1)[:, :max_items], 0)
+
+    quantities = np.where(selected, rng.integers(1, MAX_QUANTITY + 1, (num_orders, max_items)), 0)
+    subtotals = price_matrix["prices"][restaurant_idx[:, None], slots] * quantities
+    total_amount = subtotals.sum(axis=1).round(2)
+
+    # Items JSON is stitched together from the precomputed per-item fragments plus a closing "]"
+    if items_format != "table":
+        position = (np.arange(max_items) > 0).astype(np.int64)
+        items_idx = np.ravel_multi_index((position, restaurant_idx[:, None], slots, quantities), item_json.shape)
+        items_idx = np.column_stack([items_idx, np.full(num_orders, item_json.size)])
+        items = join_fragments(np.append(item_json.ravel(), b"]"), items_idx)
+
+    # Timestamps and ids are assembled from small per-day / per-second lookup tables
+    num_days = (end_date - start_date).days + 1
+    first_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [first_day + timedelta(days=d) for d in range(num_days)]
+    fraction = f".{start_date.microsecond:06d}" if start_date.microsecond else ""
+    hour_prefixes = [f"{day:%Y-%m-%dT}{hour:02d}:".encode() for day in days for hour in range(24)]
+    minutes_seconds = [f"{s // 60:02d}:{s % 60:02d}{fraction}".encode() for s in range(3600)]
+    timestamps = join_fragments(
+        hour_prefixes + minutes_seconds,
+        np.column_stack([day_offset * 24 + seconds // 3600, len(hour_prefixes) + seconds % 3600])
+    )
+
+    id_prefixes = [f"ORD-{day:%Y%m%d}-".encode() for day in days]
+    id_digits = [f"{i:03d}".encode() for i in range(1000)]
+    order_ids = join_fragments(
+        id_prefixes + id_digits,
+        np.column_stack([day_offset, num_days + order_numbers // 1000, num_days + order_numbers % 1000])
+    )
+
+    df_orders = pd.DataFrame({
+        "order_id": order_ids,
+        "timestamp": timestamps,
+        "restaurant_id": pd.Categorical.from_codes(restaurant_idx, RESTAURANTS),
+        "customer_id": pd.Categorical.from_codes(customer_idx, CUSTOMERS),
+        "order_type": pd.Categorical.from_codes(rng.integers(0, len(ORDER_TYPES), num_orders), ORDER_TYPES),
+        "items": items if items_format != "table" else None,
+        "total_amount": total_amount,
+        "payment_method": pd.Categorical.from_codes(rng.integers(0, len(PAYMENT_METHODS), num_orders), PAYMENT_METHODS),
+        "order_status": pd.Categorical.from_codes(rng.integers(0, len(ORDER_STATUSES), num_orders), ORDER_STATUSES),
+        "created_at": timestamps
+    })
+    if items_format == "json":
+        return df_orders, None
+    if items_format == "table":
+        df_orders = df_orders.drop(columns="items")
+
+    # One row per selected (order, menu position), grouped by order in batch order
+    order_pos, item_pos = np.nonzero(selected)
+    item_restaurant = restaurant_idx[order_pos]
+    item_slot = slots[order_pos, item_pos]
+    item_quantity = quantities[order_pos, item_pos]
+    unit_price = price_matrix["prices"][item_restaurant, item_slot]
+
+    df_order_items = pd.DataFrame({
+        "order_id": order_ids.take(order_pos),
+        "order_date": pd.Categorical.from_codes(day_offset[order_pos], [f"{day:%Y-%m-%d}" for day in days]),
+        "item_id": pd.Categorical.from_codes(price_matrix["item_codes"][item_restaurant, item_slot], price_matrix["item_ids"]),
+        "quantity": item_quantity,
+        "unit_price": unit_price,
+        "subtotal": (unit_price * item_quantity).round(2)
+    })
+    return df_orders, df_order_items
+
+def plan_order_shards(num_orders, start_date, end_date, seed, num_shards, skew=None):
+    """Split the date range into contiguous day ranges with roughly equal order counts, one per shard
+
+    Orders per day are drawn from the master seed (weighted by day of week
+    when the skew config has seasonality); every shard gets its own seed
+    spawned from it, so output only depends on (seed, num_shards) and the
+    chunk_size each shard draws its chunks with.
+    Returns a list of (seed_sequence, first_day, orders_per_day) tuples.
+    """
+    num_days = (end_date - start_date).days + 1
+    plan_seed, *shard_seeds = np.random.SeedSequence(seed).spawn(num_shards + 1)
+    day_p = day_probabilities(start_date, num_days, resolve_skew(skew))
+    orders_per_day = np.random.default_rng(plan_seed).multinomial(
+        num_orders, np.full(num_days, 1 / num_days) if day_p is None else day_p
+    )
+
+    targets = np.arange(1, num_shards) * num_orders / num_shards
+    day_bounds = [0, *np.searchsorted(np.cumsum(orders_per_day), targets, side="right"), num_days]
+
+    return [
+        (shard_seeds[i], day_bounds[i], orders_per_day[day_bounds[i]:day_bounds[i + 1]])
+        for i in range(num_shards)
+    ]
+
+def iter_historical_order_chunks(orders_per_day, first_day, start_date, end_date, rng, chunk_size, items_format="json",
+                                 skew=None):
+    """Yield vectorized (df_orders, df_order_items) batches of at most chunk_size orders, in timestamp order
+
+    orders_per_day[i] orders are generated for day first_day + i of the range.
+    Each day's order numbers are drawn once, without replacement, when its
+    first chunk is generated and dropped after its last one, so ids stay
+    unique within a day that spans several chunks.
+    """
+    busiest_day = max(orders_per_day, default=0)
+    if busiest_day > ORDER_NUMBERS_PER_DAY:
+        raise ValueError(
+            f"{busiest_day} orders in one day exceed the {ORDER_NUMBERS_PER_DAY} distinct order ids a day can have"
+        )
+    price_matrix = build_price_matrix()
+    distributions = order_distributions(skew, RESTAURANTS, CUSTOMERS)
+    distributions["item_log_w"] = item_log_weights(price_matrix, distributions["skew"])
+    day_ends = np.cumsum(orders_per_day)
+    day_numbers = {}
+
+    offset = 0
+    for seconds in iter_order_seconds(orders_per_day, rng, chunk_size, distributions["hour_p"]):
+        order_index = np.arange(offset, offset + len(seconds))
+        day_index = np.searchsorted(day_ends, order_index, side="right")
+        offset += len(seconds)
+
+        order_numbers = np.empty(len(seconds), dtype=np.int64)
+        for day in np.unique(day_index):
+            if day not in day_numbers:
+                day_numbers[day] = draw_day_order_numbers(rng, orders_per_day[day])
+            in_day = day_index == day
+            order_numbers[in_day] = day_numbers[day][order_index[in_day] - (day_ends[day] - orders_per_day[day])]
+            if day_ends[day] <= offset:
+                del day_numbers[day]
+
+        yield generate_historical_orders_vectorized(
+            first_day + day_index, seconds, order_numbers, start_date, end_date, rng, price_matrix, items_format,
+            distributions
+        )
+
+def write_historical_orders(chunks, output_format, shard=None, verbose=True, items_format="json"):
+    """Write (df_orders, df_order_items) chunks as they arrive and return summary statistics"""
+    stats = {"rows": 0, "first_timestamp": None, "last_timestamp": None, "total_revenue": 0.0}
+    label = "" if shard is None else f"[shard {shard}] "
     
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=months_back * 30)
+    writer = open_writer(
+        "historical_orders", output_format,
+        partition_col="order_date", partition_from="timestamp",
+        dictionary_cols=DICTIONARY_COLUMNS, timestamp_cols=["timestamp", "created_at"],
+        shard=shard
+    )
+    items_writer = None
+    if items_format != "json":
+        items_writer = open_writer(
+            "order_items", output_format,
+            partition_col="order_date", partition_from="order_date",
+            dictionary_cols=["item_id"], shard=shard
+        )
     
-    orders = []
+    # Both writers close (and finish their files) however the loop ends
+    with writer, (items_writer or nullcontext()):
+        for df_chunk, df_items_chunk in chunks:
+            writer.write(df_chunk)
+            if items_writer is not None:
+                items_writer.write(df_items_chunk)
+            
+            stats["rows"] = writer.rows
+            stats["first_timestamp"] = stats["first_timestamp"] or df_chunk['timestamp'].iloc[0]
+            stats["last_timestamp"] = df_chunk['timestamp'].iloc[-1]
+            stats["total_revenue"] += df_chunk['total_amount'].sum()
+            
+            if verbose:
+                print(f"{label}Generated {writer.rows} orders...")
     
-    print(f"Generating {num_orders} orders from {start_date.date()} to {end_date.date()}")
+    return stats
+
+def generate_historical_orders_shard(shard, shard_plan, start_date, end_date, chunk_size, output_format, items_format,
+                                     skew=None):
+    """Generate and write one shard's day range (runs in a worker process)"""
+    seed_sequence, first_day, orders_per_day = shard_plan
+    chunks = iter_historical_order_chunks(
+        orders_per_day, first_day, start_date, end_date, np.random.default_rng(seed_sequence), chunk_size, items_format,
+        skew
+    )
+    return write_historical_orders(chunks, output_format, shard=shard, items_format=items_format)
+
+# ============================================
+# GENERATE BATCH HISTORICAL ORDERS
+# ============================================
+def generate_historical_orders_python(num_orders, start_date, end_date, skew=None):
+    """Generate orders one at a time, sorted by timestamp"""
+    orders = []
+    samplers = order_samplers(skew, RESTAURANTS, CUSTOMERS, MENU_BY_RESTAURANT)
+    num_days = (end_date - start_date).days + 1
+    day_p = day_probabilities(start_date, num_days, resolve_skew(skew))
+    day_cum_weights = None if day_p is None else np.cumsum(day_p).tolist()
     
     for i in range(num_orders):
         # Random date within range
-        days_offset = random.randint(0, (end_date - start_date).days)
+        if day_cum_weights is None:
+            days_offset = random.randint(0, num_days - 1)
+        else:
+            days_offset = random.choices(range(num_days), cum_weights=day_cum_weights)[0]
         order_date = start_date + timedelta(days=days_offset)
         
         # Add random hours/minutes
         order_date = order_date.replace(
-            hour=random.randint(10, 22),
+            hour=random.randint(10, 22) if samplers["hour"] is None else samplers["hour"](),
             minute=random.randint(0, 59),
             second=random.randint(0, 59)
         )
         
-        order = generate_historical_order(order_date)
+        order = generate_historical_order(order_date, samplers)
         orders.append(order)
         
         if (i + 1) % 1000 == 0:
@@ -100,15 +444,82 @@ def generate_historical_orders(num_orders=8000, months_back=6):
     df_orders = pd.DataFrame(orders)
     
     # Sort by timestamp
-    df_orders = df_orders.sort_values('timestamp').reset_index(drop=True)
+    return df_orders.sort_values('timestamp').reset_index(drop=True)
+
+def generate_historical_orders(num_orders=8000, months_back=6, engine="python", seed=None, chunk_size=1_000_000,
+                               output_format="csv", num_shards=1, end_date=None, items_format="json", skew=None):
+    """Generate historical orders over past X months
+
+    engine="python" builds one order at a time; engine="numpy" draws whole
+    chunks of orders as arrays and is the one to use for millions of orders.
+    Chunks are written out as they are generated (output_format "csv" or
+    "parquet", the latter partitioned by order_date), so with the numpy
+    engine memory stays at one chunk regardless of num_orders.
+
+    With num_shards > 1 (numpy engine) the date range is split across a
+    process pool. Output is identical for the same seed, num_shards,
+    chunk_size and end_date: every chunk is drawn from the shard's random
+    stream as one batch, so a different chunk_size splits the draws
+    differently and gives other rows. A seeded run without end_date is
+    anchored on today's midnight.
+
+    items_format (numpy engine) chooses between the items JSON column, a
+    slim orders table plus an exploded order_items table keyed by order_id,
+    or both; see ITEMS_FORMATS.
+
+    skew is a preset name from skew.SKEW_PRESETS ("uniform", "realistic",
+    "hot_key"), a JSON object string or a dict: Zipf / weighted
+    restaurants, customers and items, and hour-of-day / day-of-week
+    seasonality. The default keeps every draw uniform.
+    """
+    
+    if end_date is None:
+        end_date = datetime.now() if seed is None else datetime.combine(datetime.now().date(), datetime.min.time())
+    start_date = end_date - timedelta(days=months_back * 30)
+    
+    print(f"Generating {num_orders} orders from {start_date.date()} to {end_date.date()}")
+    
+    if items_format not in ITEMS_FORMATS:
+        raise ValueError(f"Unknown items format: {items_format!r} (expected one of {ITEMS_FORMATS})")
+    skew = resolve_skew(skew)
+    
+    if engine == "numpy":
+        shard_plans = plan_order_shards(num_orders, start_date, end_date, seed, num_shards, skew)
+        if num_shards == 1:
+            stats = [generate_historical_orders_shard(
+                None, shard_plans[0], start_date, end_date, chunk_size, output_format, items_format, skew
+            )]
+        else:
+            prepare_shards("historical_orders", output_format)
+            if items_format != "json":
+                prepare_shards("order_items", output_format)
+            with ProcessPoolExecutor(max_workers=num_shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+                stats = list(pool.map(
+                    generate_historical_orders_shard,
+                    range(num_shards), shard_plans,
+                    repeat(start_date), repeat(end_date), repeat(chunk_size), repeat(output_format), repeat(items_format),
+                    repeat(skew)
+                ))
+            merge_shards("historical_orders", output_format, num_shards)
+            if items_format != "json":
+                merge_shards("order_items", output_format, num_shards)
+    elif engine == "python":
+        if num_shards != 1 or items_format != "json":
+            raise ValueError("Sharded generation and order_items output need engine='numpy'")
+        if seed is not None:
+            random.seed(seed)
+        chunks = [(generate_historical_orders_python(num_orders, start_date, end_date, skew), None)]
+        stats = [write_historical_orders(chunks, output_format, verbose=False)]
+    else:
+        raise ValueError(f"Unknown engine: {engine!r} (expected 'python' or 'numpy')")
     
-    # Save to CSV
-    df_orders.to_csv(os.path.join(script_dir, "data", "historical_orders.csv"), index=False)
+    stats = [shard_stats for shard_stats in stats if shard_stats["rows"]]
     
-    print(f"\nGenerated {len(df_orders)} historical orders")
-    print(f"Saved to: historical_orders.csv")
-    print(f"Date range: {df_orders['timestamp'].min()} to {df_orders['timestamp'].max()}")
-    print(f"Total revenue: AED {df_orders['total_amount'].sum():,.2f}")
+    print(f"\nGenerated {sum(shard_stats['rows'] for shard_stats in stats)} historical orders")
+    print(f"Saved to: {os.path.relpath(output_path('historical_orders', output_format), script_dir)}")
+    if stats:
+        print(f"Date range: {stats[0]['first_timestamp']} to {stats[-1]['last_timestamp']}")
+    print(f"Total revenue: AED {sum(shard_stats['total_revenue'] for shard_stats in stats):,.2f}")
 
 # ============================================
 # MAIN
@@ -1,17 +1,15 @@
 import pandas as pd
-import random
-import requests
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
 import os
-import time
-from datetime import datetime, timedelta
-import json
+from storage import iter_table_chunks, open_writer, output_path, read_table, table_columns
 
 
-# ============================================
-# LOAD HISTORICAL ORDERS
-# ============================================
 script_dir = os.path.dirname(os.path.abspath(__file__))
-df_orders = pd.read_csv(os.path.join(script_dir, "data", "historical_orders.csv"))
+
+ORDER_COLUMNS = ["order_id", "timestamp", "restaurant_id", "customer_id", "items"]
 
 # ============================================
 # REVIEW TEMPLATES
@@ -66,109 +64,258 @@ REVIEW_TEMPLATES = {
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
-def extract_items_from_order(items_json):
-    """Extract item names from order JSON"""
-    items = json.loads(items_json)
-    return [item['name'] for item in items]
-
-def format_dishes(dishes_list):
-    """Format dish names for review text"""
-    if len(dishes_list) == 1:
-        return dishes_list[0]
-    elif len(dishes_list) == 2:
-        return f"{dishes_list[0]} and {dishes_list[1]}"
+RATINGS = np.array([5, 4, 3, 2, 1])
+RATING_WEIGHTS = np.array([0.50, 0.25, 0.12, 0.08, 0.05])
+
+def split_template(template):
+    """Split a template around its two placeholders into (prefix, middle, suffix, dishes_first)"""
+    first, second = sorted(["{dishes}", "{highlight}"], key=template.index)
+    prefix, rest = template.split(first)
+    middle, suffix = rest.split(second)
+    return prefix, middle, suffix, first == "{dishes}"
+
+def build_template_table():
+    """Pre-split every template once; template j of a rating sits at first_template[rating] + j"""
+    parts = []
+    first_template = np.zeros(RATINGS.max() + 1, dtype=np.int64)
+    template_count = np.zeros(RATINGS.max() + 1, dtype=np.int64)
+    for rating, templates in REVIEW_TEMPLATES.items():
+        first_template[rating] = len(parts)
+        template_count[rating] = len(templates)
+        parts.extend(split_template(template) for template in templates)
+    
+    prefixes, middles, suffixes, dishes_first = zip(*parts)
+    # Commas are stripped from the rendered text, so strip them from the fragments up front
+    return {
+        "prefix": pc.replace_substring(pa.array(prefixes), ",", " "),
+        "middle": pc.replace_substring(pa.array(middles), ",", " "),
+        "suffix": pc.replace_substring(pa.array(suffixes), ",", " "),
+        "dishes_first": pa.array(dishes_first),
+        "first_template": first_template,
+        "template_count": template_count
+    }
+
+TEMPLATE_TABLE = build_template_table()
+
+def to_arrow(values):
+    """A pandas column as a single contiguous Arrow array"""
+    array = pa.array(values)
+    return array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+
+class OrderItemsReader:
+    """Reads the order_items table in step with the historical_orders chunks
+
+    Both tables are written in timestamp order, so each chunk only needs
+    the items read ahead up to its last order date: rows of earlier dates
+    are released after the chunk and only that last date, which may
+    continue into the next chunk, is carried over.
+    """
+    
+    def __init__(self, chunk_size):
+        self.chunks = iter_table_chunks("order_items", chunk_size, columns=["order_id", "order_date", "item_id"])
+        self.buffer = pd.DataFrame(columns=["order_id", "order_date", "item_id"])
+        self.exhausted = False
+    
+    def through(self, last_date):
+        """Items dated up to last_date (ISO date)"""
+        while not self.exhausted and (self.buffer.empty or self.buffer['order_date'].iloc[-1] <= last_date):
+            df_chunk = next(self.chunks, None)
+            if df_chunk is None:
+                self.exhausted = True
+                break
+            df_chunk['order_date'] = df_chunk['order_date'].astype(str).str[:10]
+            self.buffer = pd.concat([self.buffer, df_chunk], ignore_index=True)
+        
+        df_items = self.buffer[self.buffer['order_date'] <= last_date]
+        self.buffer = self.buffer[self.buffer['order_date'] >= last_date].reset_index(drop=True)
+        return df_items
+
+ITEMS_JSON_SCHEMA = pa.schema([("items", pa.list_(pa.struct([("name", pa.string())])))])
+
+def load_order_dishes(df_orders, order_items=None, item_names=None):
+    """Dish names per order as an Arrow list array, from the items JSON column or the order_items table
+
+    Without an items column, order_items (an OrderItemsReader) supplies the
+    chunk's items and item_names maps item_id to the dish name.
+    """
+    if "items" in df_orders:
+        # Parsed as JSON (one {"items": [...]} document per line), so names with escaped characters come out whole
+        documents = pc.binary_join_element_wise('{"items": ', to_arrow(df_orders['items']).cast(pa.string()), "}", "")
+        lines = pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(documents)], pa.int32()), documents), "\n")
+        items = pj.read_json(
+            pa.BufferReader(lines[0].as_buffer()),
+            parse_options=pj.ParseOptions(explicit_schema=ITEMS_JSON_SCHEMA, unexpected_field_behavior="ignore")
+        )['items'].combine_chunks()
+        names = pc.struct_field(items.flatten(), "name")
+        lengths = pc.list_value_length(items).to_numpy()
     else:
-        return f"{', '.join(dishes_list[:-1])}, and {dishes_list[-1]}"
+        df_items = order_items.through(pd.to_datetime(df_orders['timestamp']).max().strftime("%Y-%m-%d"))
+        
+        # One row per (order, item), in the order the orders appear in the chunk
+        df_orders_ids = pd.DataFrame({"order_id": df_orders['order_id'].astype(str), "row": np.arange(len(df_orders))})
+        df_items = df_orders_ids.merge(
+            df_items[["order_id", "item_id"]].assign(order_id=df_items['order_id'].astype(str)), on="order_id"
+        )
+        df_items = df_items.sort_values("row", kind="stable")
+        names = to_arrow(df_items['item_id'].astype(str).map(item_names).astype(str))
+        lengths = np.bincount(df_items['row'], minlength=len(df_orders))
+    
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), names.cast(pa.string()))
+
+def format_dishes(dishes):
+    """Join each order's dish list as "a", "a and b" or "a, b, and c" (commas already stripped)"""
+    lengths = pc.list_value_length(dishes).to_numpy()
+    names = pc.replace_substring(dishes.flatten(), ",", " ")
+    parents = pc.list_parent_indices(dishes).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    position = np.arange(len(names)) - offsets[parents]
+    count = lengths[parents]
+    
+    separators = np.select(
+        [position == 0, count == 2, position == count - 1],
+        ["", " and ", "  and "],
+        default="  "
+    )
+    pieces = pc.binary_join_element_wise(pa.array(separators), names, "")
+    return pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), pieces), "")
 
-def generate_review_text(rating, dishes_list):
-    """Generate review text based on rating and dishes"""
-    template = random.choice(REVIEW_TEMPLATES[rating])
+def generate_review_text(ratings, dishes, rng):
+    """Render the review text of every row from the pre-split templates"""
+    lengths = pc.list_value_length(dishes).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
     
-    dishes_formatted = format_dishes(dishes_list)
-    highlight = random.choice(dishes_list)
+    templates = TEMPLATE_TABLE["first_template"][ratings] + (
+        rng.random(len(ratings)) * TEMPLATE_TABLE["template_count"][ratings]
+    ).astype(np.int64)
+    highlights = pc.replace_substring(
+        dishes.flatten().take(offsets[:-1] + (rng.random(len(ratings)) * lengths).astype(np.int64)), ",", " "
+    )
+    dishes_formatted = format_dishes(dishes)
     
-    review = template.format(
-        dishes=dishes_formatted,
-        highlight=highlight
+    dishes_first = TEMPLATE_TABLE["dishes_first"].take(templates)
+    return pc.binary_join_element_wise(
+        TEMPLATE_TABLE["prefix"].take(templates),
+        pc.if_else(dishes_first, dishes_formatted, highlights),
+        TEMPLATE_TABLE["middle"].take(templates),
+        pc.if_else(dishes_first, highlights, dishes_formatted),
+        TEMPLATE_TABLE["suffix"].take(templates),
+        ""
     )
+
+def review_timestamps(order_timestamps, rng):
+    """Order timestamp + 1-7 days, as ISO strings (seconds only when the microseconds are zero, like isoformat)"""
+    timestamps = to_arrow(order_timestamps)
+    if not pa.types.is_timestamp(timestamps.type):
+        timestamps = timestamps.cast(pa.string())
+    timestamps = timestamps.cast(pa.timestamp("us"))
+    
+    days = rng.integers(1, 8, size=len(timestamps)) * np.int64(86_400_000_000)
+    timestamps = pc.add(timestamps, pa.array(days, pa.duration("us")))
     
-    return review.replace(',', ' ')
+    return pc.if_else(
+        pc.equal(pc.microsecond(timestamps), 0),
+        pc.strftime(timestamps.cast(pa.timestamp("s"), safe=False), format="%Y-%m-%dT%H:%M:%S"),
+        pc.strftime(timestamps, format="%Y-%m-%dT%H:%M:%S")
+    )
+
+def as_string(array):
+    """An Arrow string array as a pandas string column"""
+    return pd.array(array.cast(pa.large_string()), dtype=pd.StringDtype("pyarrow"))
 
 # ============================================
 # GENERATE REVIEWS WITH IMAGES
 # ============================================
-def generate_customer_reviews(review_percentage=0.35):
-    """Generate reviews from historical orders with images"""
-    
-    reviews = []
-    
-    # Rating distribution
-    rating_weights = {
-        5: 0.50,
-        4: 0.25,
-        3: 0.12,
-        2: 0.08,
-        1: 0.05
-    }
+def generate_customer_reviews(review_percentage=0.35, output_format="csv", chunk_size=100_000, seed=None):
+    """Generate reviews from historical orders with images
+
+    Orders are read and reviews written chunk_size orders at a time (CSV or
+    Parquet partitioned by review_date), so memory stays at one chunk plus
+    the reviews held back for ordering (below).
+    Each chunk is generated in bulk: a boolean mask picks the reviewed
+    orders, ratings are a weighted draw and the text is assembled from
+    pre-split templates with Arrow string kernels. Reviews are written in
+    review_timestamp order across the whole output: a chunk's reviews that
+    a later chunk could still precede (up to 7 days of them) are held back
+    until it has been generated. A seed makes the output reproducible for
+    the same orders.
+    """
     
-    ratings_pool = []
-    for rating, weight in rating_weights.items():
-        ratings_pool.extend([rating] * int(weight * 100))
+    rng = np.random.default_rng(seed)
+    review_count = 0
+    rating_counts = pd.Series(dtype="int64")
+    first_review_ts = last_review_ts = None
     
-    print(f"\nGenerating reviews from {len(df_orders)} orders...")
+    print(f"\nGenerating reviews from historical orders...")
     print(f"Target: {review_percentage*100}% of orders will have reviews\n")
     
-    image_download_count = 0
+    writer = open_writer(
+        "customer_reviews", output_format,
+        partition_col="review_date", partition_from="review_timestamp",
+        dictionary_cols=["restaurant_id"], timestamp_cols=["review_timestamp"]
+    )
+    order_columns = [col for col in ORDER_COLUMNS if col in table_columns("historical_orders")]
+    order_items = item_names = None
+    if "items" not in order_columns:
+        order_items = OrderItemsReader(chunk_size)
+        item_names = read_table("menu_items", columns=["item_id", "name"]).drop_duplicates("item_id")
+        item_names = item_names.set_index("item_id")['name']
     
-    for idx, order in df_orders.iterrows():
-        # Only 35% of orders get reviews
-        if random.random() > review_percentage:
-            continue
-        
-        # Extract dishes from order
-        dishes = extract_items_from_order(order['items'])
-        
-        # Assign rating
-        rating = random.choice(ratings_pool)
-        
-        # Generate review text
-        review_text = generate_review_text(rating, dishes)
-        
-        # Review date: 1-7 days after order
-        order_date = datetime.fromisoformat(order['timestamp'])
-        review_ts = order_date + timedelta(days=random.randint(1, 7))
-        
-        # Generate review ID
-        review_id = f"REV-{len(reviews) + 1:06d}"
-        
-        review = {
-            "review_id": review_id,
-            "order_id": order['order_id'],
-            "customer_id": order['customer_id'],
-            "restaurant_id": order['restaurant_id'],
-            "review_text": review_text,
-            "rating": rating,
-            "review_timestamp": review_ts.isoformat()
-        }
-        
-        reviews.append(review)
-        
-        if len(reviews) % 100 == 0:
-            print(f"Generated {len(reviews)} reviews...")
+    def write_reviews(df_reviews):
+        nonlocal rating_counts, first_review_ts, last_review_ts
+        if len(df_reviews) == 0:
+            return
+        df_reviews = df_reviews.reset_index(drop=True)
+        writer.write(df_reviews)
+        rating_counts = rating_counts.add(df_reviews['rating'].value_counts(), fill_value=0).astype("int64")
+        first_review_ts = first_review_ts or df_reviews['review_timestamp'].iloc[0]
+        last_review_ts = df_reviews['review_timestamp'].iloc[-1]
     
-    df_reviews = pd.DataFrame(reviews)
-    df_reviews = df_reviews.sort_values('review_timestamp').reset_index(drop=True)
-    df_reviews.to_csv(os.path.join(script_dir, "data", "customer_reviews.csv"), index=False)
+    pending = None
+    with writer:
+        for df_orders in iter_table_chunks("historical_orders", chunk_size, columns=order_columns):
+            # Only review_percentage of orders get reviews
+            reviewed = rng.random(len(df_orders)) <= review_percentage
+            df_orders = df_orders[reviewed].reset_index(drop=True)
+            if len(df_orders) == 0:
+                continue
+            
+            ratings = rng.choice(RATINGS, size=len(df_orders), p=RATING_WEIGHTS)
+            review_numbers = pa.array(np.arange(review_count + 1, review_count + len(df_orders) + 1))
+            review_count += len(df_orders)
+            
+            df_reviews = pd.DataFrame({
+                "review_id": as_string(pc.binary_join_element_wise(
+                    "REV-", pc.utf8_lpad(review_numbers.cast(pa.string()), 6, "0"), ""
+                )),
+                "order_id": as_string(to_arrow(df_orders['order_id']).cast(pa.string())),
+                "customer_id": as_string(to_arrow(df_orders['customer_id']).cast(pa.string())),
+                "restaurant_id": as_string(to_arrow(df_orders['restaurant_id']).cast(pa.string())),
+                "review_text": as_string(generate_review_text(ratings, load_order_dishes(df_orders, order_items, item_names), rng)),
+                "rating": ratings,
+                "review_timestamp": as_string(review_timestamps(df_orders['timestamp'], rng))
+            })
+            # A review comes 1-7 days after its order and orders arrive in timestamp order, so every later
+            # chunk's reviews fall at or after this chunk's last order + 1 day: reviews before that are final
+            # and written in order, the rest wait for the next chunk
+            pending = pd.concat([pending, df_reviews], ignore_index=True).sort_values('review_timestamp', kind="stable")
+            final_before = (pd.to_datetime(df_orders['timestamp']).max() + pd.Timedelta(days=1)).isoformat()
+            ready = pending['review_timestamp'] < final_before
+            write_reviews(pending[ready])
+            pending = pending[~ready]
+            print(f"Generated {review_count} reviews...")
+        if pending is not None:
+            write_reviews(pending)
     
     # Statistics
     print(f"\n" + "="*60)
     print(f"GENERATION COMPLETE")
     print("="*60)
-    print(f"Total reviews: {len(df_reviews)}")
-    print(f"Saved to: customer_reviews.csv")
+    print(f"Total reviews: {writer.rows}")
+    print(f"Saved to: {os.path.relpath(output_path('customer_reviews', output_format), script_dir)}")
     print(f"\nRating Distribution:")
-    print(df_reviews['rating'].value_counts().sort_index())
-    print(f"Date range: {df_reviews['review_timestamp'].min()} to {df_reviews['review_timestamp'].max()}")
+    print(rating_counts.sort_index())
+    print(f"Date range: {first_review_ts} to {last_review_ts}")
 
 # ============================================
 # MAIN
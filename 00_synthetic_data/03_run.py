@@ -1,16 +1,50 @@
 import os
+import argparse
 import importlib
+from datetime import datetime
+from skew import SKEW_PRESETS
+from storage import DATA_DIR
 
 
 if __name__ == "__main__":
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.makedirs(os.path.join(script_dir, "data"), exist_ok=True)
+    parser = argparse.ArgumentParser(description="Generate the synthetic restaurant dataset")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="output format for data/")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="customer and historical order generator (numpy for millions of rows)")
+    parser.add_argument("--items", choices=["json", "table", "both"], default="json",
+                        help="items as a JSON column, an exploded order_items table, or both (numpy engine)")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=8000)
+    parser.add_argument("--review-percentage", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="rows generated and written per chunk; with --seed, part of what makes a run reproducible")
+    parser.add_argument("--seed", type=int, default=None, help="master seed; per-shard seeds are derived from it")
+    parser.add_argument("--shards", type=int, default=1, help="worker processes for customers and orders (numpy engine)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, default=None,
+                        help="last order date (defaults to now, or today's midnight when --seed is set)")
+    parser.add_argument("--skew", default="uniform",
+                        help=f"order distribution preset ({', '.join(SKEW_PRESETS)}) or a JSON skew config")
+    args = parser.parse_args()
+    if args.shards > 1 and args.engine != "numpy":
+        parser.error("--shards needs --engine numpy")
+    if args.items != "json" and args.engine != "numpy":
+        parser.error("--items table/both needs --engine numpy")
+
+    os.makedirs(DATA_DIR, exist_ok=True)
 
     sql_db = importlib.import_module("00_sql_db")
-    sql_db.generate_data_for_sql_db()
+    sql_db.generate_data_for_sql_db(
+        num_customers=args.customers, output_format=args.format, chunk_size=args.chunk_size,
+        seed=args.seed, num_shards=args.shards, engine=args.engine
+    )
 
     historical_orders = importlib.import_module("01_historical_orders")
-    historical_orders.generate_historical_orders()
+    historical_orders.generate_historical_orders(
+        num_orders=args.orders, engine=args.engine, chunk_size=args.chunk_size, output_format=args.format,
+        seed=args.seed, num_shards=args.shards, end_date=args.end_date, items_format=args.items, skew=args.skew
+    )
 
     reviews = importlib.import_module("02_reviews")
-    reviews.generate_customer_reviews(review_percentage=0.01)
\ No newline at end of file
+    reviews.generate_customer_reviews(
+        review_percentage=args.review_percentage, output_format=args.format, chunk_size=args.chunk_size,
+        seed=args.seed
+    )
@@ -2,9 +2,18 @@ import os
 import json
 import random
 import time
+import asyncio
+import argparse
 from datetime import datetime
+from functools import partial
 from azure.eventhub import EventHubProducerClient, EventData
+from azure.eventhub.aio import EventHubProducerClient as AsyncEventHubProducerClient
+import numpy as np
 import pandas as pd
+from event_consumer import consume_partitions, summarize_partitions
+from event_sinks import FileProducer, QueueProducer, partition_for_key
+from skew import SKEW_PRESETS, order_samplers
+from storage import iter_table_chunks, read_table, table_columns
 
 from dotenv import load_dotenv
 load_dotenv()   
@@ -13,11 +22,11 @@ EVENTHUB_CONNECTION_STRING = os.getenv("EVENTHUB_CONNECTION_STRING")
 EVENTHUB_NAME = os.getenv("EVENTHUB_NAME")
 
 
-# Load data
+# Load data (CSV or Parquet, whichever was generated last)
 script_dir = os.path.dirname(os.path.abspath(__file__))
-df_restaurants = pd.read_csv(os.path.join(script_dir, "data", "restaurants.csv"))
-df_customers = pd.read_csv(os.path.join(script_dir, "data", "customers.csv"))
-df_menu_items = pd.read_csv(os.path.join(script_dir, "data", "menu_items.csv"))
+df_restaurants = read_table("restaurants")
+df_customers = read_table("customers", columns=["customer_id"])
+df_menu_items = read_table("menu_items")
 
 RESTAURANTS = df_restaurants['restaurant_id'].tolist()
 CUSTOMERS = df_customers['customer_id'].tolist()
@@ -29,14 +38,17 @@ ORDER_TYPES = ["dine_in", "takeaway", "delivery"]
 PAYMENT_METHODS = ["cash", "card", "wallet"]
 ORDER_STATUSES = ["pending", "confirmed", "preparing", "ready", "delivered"]
 
-def generate_order():
+# Uniform pickers: the original random.choice / random.sample draws
+UNIFORM_SAMPLERS = order_samplers(None, RESTAURANTS, CUSTOMERS, MENU_BY_RESTAURANT)
+
+def generate_order(samplers=UNIFORM_SAMPLERS):
     order_date = datetime.utcnow()
-    restaurant_id = random.choice(RESTAURANTS)
-    customer_id = random.choice(CUSTOMERS)
+    restaurant_id = samplers["restaurant"]()
+    customer_id = samplers["customer"]()
     
     menu_items = MENU_BY_RESTAURANT[restaurant_id]
     num_items = random.randint(1, min(5, len(menu_items)))
-    selected_items = random.sample(menu_items, num_items)
+    selected_items = samplers["items"](restaurant_id, num_items)
     
     items = []
     total_amount = 0.0
@@ -70,7 +82,8 @@ def generate_order():
         "created_at": order_date.isoformat() + "Z"
     }
 
-def stream_to_eventhub(interval_seconds=3, max_orders=None):
+def stream_to_eventhub(interval_seconds=3, max_orders=None, skew=None):
+    samplers = order_samplers(skew, RESTAURANTS, CUSTOMERS, MENU_BY_RESTAURANT)
     producer = EventHubProducerClient.from_connection_string(
         conn_str=EVENTHUB_CONNECTION_STRING,
         eventhub_name=EVENTHUB_NAME
@@ -81,7 +94,7 @@ def stream_to_eventhub(interval_seconds=3, max_orders=None):
     
     try:
         while True:
-            order = generate_order()
+            order = generate_order(samplers)
             event_data_batch = producer.create_batch()
             event_data_batch.add(EventData(json.dumps(order)))
             producer.send_batch(event_data_batch)
@@ -103,5 +116,303 @@ def stream_to_eventhub(interval_seconds=3, max_orders=None):
         producer.close()
         pass
 
+# ============================================
+# HIGH-THROUGHPUT MODE
+# ============================================
+SINKS = ["eventhub", "file", "queue"]
+
+def open_producer(sink="eventhub", path=None):
+    """Async producer for the real hub, or a local stand-in with the same interface"""
+    if sink == "eventhub":
+        return AsyncEventHubProducerClient.from_connection_string(
+            conn_str=EVENTHUB_CONNECTION_STRING,
+            eventhub_name=EVENTHUB_NAME
+        )
+    if sink == "file":
+        return FileProducer(path or os.path.join(script_dir, "data", "order_events.jsonl"))
+    if sink == "queue":
+        return QueueProducer()
+    raise ValueError(f"Unknown sink: {sink!r} (expected one of {SINKS})")
+
+PARTITION_KEYS = {"restaurant": "restaurant_id", "customer": "customer_id"}
+
+# Orders taken per pacing tick at most, so in-flight sends get to run between them
+MAX_ORDERS_PER_TICK = 1000
+
+def order_partition(order, partition_by, partition_count):
+    """Partition id for an order routed by restaurant_id or customer_id"""
+    return str(partition_for_key(order[PARTITION_KEYS[partition_by]], partition_count))
+
+def synthetic_orders(target_rate=5000, skew=None):
+    """Schedule of generate_order calls: the n-th is due n / target_rate seconds in (all at once when None)
+
+    skew (preset name or config, see skew.py) biases restaurants, customers
+    and items; live timestamps are always the send time.
+    """
+    make_order = partial(generate_order, order_samplers(skew, RESTAURANTS, CUSTOMERS, MENU_BY_RESTAURANT))
+    n = 0
+    while True:
+        yield (0.0 if target_rate is None else n / target_rate), make_order
+        n += 1
+
+async def stream_to_eventhub_fast(producer, target_rate=5000, max_orders=None, duration_seconds=None,
+                                  max_in_flight=8, linger_ms=50, tick_ms=10, partition_by=None, partition_count=None,
+                                  orders=None, skew=None):
+    """Stream orders at target_rate events/sec (None = as fast as possible)
+
+    skew biases the synthetic orders (see synthetic_orders). orders
+    replaces the synthetic stream with any schedule of
+    (send_at_seconds, make_order) pairs in send_at order; make_order is
+    called when the order is due, so it can stamp the send time.
+
+    Orders are packed into each EventDataBatch until it hits the size limit
+    or has waited linger_ms, and up to max_in_flight batches are being sent
+    at once. Pacing is checked every tick_ms. With partition_by
+    ("restaurant" or "customer") every order goes to a fixed partition
+    derived from that key, keeping per-key ordering; otherwise the hub
+    spreads batches round-robin. Returns throughput and send latency
+    statistics; batches whose send failed are reported in events_failed /
+    batches_failed (with the first error) and left out of the throughput;
+    an order too large for even an empty batch is counted as failed too
+    (events_too_large) and skipped.
+    """
+    in_flight = asyncio.Semaphore(max_in_flight)
+    pending = set()
+    latencies = []
+    failures = []
+    too_large = []
+    batch_count = 0
+    order_count = 0
+    
+    async def send(batch):
+        started = time.perf_counter()
+        try:
+            await producer.send_batch(batch)
+            latencies.append(time.perf_counter() - started)
+        except Exception as error:
+            failures.append((len(batch), error))
+        finally:
+            in_flight.release()
+    
+    async def dispatch(batch):
+        nonlocal batch_count
+        if not len(batch):
+            return
+        await in_flight.acquire()
+        task = asyncio.create_task(send(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        batch_count += 1
+    
+    if orders is None:
+        orders = synthetic_orders(target_rate, skew)
+        print(f"\n\nStreaming to {producer.eventhub_name} at "
+              f"{'max' if target_rate is None else f'{target_rate:,.0f}'} events/sec")
+    orders = iter(orders)
+    next_order = next(orders, None)
+    
+    start = time.perf_counter()
+    async with producer:
+        if partition_by is not None and partition_count is None:
+            partition_count = len(await producer.get_partition_ids())
+        
+        # One open batch per partition (a single one when not routing), with the time it was started
+        batches = {}
+        while next_order is not None:
+            elapsed = time.perf_counter() - start
+            if duration_seconds is not None and elapsed >= duration_seconds:
+                break
+            if max_orders is not None and order_count >= max_orders:
+                break
+            
+            # Orders scheduled up to now that have not been produced yet
+            due = 0
+            while next_order is not None and next_order[0] <= elapsed and due < MAX_ORDERS_PER_TICK:
+                if max_orders is not None and order_count >= max_orders:
+                    break
+                order = next_order[1]()
+                next_order = next(orders, None)
+                due += 1
+                partition = None if partition_by is None else order_partition(order, partition_by, partition_count)
+                if partition not in batches:
+                    batches[partition] = (await producer.create_batch(partition_id=partition), time.perf_counter())
+                
+                event = EventData(json.dumps(order))
+                order_count += 1
+                try:
+                    batches[partition][0].add(event)
+                except ValueError:
+                    if len(batches[partition][0]):
+                        await dispatch(batches[partition][0])
+                        batches[partition] = (await producer.create_batch(partition_id=partition), time.perf_counter())
+                    try:
+                        batches[partition][0].add(event)
+                    except ValueError as error:
+                        # Larger than an empty batch can hold, so it can never be sent: counted as failed
+                        too_large.append(error)
+            
+            now = time.perf_counter()
+            for partition, (batch, batch_started) in list(batches.items()):
+                if now - batch_started >= linger_ms / 1000:
+                    await dispatch(batch)
+                    del batches[partition]
+            
+            waiting = next_order is not None and next_order[0] > time.perf_counter() - start
+            await asyncio.sleep(tick_ms / 1000 if waiting else 0)
+        
+        for batch, _ in batches.values():
+            await dispatch(batch)
+        await asyncio.gather(*pending)
+    
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    events_failed = sum(size for size, _ in failures) + len(too_large)
+    events_sent = order_count - events_failed
+    batches_sent = batch_count - len(failures)
+    errors = [error for _, error in failures] + too_large
+    stats = {
+        "events": events_sent,
+        "batches": batches_sent,
+        "events_failed": events_failed,
+        "batches_failed": len(failures),
+        "events_too_large": len(too_large),
+        "first_error": repr(errors[0]) if errors else None,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_second": round(events_sent / elapsed, 1),
+        "events_per_batch": round(events_sent / max(batches_sent, 1), 1),
+        "latency_p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "latency_p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+        "latency_p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+        "latency_max_ms": round(float(latencies_ms.max()), 2)
+    }
+    
+    print(f"\nSent {stats['events']:,} events in {stats['batches']:,} batches over {stats['elapsed_seconds']}s")
+    print(f"Throughput: {stats['events_per_second']:,} events/sec ({stats['events_per_batch']} events/batch)")
+    print(f"Send latency: p50 {stats['latency_p50_ms']}ms | p95 {stats['latency_p95_ms']}ms | "
+          f"p99 {stats['latency_p99_ms']}ms | max {stats['latency_max_ms']}ms")
+    if errors:
+        print(f"FAILED: {stats['events_failed']:,} events were not sent ({stats['batches_failed']:,} failed batches, "
+              f"{stats['events_too_large']:,} events too large for a batch; first error: {stats['first_error']})")
+    return stats
+
+# ============================================
+# HISTORICAL REPLAY
+# ============================================
+ORDER_FIELDS = ["order_id", "timestamp", "restaurant_id", "customer_id", "order_type", "items",
+                "total_amount", "payment_method", "order_status", "created_at"]
+
+def replay_order(row):
+    """A historical_orders row as a live order event, stamped with the time it is sent"""
+    order = dict(zip(ORDER_FIELDS, row))
+    order["items"] = json.loads(order["items"])
+    order["timestamp"] = order["created_at"] = datetime.utcnow().isoformat() + "Z"
+    return order
+
+def replay_schedule(speedup=60.0, chunk_size=100_000, max_idle_seconds=None):
+    """historical_orders in timestamp order as a (send_at_seconds, make_order) schedule
+
+    The gaps between consecutive orders are divided by speedup, so the
+    lunch/dinner peaks keep their shape at any speed; speedup=None sends
+    everything as fast as possible. max_idle_seconds caps every replayed
+    gap, e.g. to skip the overnight lull. Orders are read chunk_size at a
+    time from the CSV or Parquet output.
+    """
+    if "items" not in table_columns("historical_orders"):
+        raise ValueError("historical_orders has no items column; regenerate it with --items json or both")
+    
+    previous = None
+    send_at = 0.0
+    for df_orders in iter_table_chunks("historical_orders", chunk_size, columns=ORDER_FIELDS):
+        # Timestamps are strings in CSV, datetimes in Parquet
+        seconds = pd.to_datetime(df_orders['timestamp']).to_numpy().astype("datetime64[us]").astype(np.int64) / 1e6
+        order = np.argsort(seconds, kind="stable")
+        df_orders, seconds = df_orders.iloc[order], seconds[order]
+        
+        if speedup is None:
+            send_times = np.zeros(len(seconds))
+        else:
+            gaps = np.diff(seconds, prepend=seconds[0] if previous is None else previous).clip(min=0) / speedup
+            if max_idle_seconds is not None:
+                gaps = gaps.clip(max=max_idle_seconds)
+            send_times = send_at + np.cumsum(gaps)
+            send_at = send_times[-1]
+        previous = seconds[-1]
+        
+        for row, row_send_at in zip(df_orders.itertuples(index=False, name=None), send_times):
+            yield row_send_at, partial(replay_order, row)
+
+async def replay_historical_orders(producer, speedup=60.0, max_idle_seconds=None, chunk_size=100_000, **kwargs):
+    """Replay historical_orders into the stream at speedup x real time, timestamps rewritten to now"""
+    print(f"\n\nReplaying historical_orders to {producer.eventhub_name} at "
+          f"{'max speed' if speedup is None else f'{speedup:g}x'}")
+    return await stream_to_eventhub_fast(
+        producer, orders=replay_schedule(speedup, chunk_size, max_idle_seconds), **kwargs
+    )
+
+async def benchmark_partitions(partition_count=4, partition_by="restaurant", target_rate=5000, duration_seconds=10,
+                               process_ms=0.0, **kwargs):
+    """Produce into a local partitioned queue while consuming every partition concurrently
+
+    Reports per-partition event share, backlog, queueing and end-to-end
+    latency, per-restaurant ordering violations and the overall skew, to
+    size the partition count before going to the real hub.
+    """
+    producer = QueueProducer(partition_count)
+    consumers = asyncio.create_task(consume_partitions(producer, process_ms=process_ms))
+    stats = await stream_to_eventhub_fast(
+        producer, target_rate=target_rate, duration_seconds=duration_seconds,
+        partition_by=partition_by, partition_count=partition_count, **kwargs
+    )
+    df_partitions, partition_skew = summarize_partitions(await consumers)
+    
+    print(f"\nPartitions: {partition_count} | routed by: {partition_by or 'round-robin'} | skew (max/mean): {partition_skew}")
+    print(df_partitions.to_string())
+    return stats, df_partitions, partition_skew
+
 if __name__ == "__main__":
-    stream_to_eventhub(interval_seconds=3)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Stream synthetic orders to Event Hub")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="high-throughput mode: target events/sec (0 = as fast as possible)")
+    parser.add_argument("--interval", type=float, default=3, help="seconds between single orders (default mode)")
+    parser.add_argument("--max-orders", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds (high-throughput mode)")
+    parser.add_argument("--in-flight", type=int, default=8, help="concurrent batch sends (high-throughput mode)")
+    parser.add_argument("--linger-ms", type=float, default=50, help="max wait before sending a partial batch")
+    parser.add_argument("--sink", choices=SINKS, default="eventhub", help="real hub or a local stand-in")
+    parser.add_argument("--sink-path", default=None, help="output file for --sink file")
+    parser.add_argument("--partition-by", choices=list(PARTITION_KEYS), default=None,
+                        help="route every order to a fixed partition by this key (default: round-robin)")
+    parser.add_argument("--partitions", type=int, default=None,
+                        help="partition count to route over (default: the hub's)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="local partition-parallel consumer benchmark instead of sending anywhere")
+    parser.add_argument("--process-ms", type=float, default=0.0, help="simulated consumer cost per event (--benchmark)")
+    parser.add_argument("--replay", action="store_true", help="replay historical_orders instead of synthetic orders")
+    parser.add_argument("--speedup", type=float, default=60, help="replay speed-up factor (0 = as fast as possible)")
+    parser.add_argument("--max-idle", type=float, default=None, help="cap on any replayed gap between orders, in seconds")
+    parser.add_argument("--skew", default="uniform",
+                        help=f"synthetic order distribution preset ({', '.join(SKEW_PRESETS)}) or a JSON skew config")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        asyncio.run(benchmark_partitions(
+            partition_count=args.partitions or 4, partition_by=args.partition_by, target_rate=args.rate or None,
+            duration_seconds=args.duration or 10, process_ms=args.process_ms,
+            max_in_flight=args.in_flight, linger_ms=args.linger_ms,
+            orders=replay_schedule(args.speedup or None, max_idle_seconds=args.max_idle) if args.replay else None,
+            skew=args.skew
+        ))
+    elif args.replay:
+        asyncio.run(replay_historical_orders(
+            open_producer(args.sink, args.sink_path), speedup=args.speedup or None, max_idle_seconds=args.max_idle,
+            max_orders=args.max_orders, duration_seconds=args.duration, max_in_flight=args.in_flight,
+            linger_ms=args.linger_ms, partition_by=args.partition_by, partition_count=args.partitions
+        ))
+    elif args.rate is None:
+        stream_to_eventhub(interval_seconds=args.interval, max_orders=args.max_orders, skew=args.skew)
+    else:
+        asyncio.run(stream_to_eventhub_fast(
+            open_producer(args.sink, args.sink_path), target_rate=args.rate or None, max_orders=args.max_orders,
+            duration_seconds=args.duration, max_in_flight=args.in_flight, linger_ms=args.linger_ms,
+            partition_by=args.partition_by, partition_count=args.partitions, skew=args.skew
+        ))
\ No newline at end of file
@@ -0,0 +1,88 @@
+import json
+import time
+import asyncio
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+
+# ============================================
+# LOCAL PARTITION-PARALLEL CONSUMER
+# ============================================
+def event_time(order):
+    """Epoch seconds of an order's created_at ("...Z" ISO string from generate_order)"""
+    return datetime.fromisoformat(order["created_at"].rstrip("Z")).replace(tzinfo=timezone.utc).timestamp()
+
+
+async def consume_partition(queue, partition, process_ms=0.0, max_batch=500, ordering_key="restaurant_id"):
+    """Drain one partition queue of a QueueProducer until its end-of-stream marker
+
+    Events are taken in batches of up to max_batch, and each batch then costs
+    process_ms per event, standing in for the per-partition work downstream.
+    Records backlog (events still queued), time spent queued, end-to-end
+    latency from order creation, and events that arrive out of created_at
+    order for their ordering_key.
+    """
+    events = 0
+    backlog = []
+    queued_ms = []
+    end_to_end_ms = []
+    out_of_order = 0
+    last_seen = {}
+    done = False
+
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < max_batch and not queue.empty():
+            batch.append(queue.get_nowait())
+        backlog.append(queue.qsize())
+
+        if process_ms:
+            await asyncio.sleep(process_ms * len(batch) / 1000)
+
+        now = time.time()
+        for enqueued_time, body in batch:
+            if body is None:
+                done = True
+                break
+            order = json.loads(body)
+            created = event_time(order)
+            queued_ms.append((now - enqueued_time) * 1000)
+            end_to_end_ms.append((now - created) * 1000)
+
+            key = order[ordering_key]
+            if created < last_seen.get(key, created):
+                out_of_order += 1
+            last_seen[key] = max(created, last_seen.get(key, created))
+            events += 1
+
+    def percentile(values, q):
+        return round(float(np.percentile(values, q)), 2) if values else 0.0
+
+    return {
+        "partition": partition,
+        "events": events,
+        "keys": len(last_seen),
+        "max_backlog": max(backlog, default=0),
+        "queued_p50_ms": percentile(queued_ms, 50),
+        "queued_p99_ms": percentile(queued_ms, 99),
+        "e2e_p50_ms": percentile(end_to_end_ms, 50),
+        "e2e_p99_ms": percentile(end_to_end_ms, 99),
+        "out_of_order": out_of_order
+    }
+
+
+async def consume_partitions(producer, **kwargs):
+    """Consume every partition of a QueueProducer concurrently; one stats row per partition"""
+    return await asyncio.gather(*(
+        consume_partition(queue, partition, **kwargs) for partition, queue in enumerate(producer.queues)
+    ))
+
+
+def summarize_partitions(partition_stats):
+    """Per-partition stats as a DataFrame plus the skew (busiest partition / mean events)"""
+    df_stats = pd.DataFrame(partition_stats).set_index("partition")
+    mean_events = df_stats["events"].mean()
+    df_stats["share_pct"] = (df_stats["events"] / max(df_stats["events"].sum(), 1) * 100).round(1)
+    skew = round(float(df_stats["events"].max() / mean_events), 2) if mean_events else 0.0
+    return df_stats, skew
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import zlib
+import asyncio
+from azure.eventhub import EventDataBatch
+
+# Event Hubs standard tier message size limit
+MAX_BATCH_BYTES = 1024 * 1024
+
+
+# ============================================
+# LOCAL STAND-INS FOR THE ASYNC PRODUCER CLIENT
+# ============================================
+class LocalEventDataBatch(EventDataBatch):
+    """An EventDataBatch that also keeps its events so a local sink can deliver them
+
+    Size accounting (and the ValueError raised once the batch is full) is the
+    Azure SDK's own, so batches fill up exactly as they would against a hub.
+    """
+
+    def __init__(self, max_size_in_bytes=None, partition_id=None, partition_key=None):
+        super().__init__(max_size_in_bytes=max_size_in_bytes, partition_id=partition_id, partition_key=partition_key)
+        self.partition_id = partition_id
+        self.partition_key = partition_key
+        self.events = []
+
+    def add(self, event_data):
+        super().add(event_data)
+        self.events.append(event_data)
+
+
+class LocalProducer:
+    """Base for sinks that mimic azure.eventhub.aio.EventHubProducerClient
+
+    Only the calls the streaming code uses are provided: get_partition_ids,
+    create_batch, send_batch and close, usable as an async context manager.
+    send_latency_ms adds an artificial round trip to every send.
+    """
+
+    eventhub_name = "local"
+
+    def __init__(self, partition_count=1, max_batch_bytes=MAX_BATCH_BYTES, send_latency_ms=0.0):
+        self.partition_count = partition_count
+        self.max_batch_bytes = max_batch_bytes
+        self.send_latency_ms = send_latency_ms
+        self.events_sent = 0
+        self.batches_sent = 0
+        self._next_partition = 0
+
+    async def get_partition_ids(self):
+        return [str(partition) for partition in range(self.partition_count)]
+
+    async def create_batch(self, max_size_in_bytes=None, partition_id=None, partition_key=None):
+        return LocalEventDataBatch(max_size_in_bytes or self.max_batch_bytes, partition_id, partition_key)
+
+    async def send_batch(self, event_data_batch):
+        if self.send_latency_ms:
+            await asyncio.sleep(self.send_latency_ms / 1000)
+        self._deliver(event_data_batch)
+        self.events_sent += len(event_data_batch)
+        self.batches_sent += 1
+
+    def _partition(self, event_data_batch):
+        """Target partition of a batch: explicit id, hashed key, else round-robin like the hub"""
+        if event_data_batch.partition_id is not None:
+            return int(event_data_batch.partition_id)
+        if event_data_batch.partition_key is not None:
+            return partition_for_key(event_data_batch.partition_key, self.partition_count)
+        partition = self._next_partition
+        self._next_partition = (partition + 1) % self.partition_count
+        return partition
+
+    def _deliver(self, event_data_batch):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class FileProducer(LocalProducer):
+    """Append every event body as one JSON line to a local file"""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.eventhub_name = os.path.basename(path)
+        self.file = open(path, "w")
+
+    def _deliver(self, event_data_batch):
+        self.file.writelines(event.body_as_str() + "\n" for event in event_data_batch.events)
+
+    async def close(self):
+        self.file.close()
+
+
+class QueueProducer(LocalProducer):
+    """Put every event on its partition's in-process asyncio.Queue as (enqueued_time, body)"""
+
+    eventhub_name = "queue"
+
+    def __init__(self, partition_count=1, **kwargs):
+        super().__init__(partition_count, **kwargs)
+        self.queues = [asyncio.Queue() for _ in range(partition_count)]
+
+    def _deliver(self, event_data_batch):
+        queue = self.queues[self._partition(event_data_batch)]
+        enqueued_time = time.time()
+        for event in event_data_batch.events:
+            queue.put_nowait((enqueued_time, event.body_as_str()))
+
+    async def close(self):
+        # Tell the consumers the stream has ended
+        for queue in self.queues:
+            queue.put_nowait((time.time(), None))
+
+
+def partition_for_key(key, partition_count):
+    """Stable partition for a routing key (crc32, so it does not change between runs like hash() does)"""
+    if isinstance(key, str):
+        key = key.encode()
+    return zlib.crc32(key) % partition_count
+
+
+def read_events(path):
+    """Load the events a FileProducer wrote back as dicts"""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
@@ -0,0 +1,167 @@
+import json
+import random
+import numpy as np
+
+# ============================================
+# SKEW / HOT-KEY DISTRIBUTIONS
+# ============================================
+# A skew config is a dict with any of these keys (missing = uniform, the original behaviour):
+#   customer_zipf         Zipf exponent over customers, ranked in master-data order
+#   restaurant_zipf       Zipf exponent over restaurants, ranked in master-data order
+#   restaurant_weights    {restaurant_id: relative weight}, unlisted restaurants weigh 1
+#   item_zipf             Zipf exponent over each restaurant's menu, in menu order
+#   hot_customer_share    share of all orders placed by the first customer
+#   hot_restaurant_share  share of all orders going to the first restaurant
+#   seasonality           lunch/dinner hour peaks and day-of-week weights for timestamps
+SKEW_PRESETS = {
+    "uniform": {},
+    "realistic": {"customer_zipf": 1.0, "restaurant_zipf": 0.8, "item_zipf": 0.8, "seasonality": True},
+    "hot_key": {
+        "customer_zipf": 1.2, "hot_customer_share": 0.2, "hot_restaurant_share": 0.6,
+        "item_zipf": 1.0, "seasonality": True
+    }
+}
+
+# Order hours 10:00-22:59 with lunch and dinner rushes
+HOURS = np.arange(10, 23)
+HOUR_WEIGHTS = np.array([2, 4, 9, 10, 6, 3, 3, 4, 6, 9, 10, 7, 3], dtype=float)
+
+# Monday..Sunday
+DAY_OF_WEEK_WEIGHTS = np.array([0.85, 0.85, 0.9, 0.95, 1.25, 1.35, 1.1])
+
+
+def resolve_skew(skew):
+    """Normalize a preset name, a JSON object string or a dict into a skew config dict"""
+    if skew is None:
+        return {}
+    if isinstance(skew, str):
+        if skew.lstrip().startswith("{"):
+            skew = json.loads(skew)
+        elif skew in SKEW_PRESETS:
+            return dict(SKEW_PRESETS[skew])
+        else:
+            raise ValueError(f"Unknown skew preset: {skew!r} (expected one of {list(SKEW_PRESETS)} or a JSON object)")
+
+    unknown = set(skew) - {
+        "customer_zipf", "restaurant_zipf", "restaurant_weights", "item_zipf",
+        "hot_customer_share", "hot_restaurant_share", "seasonality"
+    }
+    if unknown:
+        raise ValueError(f"Unknown skew settings: {sorted(unknown)}")
+    return dict(skew)
+
+
+def zipf_weights(n, exponent):
+    """Bounded Zipf weights 1 / rank**exponent for ranks 1..n"""
+    return 1.0 / np.arange(1, n + 1) ** exponent
+
+
+def with_hot_key(weights, share):
+    """Rescale weights so that the first key receives `share` of the draws"""
+    weights = weights / weights.sum()
+    if len(weights) == 1:
+        return weights
+    rest = weights[1:] / weights[1:].sum() * (1 - share)
+    return np.concatenate([[share], rest])
+
+
+def _probabilities(weights):
+    return None if weights is None else weights / weights.sum()
+
+
+def customer_probabilities(num_customers, skew):
+    """Draw probabilities over customers, or None for uniform"""
+    weights = None
+    if skew.get("customer_zipf"):
+        weights = zipf_weights(num_customers, skew["customer_zipf"])
+    if skew.get("hot_customer_share") is not None:
+        weights = with_hot_key(np.ones(num_customers) if weights is None else weights, skew["hot_customer_share"])
+    return _probabilities(weights)
+
+
+def restaurant_probabilities(restaurants, skew):
+    """Draw probabilities over restaurants, or None for uniform"""
+    weights = None
+    if skew.get("restaurant_zipf"):
+        weights = zipf_weights(len(restaurants), skew["restaurant_zipf"])
+    if skew.get("restaurant_weights"):
+        weights = (np.ones(len(restaurants)) if weights is None else weights) * np.array(
+            [skew["restaurant_weights"].get(restaurant_id, 1.0) for restaurant_id in restaurants], dtype=float
+        )
+    if skew.get("hot_restaurant_share") is not None:
+        weights = with_hot_key(np.ones(len(restaurants)) if weights is None else weights, skew["hot_restaurant_share"])
+    return _probabilities(weights)
+
+
+def item_weights(menu_size, skew):
+    """Relative pick weights over a menu, or None for uniform"""
+    if not skew.get("item_zipf"):
+        return None
+    return zipf_weights(menu_size, skew["item_zipf"])
+
+
+def hour_probabilities(skew):
+    """Draw probabilities over HOURS, or None for uniform"""
+    return _probabilities(HOUR_WEIGHTS) if skew.get("seasonality") else None
+
+
+def day_probabilities(first_day, num_days, skew):
+    """Draw probabilities over the num_days days starting at first_day, or None for uniform"""
+    if not skew.get("seasonality"):
+        return None
+    weekdays = (first_day.weekday() + np.arange(num_days)) % 7
+    return _probabilities(DAY_OF_WEEK_WEIGHTS[weekdays])
+
+
+def order_distributions(skew, restaurants, customers):
+    """Probabilities for every order-level draw; None entries mean uniform"""
+    skew = resolve_skew(skew)
+    return {
+        "skew": skew,
+        "restaurant_p": restaurant_probabilities(restaurants, skew),
+        "customer_p": customer_probabilities(len(customers), skew),
+        "hour_p": hour_probabilities(skew)
+    }
+
+
+# ============================================
+# PER-ORDER PICKERS (PYTHON GENERATORS)
+# ============================================
+def python_sampler(population, p=None):
+    """Zero-argument picker over population: random.choice, or weighted by p
+
+    Built on the random module, so random.seed keeps applying; the uniform
+    picker makes exactly the original random.choice call.
+    """
+    if p is None:
+        return lambda: random.choice(population)
+    cum_weights = np.cumsum(p).tolist()
+    return lambda: random.choices(population, cum_weights=cum_weights)[0]
+
+
+def weighted_sample(population, weights, k):
+    """k distinct elements drawn with probability proportional to weights (Efraimidis-Spirakis keys)"""
+    keys = [random.random() ** (1 / weight) for weight in weights]
+    top = sorted(range(len(population)), key=keys.__getitem__, reverse=True)[:k]
+    return [population[i] for i in top]
+
+
+def order_samplers(skew, restaurants, customers, menu_by_restaurant):
+    """Pickers for generate_historical_order / generate_order: restaurant, customer, items, hour
+
+    "hour" is None when timestamps keep their uniform draw.
+    """
+    distributions = order_distributions(skew, restaurants, customers)
+    skew = distributions["skew"]
+
+    def sample_items(restaurant_id, k):
+        menu_items = menu_by_restaurant[restaurant_id]
+        weights = item_weights(len(menu_items), skew)
+        return random.sample(menu_items, k) if weights is None else weighted_sample(menu_items, weights, k)
+
+    return {
+        "restaurant": python_sampler(restaurants, distributions["restaurant_p"]),
+        "customer": python_sampler(customers, distributions["customer_p"]),
+        "items": sample_items,
+        "hour": None if distributions["hour_p"] is None else python_sampler(HOURS.tolist(), distributions["hour_p"])
+    }
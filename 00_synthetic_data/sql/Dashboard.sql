@@ -3,33 +3,82 @@ SELECT * FROM ws_dbxproject_catalog.`01_bronze`.customers
 where join_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
 
 
+-- Tiles read the 03_gold rollups (pipeline_transformation_gold_sales.py, pipeline_transformation_gold_reviews.py),
+-- one row per day and group, never the silver facts
+
+Best selling items
 SELECT item_name,
-    sum(quantity) as total_qty_sold
-FROM ws_dbxproject_catalog.`02_silver`.fact_order_items
+    sum(total_qty) as total_qty_sold
+FROM ws_dbxproject_catalog.`03_gold`.order_items_hourly
 where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
 GROUP by item_name
 ORDER BY total_qty_sold DESC
 LIMIT 10
 
 
+Revenue by food category
+SELECT category,
+    sum(total_revenue) as total_revenue
+FROM ws_dbxproject_catalog.`03_gold`.order_items_hourly
+where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
+GROUP by category
+ORDER BY total_revenue DESC
+
+
+Revenue by order type
+SELECT order_type,
+    sum(total_orders) as total_orders,
+    sum(total_revenue) as total_revenue
+FROM ws_dbxproject_catalog.`03_gold`.orders_hourly
+where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
+GROUP by order_type
+
+
+Order volume by day of week
+SELECT day_of_week,
+    sum(total_orders) as total_orders
+FROM ws_dbxproject_catalog.`03_gold`.orders_hourly
+where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
+GROUP by day_of_week
+ORDER BY total_orders DESC
+
+
+Peak hour heatmap (day / hour)
+SELECT day_of_week,
+    order_hour,
+    sum(total_orders) as total_orders
+FROM ws_dbxproject_catalog.`03_gold`.orders_hourly
+where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
+GROUP by 1, 2
+ORDER BY 1, 2
+
+
+Daily sales
+SELECT order_date, total_orders, total_revenue, avg_order_value
+FROM ws_dbxproject_catalog.`03_gold`.d_sales_summary
+where order_date BETWEEN :DATE_RANGE.min and :DATE_RANGE.max
+ORDER BY order_date
+
+
 Positive negative review over time
 SELECT r.name as restaurant_name,
-    date(review_timestamp) as review_date,
-    count(distinct case when sentiment = 'positive' then order_id else null end) positive_review_count,
-    count(distinct case when sentiment = 'negative' then order_id else null end) negative_review_count,
-    count(distinct case when sentiment = 'neutral' then order_id else null end) neutral_review_count
-FROM ws_dbxproject_catalog.`02_silver`.fact_reviews fr
+    fr.review_date,
+    sum(case when fr.sentiment = 'positive' then fr.review_count else 0 end) positive_review_count,
+    sum(case when fr.sentiment = 'negative' then fr.review_count else 0 end) negative_review_count,
+    sum(case when fr.sentiment = 'neutral' then fr.review_count else 0 end) neutral_review_count
+FROM ws_dbxproject_catalog.`03_gold`.review_daily_sentiment fr
 join ws_dbxproject_catalog.`01_bronze`.restaurants r 
 ON fr.restaurant_id = r.restaurant_id
 group by 1, 2
 ORDER BY 1, 2
 
 
+Issue categorization
 SELECT r.name as restaurant_name,
-    count(distinct case when fr.issue_delivery = 'true' then order_id else null end) as count_issues_delivery,
-    count(distinct case when fr.issue_food_quality = 'true' then order_id else null end) as count_issues_food_quality,
-    count(distinct case when fr.issue_pricing = 'true' then order_id else null end) as count_issues_pricing,
-    count(distinct case when fr.issue_portion_size = 'true' then order_id else null end) as count_issues_portion_size
-FROM ws_dbxproject_catalog.`02_silver`.fact_reviews fr
+    sum(fr.issue_delivery_count) as count_issues_delivery,
+    sum(fr.issue_food_quality_count) as count_issues_food_quality,
+    sum(fr.issue_pricing_count) as count_issues_pricing,
+    sum(fr.issue_portion_size_count) as count_issues_portion_size
+FROM ws_dbxproject_catalog.`03_gold`.review_daily_sentiment fr
 JOIN ws_dbxproject_catalog.`01_bronze`.restaurants r ON fr.restaurant_id = r.restaurant_id
-group by 1
\ No newline at end of file
+group by 1
@@ -10,6 +10,18 @@ CREATE TABLE SCHEMA_NAME.historical_orders (
     order_status VARCHAR(256)
 );
 
+-- Exploded order items, written by the generator with --items table/both
+-- (with --items table, historical_orders has no items column)
+CREATE TABLE SCHEMA_NAME.order_items (
+    order_id VARCHAR(256),
+    order_date DATE,
+    item_id VARCHAR(256),
+    quantity INT,
+    unit_price DECIMAL(10,2),
+    subtotal DECIMAL(10,2),
+    PRIMARY KEY (order_id, item_id)
+);
+
 CREATE TABLE SCHEMA_NAME.reviews (
     review_id VARCHAR(256) PRIMARY KEY,
     order_id VARCHAR(256),
@@ -59,6 +71,7 @@ ALTER DATABASE DB_NAME SET CHANGE_TRACKING = ON (CHANGE_RETENTION = 14 DAYS, AUT
 -- Note: replace 'dbo' with the schema you're using
 ALTER TABLE dbo.customers ENABLE CHANGE_TRACKING;
 ALTER TABLE dbo.historical_orders ENABLE CHANGE_TRACKING;
+ALTER TABLE dbo.order_items ENABLE CHANGE_TRACKING;
 ALTER TABLE dbo.menu_items ENABLE CHANGE_TRACKING;
 ALTER TABLE dbo.restaurants ENABLE CHANGE_TRACKING;
 ALTER TABLE dbo.reviews ENABLE CHANGE_TRACKING;
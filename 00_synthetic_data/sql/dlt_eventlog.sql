@@ -9,3 +9,56 @@ from event_log(table(`03_gold`.d_customer_360))
 where details:planning_information is not null
 order by timestamp desc
 limit 10;
+
+
+-- Flow run telemetry of the job's pipelines, ingested from their event logs into the perf schema by
+-- Workflow_Daily_Pipeline-Job/pipeline_telemetry.py (flow_runs upserted per update, flow_regressions rebuilt)
+
+-- Runs that regressed against their trailing baseline (median of the previous 7 completed runs)
+select
+  pipeline_name,
+  flow_name,
+  started_at,
+  duration_seconds,
+  baseline_duration_seconds,
+  duration_seconds_ratio,
+  executor_time_ms_ratio,
+  input_bytes_ratio,
+  maintenance_type
+from ws_dbxproject_catalog.perf.flow_regressions
+where regressed
+order by started_at desc;
+
+-- Daily duration, rows and drops per flow, with the refresh technique the planner chose
+select
+  date(started_at) as run_date,
+  pipeline_name,
+  flow_name,
+  round(sum(duration_seconds), 1) as duration_seconds,
+  sum(rows_in) as rows_in,
+  sum(num_output_rows) as rows_out,
+  sum(dropped_records) as dropped_records,
+  max(backlog_bytes) as backlog_bytes,
+  count_if(not is_incremental) as complete_recomputes
+from ws_dbxproject_catalog.perf.flow_runs
+group by 1, 2, 3
+order by 1 desc, 2, 3;
+
+-- Order dedup state per orders pipeline update: rows and memory held by the dedup state store, and the rows it dropped
+-- as duplicates or as arriving after the watermark
+select
+  started_at,
+  num_output_rows,
+  state_rows_total,
+  round(state_memory_bytes / 1024 / 1024, 1) as state_memory_mb,
+  dropped_duplicate_rows,
+  late_rows_dropped
+from ws_dbxproject_catalog.perf.flow_runs
+where flow_name = 'ws_dbxproject_catalog.02_silver.orders_deduped'
+order by started_at desc;
+
+-- Materialized views that fell back to a complete recompute, most recent first
+select pipeline_name, flow_name, started_at, duration_seconds, maintenance_type
+from ws_dbxproject_catalog.perf.flow_runs
+where is_incremental = false
+order by started_at desc;
@@ -0,0 +1,60 @@
+-- Unique customers and orders over any date range, from the daily per-restaurant HLL sketches in
+-- 03_gold.restaurant_daily_sales (one row per order_date and restaurant): a six-month range over five restaurants
+-- merges about 900 sketches instead of scanning fact_orders. With lgConfigK 12 the estimate is within about 3.2%
+-- (two standard errors) of count(distinct ...) over the facts.
+
+-- ============================================
+-- HELPERS
+-- ============================================
+CREATE OR REPLACE FUNCTION ws_dbxproject_catalog.`03_gold`.unique_counts_between(start_date DATE, end_date DATE)
+RETURNS TABLE (unique_customers BIGINT, unique_orders BIGINT, total_orders BIGINT)
+RETURN
+  SELECT
+    hll_sketch_estimate(hll_union_agg(customers_sketch)) AS unique_customers,
+    hll_sketch_estimate(hll_union_agg(orders_sketch)) AS unique_orders,
+    -- order_id is unique in silver, so this exact count is what unique_orders estimates
+    sum(total_orders) AS total_orders
+  FROM ws_dbxproject_catalog.`03_gold`.restaurant_daily_sales
+  WHERE order_date BETWEEN start_date AND end_date;
+
+CREATE OR REPLACE FUNCTION ws_dbxproject_catalog.`03_gold`.restaurant_unique_counts_between(start_date DATE, end_date DATE)
+RETURNS TABLE (restaurant_id STRING, unique_customers BIGINT, unique_orders BIGINT, total_orders BIGINT)
+RETURN
+  SELECT
+    restaurant_id,
+    hll_sketch_estimate(hll_union_agg(customers_sketch)) AS unique_customers,
+    hll_sketch_estimate(hll_union_agg(orders_sketch)) AS unique_orders,
+    sum(total_orders) AS total_orders
+  FROM ws_dbxproject_catalog.`03_gold`.restaurant_daily_sales
+  WHERE order_date BETWEEN start_date AND end_date
+  GROUP BY restaurant_id;
+
+
+-- ============================================
+-- DASHBOARD TILES (Restaurant Performance, :DATE_RANGE filter)
+-- ============================================
+-- Unique / Active Customers
+SELECT unique_customers, unique_orders
+FROM ws_dbxproject_catalog.`03_gold`.unique_counts_between(:DATE_RANGE.min, :DATE_RANGE.max);
+
+-- Unique customers per restaurant
+SELECT r.name AS restaurant_name, u.unique_customers, u.unique_orders
+FROM ws_dbxproject_catalog.`03_gold`.restaurant_unique_counts_between(:DATE_RANGE.min, :DATE_RANGE.max) u
+JOIN ws_dbxproject_catalog.`01_bronze`.restaurants r ON u.restaurant_id = r.restaurant_id
+ORDER BY u.unique_customers DESC;
+
+
+-- ============================================
+-- ERROR CHECK
+-- ============================================
+-- Sketch estimate against the exact count over the facts, for the same range
+SELECT
+  s.unique_customers AS estimated,
+  e.unique_customers AS exact,
+  round(100 * (s.unique_customers - e.unique_customers) / e.unique_customers, 2) AS error_pct
+FROM ws_dbxproject_catalog.`03_gold`.unique_counts_between(:DATE_RANGE.min, :DATE_RANGE.max) s
+CROSS JOIN (
+  SELECT count(DISTINCT customer_id) AS unique_customers
+  FROM ws_dbxproject_catalog.`02_silver`.fact_orders
+  WHERE order_date BETWEEN :DATE_RANGE.min AND :DATE_RANGE.max
+) e;
@@ -0,0 +1,87 @@
+-- Review analysis cache: ai_query results keyed by a hash of the normalized review_text and the prompt/model version
+-- The cache lives outside the silver pipeline, so a full refresh of 02_silver.fact_reviews re-reads it instead of
+-- calling the model again. The pipeline fills it itself (the review_model_calls sink in review_classifier.py).
+-- Reviews the local classifier is confident about never reach the cache or the model. Run the setup once.
+
+-- ============================================
+-- SETUP
+-- ============================================
+-- Bump the version inside review_analysis_key whenever the prompt or model in analyze_review changes:
+-- the old entries then stop matching and each distinct review text is analyzed once more.
+CREATE OR REPLACE FUNCTION ws_dbxproject_catalog.`02_silver`.review_analysis_key(review_text STRING)
+RETURNS STRING
+RETURN sha2(
+  concat('databricks-gpt-oss-20b|v1|', lower(regexp_replace(trim(review_text), '\\s+', ' '))),
+  256
+);
+
+CREATE OR REPLACE FUNCTION ws_dbxproject_catalog.`02_silver`.analyze_review(review_text STRING)
+RETURNS STRING
+RETURN ai_query(
+  'databricks-gpt-oss-20b',
+  CONCAT(
+    'Analyze the following review and return ONLY a valid JSON object with this exact structure: ',
+    '{"sentiment": "<positive/neutral/negative>", ',
+    '"issue_delivery": <true/false>, ',
+    '"issue_delivery_reason": "<reason or empty string>", ',
+    '"issue_food_quality": <true/false>, ',
+    '"issue_food_quality_reason": "<reason or empty string>", ',
+    '"issue_pricing": <true/false>, ',
+    '"issue_pricing_reason": "<reason or empty string>", ',
+    '"issue_portion_size": <true/false>, ',
+    '"issue_portion_size_reason": "<reason or empty string>"}. ',
+    'Rules: sentiment must be exactly one of: positive, neutral, negative. ',
+    'Each issue field is true/false only. ',
+    'Each reason field should contain a brief explanation if the issue is true, otherwise empty string. ',
+    'Review text: ', review_text
+  )
+);
+
+CREATE TABLE IF NOT EXISTS ws_dbxproject_catalog.`02_silver`.review_analysis_cache (
+  analysis_key STRING NOT NULL,  -- review_analysis_key(review_text)
+  review_text STRING,            -- one example of the texts sharing the key
+  review_timestamp TIMESTAMP,    -- of the first review that needed the model call (added by the pipeline to older caches)
+  analysis_json STRING,
+  cached_at TIMESTAMP
+);
+
+-- Model calls for texts that are not cached yet, one row per attempt. The pipeline sends the texts still here
+-- again with its next micro-batch (their reviews wait in the silver pipeline meanwhile) and removes a text once
+-- its result is in the cache.
+CREATE TABLE IF NOT EXISTS ws_dbxproject_catalog.`02_silver`.review_analysis_retry (
+  analysis_key STRING NOT NULL,
+  review_text STRING,
+  review_timestamp TIMESTAMP,
+  analysis_json STRING,          -- NULL when the model returned nothing
+  attempted_at TIMESTAMP
+);
+
+
+-- ============================================
+-- HIT RATE
+-- ============================================
+-- Reviews per analysis tier overall; per day in 02_silver.review_analysis_hit_rate itself
+SELECT
+  sum(reviews) AS reviews,
+  sum(local_classified) AS local_classified,
+  sum(cache_tier_reviews) AS cache_tier_reviews,
+  sum(model_calls) AS model_calls,
+  round(100 * (sum(cache_tier_reviews) - sum(model_calls)) / nullif(sum(cache_tier_reviews), 0), 2) AS hit_rate_pct,
+  round(100 * (sum(reviews) - sum(model_calls)) / sum(reviews), 2) AS llm_avoided_pct
+FROM ws_dbxproject_catalog.`02_silver`.review_analysis_hit_rate;
+
+-- Cache-tier reviews per cached analysis: how many reviews each model call is serving
+SELECT
+  (SELECT count(*) FROM ws_dbxproject_catalog.`02_silver`.fact_reviews WHERE analysis_source <> 'local') AS cache_tier_reviews,
+  count(*) AS cached_analyses,
+  round(
+    (SELECT count(*) FROM ws_dbxproject_catalog.`02_silver`.fact_reviews WHERE analysis_source <> 'local') / count(*), 1
+  ) AS reviews_per_analysis
+FROM ws_dbxproject_catalog.`02_silver`.review_analysis_cache;
+
+-- Texts still waiting for a model result, most attempted first
+SELECT analysis_key, any_value(review_text) AS review_text, min(review_timestamp) AS review_timestamp,
+  count(*) AS attempts, max(attempted_at) AS last_attempt_at
+FROM ws_dbxproject_catalog.`02_silver`.review_analysis_retry
+GROUP BY analysis_key
+ORDER BY attempts DESC, review_timestamp;
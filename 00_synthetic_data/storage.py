@@ -0,0 +1,248 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# SYNTHETIC_DATA_DIR redirects all generated tables (and shard worker processes) elsewhere, e.g. per benchmark scale factor
+DATA_DIR = os.environ.get("SYNTHETIC_DATA_DIR", os.path.join(script_dir, "data"))
+
+OUTPUT_FORMATS = ["csv", "parquet"]
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+# Rows read at a time when read_table filters a CSV by date
+CSV_FILTER_CHUNK_SIZE = 500_000
+
+
+# ============================================
+# PATHS
+# ============================================
+def output_path(name, output_format):
+    """data/<name>.csv for CSV, data/<name>/ (a dataset directory) for Parquet"""
+    if output_format == "csv":
+        return os.path.join(DATA_DIR, f"{name}.csv")
+    if output_format == "parquet":
+        return os.path.join(DATA_DIR, name)
+    raise ValueError(f"Unknown output format: {output_format!r} (expected one of {OUTPUT_FORMATS})")
+
+
+# ============================================
+# CHUNK WRITERS
+# ============================================
+class CsvChunkWriter:
+    """Append DataFrame chunks to a single CSV file, header on the first chunk only"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetChunkWriter:
+    """Stream DataFrame chunks into a (optionally Hive-partitioned) Parquet dataset
+
+    Every chunk is written as row groups as soon as it arrives, so memory only
+    ever holds one chunk. Low-cardinality columns are dictionary encoded and
+    ISO timestamp strings are stored as real timestamps.
+
+    partition_col / partition_from: partition directory name and the ISO
+    timestamp column its date is taken from, e.g. ("order_date", "timestamp").
+    """
+
+    def __init__(self, path, partition_col=None, partition_from=None, dictionary_cols=(), timestamp_cols=(),
+                 part=0, clean=True):
+        self.path = path
+        self.partition_col = partition_col
+        self.partition_from = partition_from
+        self.dictionary_cols = list(dictionary_cols)
+        self.timestamp_cols = list(timestamp_cols)
+        self.file_name = f"part-{part:05d}.parquet"
+        self.schema = None
+        self.writers = {}
+        self.rows = 0
+
+        if clean:
+            shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+    def _to_table(self, df):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.partition_col in table.column_names:
+            # Stored in the directory name only, as Hive partitioning expects
+            table = table.drop_columns([self.partition_col])
+
+        for name in self.dictionary_cols:
+            col = table.column(name)
+            col = col.cast(DICTIONARY_TYPE) if pa.types.is_dictionary(col.type) else pc.dictionary_encode(col)
+            table = table.set_column(table.schema.get_field_index(name), name, col)
+
+        for name in self.timestamp_cols:
+            col = table.column(name).cast(pa.string()).cast(pa.timestamp("us"))
+            table = table.set_column(table.schema.get_field_index(name), name, col)
+
+        if self.schema is None:
+            self.schema = table.schema
+        return table.cast(self.schema)
+
+    def _writer(self, partition):
+        if partition not in self.writers:
+            directory = self.path if partition is None else os.path.join(self.path, f"{self.partition_col}={partition}")
+            os.makedirs(directory, exist_ok=True)
+            self.writers[partition] = pq.ParquetWriter(
+                os.path.join(directory, self.file_name),
+                self.schema,
+                use_dictionary=self.dictionary_cols or False
+            )
+        return self.writers[partition]
+
+    def write(self, df):
+        if len(df) == 0:
+            return
+
+        if self.partition_col is None:
+            table = self._to_table(df)
+            self._writer(None).write_table(table)
+        else:
+            partitions = pc.utf8_slice_codeunits(pa.array(df[self.partition_from]).cast(pa.string()), 0, 10)
+            table = self._to_table(df)
+            for partition in pc.unique(partitions).to_pylist():
+                self._writer(partition).write_table(table.filter(pc.equal(partitions, partition)))
+
+        self.rows += len(df)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(name, output_format, partition_col=None, partition_from=None, dictionary_cols=(), timestamp_cols=(),
+                shard=None):
+    """Open a chunk writer for data/<name> in the requested output format
+
+    With shard set, the writer only produces that shard's part (a
+    data/<name>.csv.shard-NNNNN file or a part-NNNNN.parquet file per
+    partition) and leaves the rest of the output alone; see
+    prepare_shards / merge_shards.
+    """
+    path = output_path(name, output_format)
+    if output_format == "csv":
+        return CsvChunkWriter(path if shard is None else _csv_shard_path(path, shard))
+    if shard is None:
+        return ParquetChunkWriter(path, partition_col, partition_from, dictionary_cols, timestamp_cols)
+    return ParquetChunkWriter(path, partition_col, partition_from, dictionary_cols, timestamp_cols, part=shard, clean=False)
+
+
+# ============================================
+# SHARDED OUTPUT
+# ============================================
+def _csv_shard_path(path, shard):
+    return f"{path}.shard-{shard:05d}"
+
+
+def prepare_shards(name, output_format):
+    """Clear data/<name> before shard writers start adding parts to it"""
+    path = output_path(name, output_format)
+    if output_format == "parquet":
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def merge_shards(name, output_format, num_shards):
+    """Concatenate CSV shard files in shard order into data/<name>.csv (Parquet parts need no merge)"""
+    if output_format != "csv":
+        return
+
+    path = output_path(name, output_format)
+    header_written = False
+    with open(path, "wb") as out:
+        for shard in range(num_shards):
+            shard_path = _csv_shard_path(path, shard)
+            if not os.path.exists(shard_path):
+                continue
+            with open(shard_path, "rb") as part:
+                header = part.readline()
+                if not header_written:
+                    out.write(header)
+                    header_written = True
+                shutil.copyfileobj(part, out)
+            os.remove(shard_path)
+
+
+# ============================================
+# READERS
+# ============================================
+def _use_csv(name):
+    """Prefer data/<name>.csv unless a Parquet dataset was written after it"""
+    csv_path = output_path(name, "csv")
+    parquet_path = output_path(name, "parquet")
+    if not os.path.exists(csv_path):
+        return False
+    return not os.path.isdir(parquet_path) or os.path.getmtime(csv_path) >= os.path.getmtime(parquet_path)
+
+
+def read_table(name, columns=None, date_range=None):
+    """Read data/<name> as a DataFrame from whichever of CSV / Parquet was written last
+
+    date_range=(column, first, last) keeps rows whose ISO date column lies
+    in [first, last]; on a partitioned dataset only those partitions are read,
+    a CSV is filtered CSV_FILTER_CHUNK_SIZE rows at a time.
+    """
+    if _use_csv(name):
+        if date_range is None:
+            return pd.read_csv(output_path(name, "csv"), usecols=columns)
+        column, first, last = date_range
+        usecols = None if columns is None else list(dict.fromkeys([*columns, column]))
+        chunks = [
+            df[df[column].astype(str).str[:10].between(first, last)]
+            for df in pd.read_csv(output_path(name, "csv"), usecols=usecols, chunksize=CSV_FILTER_CHUNK_SIZE)
+        ]
+        df = pd.concat(chunks, ignore_index=True)
+        return df if columns is None else df[columns]
+
+    row_filter = None
+    if date_range is not None:
+        column, first, last = date_range
+        row_filter = (pc.field(column) >= first) & (pc.field(column) <= last)
+    dataset = ds.dataset(output_path(name, "parquet"), partitioning="hive")
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+def table_columns(name):
+    """Column names of data/<name> (CSV header or Parquet dataset schema)"""
+    if _use_csv(name):
+        return list(pd.read_csv(output_path(name, "csv"), nrows=0).columns)
+    return ds.dataset(output_path(name, "parquet"), partitioning="hive").schema.names
+
+
+def iter_table_chunks(name, chunk_size, columns=None):
+    """Yield data/<name> as DataFrames of at most chunk_size rows (CSV or Parquet)"""
+    if _use_csv(name):
+        yield from pd.read_csv(output_path(name, "csv"), usecols=columns, chunksize=chunk_size)
+        return
+
+    dataset = ds.dataset(output_path(name, "parquet"), partitioning="hive")
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+        yield batch.to_pandas()
@@ -0,0 +1,515 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# ============================================
+# BRONZE TABLES
+# ============================================
+# partition_column splits a table into num_partitions range predicates, each
+# read by its own JDBC connection; tables without one are read in one query.
+# Incremental loads MERGE on primary_key and pull either the SQL Server
+# change-tracking changes (change_tracking, when the source supports it) or
+# the rows at/after the last watermark_column high-water mark. cluster_by
+# sets the Delta liquid clustering keys: the columns dashboard and silver
+# queries filter on, so OPTIMIZE can lay files out for data skipping.
+BRONZE_TABLES = {
+    "historical_orders": {
+        "partition_column": "order_timestamp", "num_partitions": 16,
+        "primary_key": ["order_id"], "watermark_column": "order_timestamp", "change_tracking": True,
+        "cluster_by": ["order_timestamp", "restaurant_id"]
+    },
+    "order_items": {
+        "partition_column": "order_date", "num_partitions": 16,
+        "primary_key": ["order_id", "item_id"], "watermark_column": "order_date", "change_tracking": True
+    },
+    "reviews": {
+        "partition_column": "review_timestamp", "num_partitions": 8,
+        "primary_key": ["review_id"], "watermark_column": "review_timestamp", "change_tracking": True,
+        "cluster_by": ["review_timestamp", "restaurant_id"]
+    },
+    "customers": {
+        "partition_column": "join_date", "num_partitions": 4,
+        "primary_key": ["customer_id"], "change_tracking": True
+    },
+    "menu_items": {"primary_key": ["restaurant_id", "item_id"], "change_tracking": True},
+    "restaurants": {"primary_key": ["restaurant_id"], "change_tracking": True}
+}
+
+DEFAULT_FETCHSIZE = 10_000
+
+
+# ============================================
+# RANGE PREDICATES
+# ============================================
+def _as_bound(value):
+    """Bounds come back from JDBC as datetimes/dates/numbers and from SQLite as text"""
+    if not isinstance(value, str):
+        return value
+    try:
+        return date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+    except ValueError:
+        return float(value) if "." in value else int(value)
+
+
+def _literal(value):
+    if isinstance(value, datetime):
+        return f"'{value:%Y-%m-%d %H:%M:%S}'"
+    if isinstance(value, date):
+        return f"'{value:%Y-%m-%d}'"
+    return repr(value)
+
+
+def _cut(lower, upper, i, num_partitions):
+    """The i-th of num_partitions evenly spaced cut points, in the bounds' own type"""
+    if isinstance(lower, int):
+        return lower + (upper - lower) * i // num_partitions
+    cut = lower + (upper - lower) * i / num_partitions
+    return cut.replace(microsecond=0) if isinstance(cut, datetime) else cut
+
+
+def partition_predicates(column, lower, upper, num_partitions):
+    """WHERE clauses splitting [lower, upper] on column into num_partitions disjoint ranges
+
+    The first range also takes NULLs and the last is open-ended, so every row
+    lands in exactly one partition even if the table grew after the bounds
+    were read. Works for numeric, date and timestamp columns; cuts are
+    deduplicated, so narrow ranges yield fewer partitions.
+    """
+    if lower is None or upper is None or num_partitions <= 1:
+        return None
+    lower, upper = _as_bound(lower), _as_bound(upper)
+    if lower >= upper:
+        return None
+
+    cuts = sorted({_cut(lower, upper, i, num_partitions) for i in range(1, num_partitions)} - {lower})
+    if not cuts:
+        return None
+
+    predicates = [f"{column} < {_literal(cuts[0])} OR {column} IS NULL"]
+    predicates += [
+        f"{column} >= {_literal(start)} AND {column} < {_literal(end)}" for start, end in zip(cuts, cuts[1:])
+    ]
+    predicates.append(f"{column} >= {_literal(cuts[-1])}")
+    return predicates
+
+
+# ============================================
+# SOURCES
+# ============================================
+def _where(predicates, where):
+    """AND an extra filter into every range predicate"""
+    if not where:
+        return predicates
+    return [f"({where}) AND ({predicate})" for predicate in predicates] if predicates else [where]
+
+
+class SparkJdbcSource:
+    """spark.read.jdbc with one Spark task (and connection) per range predicate"""
+
+    supports_change_tracking = True
+
+    def __init__(self, spark, url, properties, schema="dbo", fetchsize=DEFAULT_FETCHSIZE):
+        self.spark = spark
+        self.url = url
+        self.properties = {**properties, "fetchsize": str(fetchsize)}
+        self.schema = schema
+
+    def qualified(self, table):
+        return f"{self.schema}.{table}"
+
+    def bounds(self, table, column):
+        row = self.spark.read.jdbc(
+            url=self.url,
+            table=f"(SELECT MIN({column}) AS lower_bound, MAX({column}) AS upper_bound FROM {self.qualified(table)}) AS bounds",
+            properties=self.properties
+        ).first()
+        return row["lower_bound"], row["upper_bound"]
+
+    def _scalar(self, sql):
+        return self.spark.read.jdbc(url=self.url, table=f"({sql}) AS scalar", properties=self.properties).first()[0]
+
+    def read(self, table, predicates=None, where=None):
+        return self.spark.read.jdbc(
+            url=self.url, table=self.qualified(table), predicates=_where(predicates, where), properties=self.properties
+        )
+
+    def change_tracking_version(self):
+        return self._scalar("SELECT CHANGE_TRACKING_CURRENT_VERSION() AS version")
+
+    def min_valid_version(self, table):
+        return self._scalar(f"SELECT CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{self.qualified(table)}')) AS version")
+
+    def read_changes(self, table, primary_key, since_version):
+        """Net changes since since_version: current rows plus _change_op (I/U/D); deletes carry only the key"""
+        from pyspark.sql import functions as F
+
+        key_select = ", ".join(f"ct.{key} AS _ct_{key}" for key in primary_key)
+        key_join = " AND ".join(f"t.{key} = ct.{key}" for key in primary_key)
+        df = self.spark.read.jdbc(
+            url=self.url,
+            table=f"""(SELECT ct.SYS_CHANGE_OPERATION AS _change_op, {key_select}, t.*
+                FROM CHANGETABLE(CHANGES {self.qualified(table)}, {since_version}) AS ct
+                LEFT JOIN {self.qualified(table)} AS t ON {key_join}) AS changes""",
+            properties=self.properties
+        )
+        for key in primary_key:
+            df = df.withColumn(key, F.coalesce(F.col(key), F.col(f"_ct_{key}"))).drop(f"_ct_{key}")
+        return df
+
+
+class SqliteSource:
+    """Local stand-in for the Azure SQL source: the same predicates, each read on its own connection
+
+    Partitions are read concurrently by threads, the way Spark tasks would,
+    and fetched fetchsize rows at a time. read returns a pandas DataFrame.
+    SQLite has no change tracking, so incremental loads use watermarks.
+    """
+
+    supports_change_tracking = False
+
+    def __init__(self, path, fetchsize=DEFAULT_FETCHSIZE):
+        self.path = path
+        self.fetchsize = fetchsize
+
+    def _query(self, sql):
+        with sqlite3.connect(self.path) as conn:
+            cursor = conn.execute(sql)
+            columns = [description[0] for description in cursor.description]
+            rows = []
+            while batch := cursor.fetchmany(self.fetchsize):
+                rows.extend(batch)
+        return pd.DataFrame(rows, columns=columns)
+
+    def bounds(self, table, column):
+        df = self._query(f"SELECT MIN({column}) AS lower_bound, MAX({column}) AS upper_bound FROM {table}")
+        return df.iloc[0]["lower_bound"], df.iloc[0]["upper_bound"]
+
+    def read(self, table, predicates=None, where=None):
+        predicates = _where(predicates, where)
+        queries = [f"SELECT * FROM {table}"] if not predicates else [
+            f"SELECT * FROM {table} WHERE {predicate}" for predicate in predicates
+        ]
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            return pd.concat(pool.map(self._query, queries), ignore_index=True)
+
+
+# ============================================
+# SINKS
+# ============================================
+def _quoted(name):
+    return ".".join(f"`{part}`" for part in name.split("."))
+
+
+class DeltaSink:
+    """Writes bronze tables to target_schema.<table> in Delta; both methods return the source rows"""
+
+    def __init__(self, spark, target_schema):
+        self.spark = spark
+        self.target_schema = target_schema
+
+    def exists(self, table):
+        return self.spark.catalog.tableExists(f"{self.target_schema}.{table}")
+
+    def _last_metrics(self, target):
+        return self.spark.sql(f"DESCRIBE HISTORY {_quoted(target)} LIMIT 1").first()["operationMetrics"]
+
+    def overwrite(self, table, df, cluster_by=None):
+        """Replace the table; with cluster_by it is written clustered on those keys (liquid clustering)"""
+        target = f"{self.target_schema}.{table}"
+        writer = df.write \
+          .format("delta") \
+          .mode("overwrite") \
+          .option("overwriteSchema", "true")
+        if cluster_by:
+            writer = writer.clusterBy(*cluster_by)
+        writer.saveAsTable(target)
+        rows = int(self._last_metrics(target)["numOutputRows"])
+        # The silver order stream reads bronze through its change feed
+        self.spark.sql(f"ALTER TABLE {_quoted(target)} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)")
+        return rows
+
+    def merge(self, table, df, primary_key):
+        """Upsert df on primary_key; rows with _change_op = 'D' delete their match
+
+        Matched rows are only rewritten when a column differs, and an empty df
+        commits nothing, so re-reading unchanged rows (the watermark overlap)
+        neither rewrites files nor adds changes for the silver change feed.
+        """
+        from delta.tables import DeltaTable
+
+        if df.isEmpty():
+            return 0
+        target = f"{self.target_schema}.{table}"
+        delta_table = DeltaTable.forName(self.spark, target)
+        columns = {column: f"s.`{column}`" for column in delta_table.toDF().columns}
+        keep = "s._change_op <> 'D'" if "_change_op" in df.columns else None
+        changed = " OR ".join(
+            f"t.`{column}` IS DISTINCT FROM s.`{column}`" for column in columns if column not in primary_key
+        )
+        if keep:
+            changed = f"{keep} AND ({changed})"
+
+        merge = delta_table.alias("t").merge(
+            df.dropDuplicates(primary_key).alias("s"),
+            " AND ".join(f"t.`{key}` = s.`{key}`" for key in primary_key)
+        )
+        if keep:
+            merge = merge.whenMatchedDelete(condition="s._change_op = 'D'")
+        merge.whenMatchedUpdate(condition=changed, set=columns) \
+             .whenNotMatchedInsert(condition=keep, values=columns) \
+             .execute()
+        return int(self._last_metrics(target)["numSourceRows"])
+
+
+class ParquetSink:
+    """Local counterpart of DeltaSink: one Parquet file per table, merged in pandas"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def _path(self, table):
+        return os.path.join(self.output_dir, f"{table}.parquet")
+
+    def exists(self, table):
+        return os.path.exists(self._path(table))
+
+    def overwrite(self, table, df, cluster_by=None):
+        """Sorting on the clustering keys keeps Parquet row-group min/max statistics tight, as OPTIMIZE does"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if cluster_by:
+            df = df.sort_values(cluster_by, ignore_index=True)
+        df.to_parquet(self._path(table), index=False)
+        return len(df)
+
+    def merge(self, table, df, primary_key):
+        if df.empty:
+            return 0
+        merged = pd.concat([pd.read_parquet(self._path(table)), df], ignore_index=True)
+        merged.drop_duplicates(primary_key, keep="last").to_parquet(self._path(table), index=False)
+        return len(df)
+
+
+# ============================================
+# WATERMARK STORES
+# ============================================
+# High-water marks are kept as text: a change-tracking version or a timestamp.
+class DeltaWatermarkStore:
+    """Per-table high-water marks in a small Delta table"""
+
+    def __init__(self, spark, table_name):
+        self.spark = spark
+        self.table_name = _quoted(table_name)
+        spark.sql(f"""CREATE TABLE IF NOT EXISTS {self.table_name}
+            (table_name STRING, watermark STRING, updated_at TIMESTAMP) USING DELTA""")
+
+    def load(self):
+        return {row["table_name"]: row["watermark"] for row in self.spark.table(self.table_name).collect()}
+
+    def save(self, marks):
+        if not marks:
+            return
+        self.spark.createDataFrame(
+            [(table, str(mark)) for table, mark in marks.items()], "table_name STRING, watermark STRING"
+        ).createOrReplaceTempView("new_watermarks")
+        self.spark.sql(f"""MERGE INTO {self.table_name} AS t USING new_watermarks AS s
+            ON t.table_name = s.table_name
+            WHEN MATCHED THEN UPDATE SET watermark = s.watermark, updated_at = current_timestamp()
+            WHEN NOT MATCHED THEN INSERT (table_name, watermark, updated_at)
+                VALUES (s.table_name, s.watermark, current_timestamp())""")
+
+
+class JsonWatermarkStore:
+    """Local counterpart of DeltaWatermarkStore: one JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, marks):
+        marks = {**self.load(), **{table: str(mark) for table, mark in marks.items()}}
+        with open(self.path, "w") as f:
+            json.dump(marks, f, indent=2)
+
+
+# ============================================
+# CONCURRENT LOAD
+# ============================================
+def _stats(table, mode, partitions, rows, start, watermark=None):
+    elapsed = time.time() - start
+    return {
+        "table": table,
+        "mode": mode,
+        "partitions": partitions,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed) if elapsed else 0,
+        "watermark": None if watermark is None else str(watermark)
+    }
+
+
+def load_table(source, sink, table, spec):
+    """Read one table through range predicates, overwrite it with sink, and time it"""
+    start = time.time()
+    predicates = None
+    if spec.get("partition_column") and spec.get("num_partitions", 1) > 1:
+        column = spec["partition_column"]
+        predicates = partition_predicates(column, *source.bounds(table, column), spec["num_partitions"])
+    rows = sink.overwrite(table, source.read(table, predicates), spec.get("cluster_by"))
+    return _stats(table, "full", len(predicates) if predicates else 1, rows, start)
+
+
+def load_table_incremental(source, sink, table, spec, watermark=None):
+    """Pull only what changed since watermark and MERGE it into the bronze table
+
+    With change tracking the mark is the CHANGE_TRACKING_CURRENT_VERSION read
+    before the changes, so nothing committed in between is skipped; a mark
+    older than the table's minimum valid version falls back to a full load.
+    With a watermark column the mark is the column's maximum read before the
+    rows, and the next run reads from it inclusively (the MERGE leaves the
+    unchanged overlap alone). Rows that arrive later with an older timestamp than the mark
+    are only seen by change tracking. Tables with neither, no primary key or
+    no bronze table yet get a full load. Stats carry the new mark.
+    """
+    start = time.time()
+    primary_key = spec.get("primary_key")
+    change_tracking = spec.get("change_tracking") and source.supports_change_tracking
+    column = spec.get("watermark_column")
+    if not primary_key or not sink.exists(table) or not (change_tracking or column):
+        watermark = None
+        if change_tracking:
+            watermark = source.change_tracking_version()
+        elif column:
+            watermark = source.bounds(table, column)[1]
+        return {**load_table(source, sink, table, spec), "watermark": None if watermark is None else str(watermark)}
+
+    if change_tracking:
+        version = source.change_tracking_version()
+        if watermark is None or int(watermark) < source.min_valid_version(table):
+            return {**load_table(source, sink, table, spec), "watermark": str(version)}
+        rows = sink.merge(table, source.read_changes(table, primary_key, int(watermark)), primary_key)
+        return _stats(table, "change_tracking", 1, rows, start, version)
+
+    upper = source.bounds(table, column)[1]
+    if watermark is None:
+        return {**load_table(source, sink, table, spec), "watermark": None if upper is None else str(upper)}
+    if upper is None or _as_bound(upper) < _as_bound(watermark):
+        return _stats(table, "watermark", 0, 0, start, watermark)
+
+    predicates = None
+    if spec.get("partition_column") == column:
+        predicates = partition_predicates(column, watermark, upper, spec.get("num_partitions", 1))
+    where = f"{column} >= {_literal(_as_bound(watermark))}"
+    rows = sink.merge(table, source.read(table, predicates, where), primary_key)
+    return _stats(table, "watermark", len(predicates) if predicates else 1, rows, start, upper)
+
+
+def load_tables(source, sink, tables=None, max_workers=None, watermarks=None):
+    """Load every table concurrently; one stats row per table, largest first
+
+    Each table is submitted from its own thread, so with Spark the table
+    loads run as concurrent jobs that share the cluster instead of queueing
+    one after another. With a watermarks store the loads are incremental and
+    the new marks are saved once every table has loaded, so a failed run
+    simply repeats from the previous marks.
+    """
+    tables = BRONZE_TABLES if tables is None else tables
+    marks = None if watermarks is None else watermarks.load()
+
+    def load(item):
+        table, spec = item
+        if marks is None:
+            return load_table(source, sink, table, spec)
+        return load_table_incremental(source, sink, table, spec, marks.get(table))
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tables)) as pool:
+        stats = list(pool.map(load, tables.items()))
+    if watermarks is not None:
+        watermarks.save({row["table"]: row["watermark"] for row in stats if row["watermark"] is not None})
+    return pd.DataFrame(stats).sort_values("rows", ascending=False, ignore_index=True)
+
+
+# ============================================
+# LOCAL STAND-IN
+# ============================================
+SQLITE_FILES = {
+    "historical_orders": "historical_orders.csv",
+    "order_items": "order_items.csv",
+    "reviews": "customer_reviews.csv",
+    "customers": "customers.csv",
+    "menu_items": "menu_items.csv",
+    "restaurants": "restaurants.csv"
+}
+
+# Only written by the generator with --items table/both
+OPTIONAL_SQLITE_TABLES = ["order_items"]
+
+# CSV columns renamed to their Azure SQL names (sql/azuresqldatabase_setup.sql)
+SQLITE_RENAMES = {"historical_orders": {"timestamp": "order_timestamp"}}
+
+
+def build_sqlite_source(data_dir, path, chunk_size=100_000):
+    """Load the generator's CSV output into a SQLite database standing in for Azure SQL
+
+    Partition columns are stored as "YYYY-MM-DD HH:MM:SS[.ffffff]" text, the
+    form SQLite compares datetimes in, so the range predicates select the
+    same rows they would on Azure SQL. Optional tables without a CSV are
+    left out.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    with sqlite3.connect(path) as conn:
+        for table, file_name in SQLITE_FILES.items():
+            if table in OPTIONAL_SQLITE_TABLES and not os.path.exists(os.path.join(data_dir, file_name)):
+                continue
+            column = BRONZE_TABLES[table].get("partition_column")
+            for chunk in pd.read_csv(os.path.join(data_dir, file_name), chunksize=chunk_size):
+                chunk = chunk.rename(columns=SQLITE_RENAMES.get(table, {}))
+                if column:
+                    chunk[column] = pd.to_datetime(chunk[column]).astype(str)
+                chunk.to_sql(table, conn, if_exists="append", index=False)
+            if column:
+                conn.execute(f"CREATE INDEX idx_{table}_{column} ON {table} ({column})")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the bronze JDBC load against a local SQLite stand-in")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(__file__), "..", "00_synthetic_data", "data"))
+    parser.add_argument("--db", default="bronze_source.sqlite")
+    parser.add_argument("--output-dir", default="bronze_output")
+    parser.add_argument("--incremental", action="store_true",
+                        help="MERGE rows past each table's watermark instead of overwriting")
+    parser.add_argument("--state", default="bronze_watermarks.json", help="watermark file for --incremental")
+    parser.add_argument("--rebuild", action="store_true", help="reload the SQLite stand-in from the CSVs")
+    parser.add_argument("--fetchsize", type=int, default=DEFAULT_FETCHSIZE)
+    parser.add_argument("--partitions", type=int, default=None,
+                        help="override num_partitions for every partitioned table (1 = serial baseline)")
+    args = parser.parse_args()
+
+    tables = {
+        table: spec for table, spec in BRONZE_TABLES.items()
+        if table not in OPTIONAL_SQLITE_TABLES or os.path.exists(os.path.join(args.data_dir, SQLITE_FILES[table]))
+    }
+    if args.partitions is not None:
+        tables = {
+            table: {**spec, "num_partitions": args.partitions} if spec.get("partition_column") else spec
+            for table, spec in tables.items()
+        }
+
+    if args.rebuild or not os.path.exists(args.db):
+        build_sqlite_source(args.data_dir, args.db)
+    stats = load_tables(
+        SqliteSource(args.db, fetchsize=args.fetchsize), ParquetSink(args.output_dir), tables,
+        watermarks=JsonWatermarkStore(args.state) if args.incremental else None
+    )
+    print(stats.to_string(index=False))
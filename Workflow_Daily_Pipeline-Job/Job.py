@@ -2,41 +2,155 @@
 %pip install --upgrade databricks-sdk==0.70.0
 %restart_python
 
+from databricks.sdk import WorkspaceClient
 from databricks.sdk.service.jobs import JobSettings as Job
 
+w = WorkspaceClient()
+
+# The sensor, maintenance and telemetry scripts of this folder, as synced to the workspace
+SOURCE_DIR = "/Workspace/Shared/Databricks-Project/Workflow_Daily_Pipeline-Job"
+
+# Pipelines created by job.yaml (bundle deploy) are looked up by name
+PIPELINE_IDS = {
+    "pipeline_ingestion_eventhub": "bf57acc3-ffb6-45ad-8fdd-d4ee660fcb8f",
+    "pipeline_transformation_silver": "c4621ba2-25c0-43ea-bfd8-51753f160344",
+    "pipeline_transformation_gold": "f1bda58f-9232-45d7-b07a-8c81e4ce9674",
+    **{
+        name: next(w.pipelines.list_pipelines(filter=f"name LIKE '{name}'")).pipeline_id
+        for name in [
+            "pipeline_transformation_orders", "pipeline_transformation_gold_sales", "pipeline_transformation_gold_reviews"
+        ]
+    }
+}
+
+
+def pipeline_task(task_key, depends_on, run_if=None):
+    task = {
+        "task_key": task_key,
+        "depends_on": depends_on,
+        "pipeline_task": {
+            "pipeline_id": PIPELINE_IDS[task_key],
+            "full_refresh": False,
+        },
+    }
+    if run_if:
+        task["run_if"] = run_if
+    return task
+
+
+def condition_task(task_key, value, depends_on, run_if=None):
+    task = {
+        "task_key": task_key,
+        "depends_on": depends_on,
+        "condition_task": {
+            "op": "EQUAL_TO",
+            "left": f"{{{{tasks.check_new_data.values.{value}}}}}",
+            "right": "true",
+        },
+    }
+    if run_if:
+        task["run_if"] = run_if
+    return task
+
+
+def python_task(task_key, script, parameters, depends_on, run_if=None):
+    task = {
+        "task_key": task_key,
+        "depends_on": depends_on,
+        "spark_python_task": {
+            "python_file": f"{SOURCE_DIR}/{script}",
+            "source": "WORKSPACE",
+            "parameters": parameters,
+        },
+        "environment_key": "default",
+    }
+    if run_if:
+        task["run_if"] = run_if
+    return task
+
 
+# Silver and gold run per branch (orders, reviews, customer 360), each skipped when its bronze input did not
+# change since the last successful run; see job.yaml
 workflow_daily_pipeline = Job.from_dict(
     {
         "name": "workflow_daily_pipeline",
+        "parameters": [
+            {
+                "name": "force_run",
+                "default": "false",
+            },
+            {
+                "name": "warehouse_id",
+                "default": "",
+            },
+        ],
         "tasks": [
             {
                 "task_key": "pipeline_ingestion_eventhub",
                 "pipeline_task": {
-                    "pipeline_id": "bf57acc3-ffb6-45ad-8fdd-d4ee660fcb8f",
+                    "pipeline_id": PIPELINE_IDS["pipeline_ingestion_eventhub"],
                     "full_refresh": False,
                 },
             },
-            {
-                "task_key": "pipeline_transformation_silver",
-                "depends_on": [
-                    {
-                        "task_key": "pipeline_ingestion_eventhub",
-                    },
+            python_task(
+                "check_new_data", "new_data_sensor.py", ["--force", "{{job.parameters.force_run}}"],
+                depends_on=[{"task_key": "pipeline_ingestion_eventhub"}]
+            ),
+            condition_task("orders_changed", "orders_changed", depends_on=[{"task_key": "check_new_data"}]),
+            condition_task("reviews_changed", "reviews_changed", depends_on=[{"task_key": "check_new_data"}]),
+            pipeline_task(
+                "pipeline_transformation_orders", depends_on=[{"task_key": "orders_changed", "outcome": "true"}]
+            ),
+            pipeline_task(
+                "pipeline_transformation_silver", depends_on=[{"task_key": "reviews_changed", "outcome": "true"}]
+            ),
+            pipeline_task(
+                "pipeline_transformation_gold_sales", depends_on=[{"task_key": "pipeline_transformation_orders"}]
+            ),
+            pipeline_task(
+                "pipeline_transformation_gold_reviews", depends_on=[{"task_key": "pipeline_transformation_silver"}]
+            ),
+            condition_task(
+                "customer_360_changed", "customer_360_changed", depends_on=[{"task_key": "check_new_data"}]
+            ),
+            pipeline_task(
+                "pipeline_transformation_gold",
+                depends_on=[
+                    {"task_key": "customer_360_changed", "outcome": "true"},
+                    {"task_key": "pipeline_transformation_orders"},
+                    {"task_key": "pipeline_transformation_silver"},
                 ],
-                "pipeline_task": {
-                    "pipeline_id": "c4621ba2-25c0-43ea-bfd8-51753f160344",
-                    "full_refresh": False,
-                },
-            },
-            {
-                "task_key": "pipeline_transformation_gold",
-                "depends_on": [
-                    {
-                        "task_key": "pipeline_transformation_silver",
-                    },
+                run_if="NONE_FAILED"
+            ),
+            python_task(
+                "commit_new_data_state", "new_data_sensor.py", ["--commit", "{{tasks.check_new_data.values.versions}}"],
+                depends_on=[
+                    {"task_key": "pipeline_transformation_gold_sales"},
+                    {"task_key": "pipeline_transformation_gold_reviews"},
+                    {"task_key": "pipeline_transformation_gold"},
                 ],
-                "pipeline_task": {
-                    "pipeline_id": "f1bda58f-9232-45d7-b07a-8c81e4ce9674",
+                run_if="NONE_FAILED"
+            ),
+            python_task(
+                "delta_maintenance", "delta_maintenance.py",
+                [
+                    "--schema", "ws_dbxproject_catalog.perf", "--warehouse-id", "{{job.parameters.warehouse_id}}",
+                    "--job-run-id", "{{job.run_id}}"
+                ],
+                depends_on=[{"task_key": "commit_new_data_state"}]
+            ),
+            python_task(
+                "pipeline_telemetry", "pipeline_telemetry.py",
+                ["--schema", "ws_dbxproject_catalog.perf", "--job-run-id", "{{job.run_id}}"],
+                depends_on=[{"task_key": "delta_maintenance"}],
+                run_if="ALL_DONE"
+            ),
+        ],
+        "environments": [
+            {
+                "environment_key": "default",
+                "spec": {
+                    "client": "2",
                 },
             },
         ],
@@ -47,8 +161,5 @@ workflow_daily_pipeline = Job.from_dict(
     }
 )
 
-from databricks.sdk import WorkspaceClient
-
-w = WorkspaceClient()
 w.jobs.reset(new_settings=workflow_daily_pipeline, job_id=27371483308037)
 # or create a new job using: w.jobs.create(**workflow_daily_pipeline.as_shallow_dict())
@@ -0,0 +1,305 @@
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+
+# ============================================
+# TABLES
+# ============================================
+# Bronze tables written by Bronze/jdbc_ingestion.py, outside any pipeline, with the liquid clustering keys of
+# its BRONZE_TABLES: a full load writes them clustered, incremental MERGEs add unclustered files that are
+# clustered and compacted (OPTIMIZE) here, and old files are vacuumed. OPTIMIZE commits with dataChange=false,
+# so neither the silver change-feed stream nor new_data_sensor.py sees it as new data.
+CATALOG = "ws_dbxproject_catalog"
+
+MAINTAINED_TABLES = {
+    "01_bronze.historical_orders": ["order_timestamp", "restaurant_id"],
+    "01_bronze.reviews": ["review_timestamp", "restaurant_id"],
+    "01_bronze.customers": None,
+    "01_bronze.menu_items": None,
+    "01_bronze.restaurants": None
+}
+
+# Pipeline-managed tables take their clustering from their definitions (cluster_by / CLUSTER BY) and are
+# compacted and vacuumed by the pipelines' own maintenance, which rejects OPTIMIZE/VACUUM from outside:
+# their layout is only measured. 01_bronze.orders is the Event Hub stream's table, the one with many small files.
+MEASURED_TABLES = [
+    "01_bronze.orders",
+    "02_silver.fact_orders", "02_silver.fact_order_items", "02_silver.fact_reviews",
+    "03_gold.order_items_hourly", "03_gold.orders_hourly", "03_gold.review_daily_sentiment"
+]
+
+# VACUUM keeps a week of removed files (the Delta default, well past how far the daily silver stream can lag
+# the bronze change feed) and runs once a week per table, not on every daily run
+VACUUM_RETAIN_HOURS = 168
+VACUUM_INTERVAL_DAYS = 7
+
+
+# ============================================
+# SCAN QUERIES
+# ============================================
+# The dashboard's access pattern on each layer: one restaurant over the week ending at the table's latest date.
+# The bounds are inlined as literals so the warehouse can skip files on their min/max statistics.
+SCAN_RESTAURANT_ID = "REST-DXB-001"
+SCAN_DAYS = 7
+
+SCAN_QUERIES = {
+    "bronze_orders_restaurant_week": (
+        "01_bronze.historical_orders", "order_timestamp",
+        "SELECT count(*) AS orders, sum(total_amount) AS revenue FROM {table} "
+        "WHERE order_timestamp >= '{start}' AND order_timestamp < '{end}' AND restaurant_id = '{restaurant_id}'"
+    ),
+    "bronze_reviews_restaurant_week": (
+        "01_bronze.reviews", "review_timestamp",
+        "SELECT count(*) AS reviews, avg(rating) AS avg_rating FROM {table} "
+        "WHERE review_timestamp >= '{start}' AND review_timestamp < '{end}' AND restaurant_id = '{restaurant_id}'"
+    ),
+    "silver_orders_restaurant_week": (
+        "02_silver.fact_orders", "order_date",
+        "SELECT order_type, count(*) AS orders, sum(total_amount) AS revenue FROM {table} "
+        "WHERE order_date >= '{start}' AND order_date < '{end}' AND restaurant_id = '{restaurant_id}' "
+        "GROUP BY order_type"
+    ),
+    "silver_items_restaurant_week": (
+        "02_silver.fact_order_items", "order_date",
+        "SELECT item_name, sum(quantity) AS total_qty FROM {table} "
+        "WHERE order_date >= '{start}' AND order_date < '{end}' AND restaurant_id = '{restaurant_id}' "
+        "GROUP BY item_name"
+    ),
+    "silver_reviews_restaurant_week": (
+        "02_silver.fact_reviews", "review_timestamp",
+        "SELECT sentiment, count(*) AS reviews FROM {table} "
+        "WHERE review_timestamp >= '{start}' AND review_timestamp < '{end}' AND restaurant_id = '{restaurant_id}' "
+        "GROUP BY sentiment"
+    ),
+    "gold_orders_hourly_restaurant_week": (
+        "03_gold.orders_hourly", "order_date",
+        "SELECT day_of_week, order_hour, sum(total_orders) AS total_orders FROM {table} "
+        "WHERE order_date >= '{start}' AND order_date < '{end}' AND restaurant_id = '{restaurant_id}' "
+        "GROUP BY 1, 2"
+    ),
+    "gold_review_sentiment_restaurant_week": (
+        "03_gold.review_daily_sentiment", "review_date",
+        "SELECT sentiment, sum(review_count) AS reviews FROM {table} "
+        "WHERE review_date >= '{start}' AND review_date < '{end}' AND restaurant_id = '{restaurant_id}' "
+        "GROUP BY sentiment"
+    )
+}
+
+SCAN_METRICS = ["read_files_count", "pruned_files_count", "read_bytes", "pruned_bytes", "total_time_ms"]
+
+
+def _quoted(name):
+    return ".".join(f"`{part}`" for part in name.split("."))
+
+
+# ============================================
+# LAYOUT
+# ============================================
+def table_layout(spark, table):
+    """File count, size and clustering keys of a Delta table, from DESCRIBE DETAIL"""
+    detail = spark.sql(f"DESCRIBE DETAIL {_quoted(f'{CATALOG}.{table}')}").first().asDict()
+    num_files = detail["numFiles"] or 0
+    return {
+        "num_files": num_files,
+        "size_bytes": detail["sizeInBytes"] or 0,
+        "avg_file_bytes": (detail["sizeInBytes"] or 0) // num_files if num_files else 0,
+        "clustering_columns": list(detail.get("clusteringColumns") or [])
+    }
+
+
+def last_operation_at(spark, table, operation):
+    """When operation last ran on the table; None when it never did"""
+    rows = spark.sql(f"DESCRIBE HISTORY {_quoted(f'{CATALOG}.{table}')}") \
+        .where(f"operation = '{operation}'").select("timestamp").limit(1).collect()
+    return rows[0]["timestamp"] if rows else None
+
+
+def vacuum_due(last_vacuum, now, interval_days=VACUUM_INTERVAL_DAYS):
+    return last_vacuum is None or now - last_vacuum >= timedelta(days=interval_days)
+
+
+def maintain_table(spark, table, cluster_by, now):
+    """Cluster, compact and (when due) vacuum one table; returns its layout before and after"""
+    name = _quoted(f"{CATALOG}.{table}")
+    before = table_layout(spark, table)
+    reclustered = bool(cluster_by) and before["clustering_columns"] != cluster_by
+    if reclustered:
+        keys = ", ".join(f"`{column}`" for column in cluster_by)
+        spark.sql(f"ALTER TABLE {name} CLUSTER BY ({keys})")
+
+    # OPTIMIZE compacts small files and clusters what is not clustered yet; FULL rewrites every file once,
+    # when the keys are first set or changed here (a table only ever MERGEd into since it was created
+    # unclustered), so the existing data is laid out on the new keys too
+    start = time.time()
+    spark.sql(f"OPTIMIZE {name}{' FULL' if reclustered else ''}")
+    optimize_seconds = time.time() - start
+
+    vacuumed = vacuum_due(last_operation_at(spark, table, "VACUUM END"), now.replace(tzinfo=None))
+    if vacuumed:
+        spark.sql(f"VACUUM {name} RETAIN {VACUUM_RETAIN_HOURS} HOURS")
+
+    after = table_layout(spark, table)
+    return {
+        "table_name": table,
+        "maintained": True,
+        "clustering_columns": ",".join(after["clustering_columns"]),
+        "reclustered": reclustered,
+        "vacuumed": vacuumed,
+        "optimize_seconds": round(optimize_seconds, 2),
+        **{f"{key}_before": before[key] for key in ["num_files", "size_bytes", "avg_file_bytes"]},
+        **{f"{key}_after": after[key] for key in ["num_files", "size_bytes", "avg_file_bytes"]}
+    }
+
+
+def measure_table(spark, table):
+    layout = table_layout(spark, table)
+    return {
+        "table_name": table,
+        "maintained": False,
+        "clustering_columns": ",".join(layout["clustering_columns"]),
+        "reclustered": False,
+        "vacuumed": False,
+        "optimize_seconds": None,
+        **{f"{key}_before": layout[key] for key in ["num_files", "size_bytes", "avg_file_bytes"]},
+        **{f"{key}_after": layout[key] for key in ["num_files", "size_bytes", "avg_file_bytes"]}
+    }
+
+
+# ============================================
+# SCAN METRICS
+# ============================================
+def scan_window(spark, table, column, days=SCAN_DAYS):
+    """[start, end) covering the last `days` dates of the table, as date literals"""
+    latest = spark.table(f"{CATALOG}.{table}").selectExpr(f"to_date(max(`{column}`))").first()[0]
+    if latest is None:
+        return None
+    return str(latest - timedelta(days=days - 1)), str(latest + timedelta(days=1))
+
+
+def scan_statements(spark, restaurant_id=SCAN_RESTAURANT_ID, queries=SCAN_QUERIES):
+    """query_name -> (table, statement) with literal bounds; tables that are missing or empty are left out"""
+    statements = {}
+    for query_name, (table, column, template) in queries.items():
+        if not spark.catalog.tableExists(f"{CATALOG}.{table}"):
+            continue
+        window = scan_window(spark, table, column)
+        if window is None:
+            continue
+        statements[query_name] = (table, template.format(
+            table=_quoted(f"{CATALOG}.{table}"), start=window[0], end=window[1], restaurant_id=restaurant_id
+        ))
+    return statements
+
+
+def run_scan_query(workspace, warehouse_id, statement, poll_seconds=5, max_polls=60):
+    """Run statement on the SQL warehouse and return its query history metrics once they are final"""
+    from databricks.sdk.service.sql import QueryFilter, StatementState
+
+    response = workspace.statement_execution.execute_statement(
+        statement=statement, warehouse_id=warehouse_id, wait_timeout="50s"
+    )
+    while response.status.state in (StatementState.PENDING, StatementState.RUNNING):
+        time.sleep(poll_seconds)
+        response = workspace.statement_execution.get_statement(response.statement_id)
+    if response.status.state != StatementState.SUCCEEDED:
+        raise RuntimeError(f"Scan query {response.statement_id} {response.status.state.value}: {response.status.error}")
+
+    # Query history lags the statement by a few seconds
+    for _ in range(max_polls):
+        queries = workspace.query_history.list(
+            filter_by=QueryFilter(statement_ids=[response.statement_id]), include_metrics=True
+        ).res or []
+        if queries and queries[0].is_final and queries[0].metrics:
+            return queries[0].metrics
+        time.sleep(poll_seconds)
+    raise TimeoutError(f"No final query history metrics for statement {response.statement_id}")
+
+
+def measure_scans(workspace, warehouse_id, statements, phase, run_tag):
+    """Files read and pruned by every scan query; the tag keeps the warehouse from answering from its result cache"""
+    rows = []
+    for query_name, (table, statement) in statements.items():
+        metrics = run_scan_query(workspace, warehouse_id, f"/* delta_maintenance {run_tag} {phase} */ {statement}")
+        rows.append({
+            "query_name": query_name,
+            "table_name": table,
+            "phase": phase,
+            **{metric: getattr(metrics, metric, None) for metric in SCAN_METRICS}
+        })
+    return pd.DataFrame(rows, columns=["query_name", "table_name", "phase", *SCAN_METRICS])
+
+
+def compare_scans(df_scans):
+    """One row per query: files read and pruned before and after maintenance, and the share of files skipped"""
+    df = df_scans.astype({metric: float for metric in SCAN_METRICS}).pivot(index=["query_name", "table_name"], columns="phase", values=SCAN_METRICS)
+    df.columns = [f"{metric}_{phase}" for metric, phase in df.columns]
+    df = df.reset_index()
+    for phase in ["before", "after"]:
+        scanned = df[f"read_files_count_{phase}"] + df[f"pruned_files_count_{phase}"]
+        df[f"pruned_pct_{phase}"] = (100 * df[f"pruned_files_count_{phase}"] / scanned.where(scanned > 0)).round(1)
+    return df
+
+
+# ============================================
+# PERF TABLES
+# ============================================
+def append(spark, table, df_rows):
+    if df_rows.empty:
+        return
+    spark.createDataFrame(df_rows.astype(object).where(df_rows.notna(), None)) \
+        .write.format("delta").mode("append").option("mergeSchema", "true").saveAsTable(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster, compact and vacuum the bronze tables and record data skipping")
+    parser.add_argument("--schema", default=f"{CATALOG}.perf",
+                        help="schema of the table_maintenance and layout_scan_metrics tables")
+    parser.add_argument("--warehouse-id", default=None,
+                        help="SQL warehouse that runs the scan queries; without it only file layouts are recorded")
+    parser.add_argument("--restaurant-id", default=SCAN_RESTAURANT_ID)
+    parser.add_argument("--job-run-id", default=None, help="the calling job run, to tag the recorded rows")
+    args = parser.parse_args()
+
+    from pyspark.sql import SparkSession
+
+    spark = SparkSession.builder.getOrCreate()
+    now = datetime.now(timezone.utc)
+    run_tag = args.job_run_id or now.strftime("%Y%m%d%H%M%S")
+
+    workspace = statements = None
+    df_scans = pd.DataFrame()
+    if args.warehouse_id:
+        from databricks.sdk import WorkspaceClient
+
+        workspace = WorkspaceClient()
+        statements = scan_statements(spark, args.restaurant_id)
+        df_scans = measure_scans(workspace, args.warehouse_id, statements, "before", run_tag)
+
+    layouts = []
+    for table, cluster_by in MAINTAINED_TABLES.items():
+        if spark.catalog.tableExists(f"{CATALOG}.{table}"):
+            layouts.append(maintain_table(spark, table, cluster_by, now))
+    for table in MEASURED_TABLES:
+        if spark.catalog.tableExists(f"{CATALOG}.{table}"):
+            layouts.append(measure_table(spark, table))
+    df_layouts = pd.DataFrame(layouts)
+
+    if workspace is not None:
+        df_scans = pd.concat([df_scans, measure_scans(workspace, args.warehouse_id, statements, "after", run_tag)])
+
+    for df in [df_layouts, df_scans]:
+        df["run_tag"] = str(run_tag)
+        df["measured_at"] = now.replace(tzinfo=None)
+    append(spark, f"{args.schema}.table_maintenance", df_layouts)
+    append(spark, f"{args.schema}.layout_scan_metrics", df_scans)
+
+    pd.set_option("display.width", 250)
+    pd.set_option("display.max_columns", 20)
+    print(df_layouts.drop(columns=["run_tag", "measured_at"]).to_string(index=False))
+    if not df_scans.empty:
+        print()
+        print(compare_scans(df_scans)[[
+            "query_name", "read_files_count_before", "read_files_count_after",
+            "pruned_files_count_before", "pruned_files_count_after", "pruned_pct_before", "pruned_pct_after"
+        ]].to_string(index=False))
@@ -0,0 +1,106 @@
+import json
+import argparse
+
+# ============================================
+# WATCHED TABLES
+# ============================================
+# Each downstream branch of workflow_daily_pipeline runs only when one of the tables it reads has a Delta
+# version newer than the one recorded after the last successful run.
+CATALOG = "ws_dbxproject_catalog"
+STATE_TABLE = f"{CATALOG}.perf.new_data_sensor_state"
+
+BRANCHES = {
+    "orders": ["01_bronze.historical_orders", "01_bronze.orders"],
+    "reviews": ["01_bronze.reviews"],
+    "customer_360": [
+        "01_bronze.historical_orders", "01_bronze.orders", "01_bronze.reviews",
+        "01_bronze.customers", "01_bronze.restaurants"
+    ]
+}
+
+# Commits that change a table's layout or properties but not its rows (delta_maintenance.py, ingestion's ALTERs)
+MAINTENANCE_OPERATIONS = ["OPTIMIZE", "VACUUM START", "VACUUM END", "SET TBLPROPERTIES", "CLUSTER BY"]
+# A MERGE counts only when it inserted, updated or deleted rows: the ingestion's watermark overlap re-reads
+# rows it already has, and that MERGE commits without changing any
+MERGE_ROW_METRICS = ["numTargetRowsInserted", "numTargetRowsUpdated", "numTargetRowsDeleted"]
+
+
+def _quoted(name):
+    return ".".join(f"`{part}`" for part in name.split("."))
+
+
+def table_versions(spark, tables):
+    """Latest Delta version of each table that changed its data; None for a table that does not exist yet"""
+    versions = {}
+    for table in tables:
+        name = f"{CATALOG}.{table}"
+        if not spark.catalog.tableExists(name):
+            versions[table] = None
+            continue
+        history = spark.sql(f"DESCRIBE HISTORY {_quoted(name)}")
+        rows_changed = sum(history["operationMetrics"][metric].cast("long") for metric in MERGE_ROW_METRICS)
+        unchanged_merge = (history["operation"] == "MERGE") & (rows_changed == 0)
+        versions[table] = history.where(~history["operation"].isin(MAINTENANCE_OPERATIONS) & ~unchanged_merge) \
+            .agg({"version": "max"}).first()[0]
+    return versions
+
+
+def changed_branches(current, recorded, force=False):
+    """Branch -> whether any of its tables moved past the recorded version (a table never recorded counts as moved)"""
+    return {
+        branch: force or any(
+            current.get(table) is None or recorded.get(table) is None or current[table] > recorded[table]
+            for table in tables
+        )
+        for branch, tables in BRANCHES.items()
+    }
+
+
+# ============================================
+# STATE
+# ============================================
+def load_state(spark):
+    if not spark.catalog.tableExists(STATE_TABLE):
+        return {}
+    return {row["table_name"]: row["version"] for row in spark.table(STATE_TABLE).collect()}
+
+
+def save_state(spark, versions):
+    """Record the versions the sensor saw, once every task of the run has succeeded or been skipped"""
+    spark.sql(f"""CREATE TABLE IF NOT EXISTS {_quoted(STATE_TABLE)}
+        (table_name STRING, version BIGINT, updated_at TIMESTAMP) USING DELTA""")
+    rows = [(table, version) for table, version in versions.items() if version is not None]
+    if not rows:
+        return
+    spark.createDataFrame(rows, "table_name STRING, version BIGINT").createOrReplaceTempView("sensor_versions")
+    spark.sql(f"""MERGE INTO {_quoted(STATE_TABLE)} AS t USING sensor_versions AS s
+        ON t.table_name = s.table_name
+        WHEN MATCHED THEN UPDATE SET version = s.version, updated_at = current_timestamp()
+        WHEN NOT MATCHED THEN INSERT (table_name, version, updated_at)
+            VALUES (s.table_name, s.version, current_timestamp())""")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skip workflow_daily_pipeline branches whose bronze tables did not change")
+    parser.add_argument("--force", default="false", help="'true' runs every branch regardless of table versions")
+    parser.add_argument("--commit", default=None,
+                        help="record these versions (the sensor's 'versions' task value) as the last successful run")
+    args = parser.parse_args()
+
+    from pyspark.sql import SparkSession
+    from databricks.sdk.runtime import dbutils
+
+    spark = SparkSession.builder.getOrCreate()
+
+    if args.commit is not None:
+        save_state(spark, json.loads(args.commit))
+        raise SystemExit
+
+    current = table_versions(spark, sorted({table for tables in BRANCHES.values() for table in tables}))
+    changed = changed_branches(current, load_state(spark), force=args.force.lower() == "true")
+
+    # Read by the job's condition tasks as {{tasks.check_new_data.values.<branch>_changed}}
+    for branch, has_changed in changed.items():
+        dbutils.jobs.taskValues.set(key=f"{branch}_changed", value=str(has_changed).lower())
+    dbutils.jobs.taskValues.set(key="versions", value=json.dumps(current))
+    print(json.dumps({"versions": current, "changed": changed}, indent=2))
@@ -0,0 +1,355 @@
+import os
+import json
+import argparse
+import pandas as pd
+
+# ============================================
+# PIPELINES
+# ============================================
+# The pipelines of workflow_daily_pipeline (Job.py) by task key; their event logs feed the perf schema.
+# Pipelines deployed by job.yaml have no fixed id and are looked up by name (resolve_pipeline_ids).
+PIPELINES = {
+    "pipeline_ingestion_eventhub": "bf57acc3-ffb6-45ad-8fdd-d4ee660fcb8f",
+    "pipeline_transformation_orders": None,
+    "pipeline_transformation_silver": "c4621ba2-25c0-43ea-bfd8-51753f160344",
+    "pipeline_transformation_gold": "f1bda58f-9232-45d7-b07a-8c81e4ce9674",
+    "pipeline_transformation_gold_sales": None,
+    "pipeline_transformation_gold_reviews": None
+}
+
+RUN_STATUSES = ["STARTING", "RUNNING", "COMPLETED"]
+TERMINAL_STATUSES = ["COMPLETED", "FAILED", "STOPPED", "SKIPPED", "EXCLUDED"]
+METRICS = [
+    "num_output_rows", "num_upserted_rows", "num_deleted_rows",
+    "backlog_bytes", "backlog_records", "backlog_files", "executor_time_ms"
+]
+# Streaming flows report their backlog as of each progress event; the run keeps the last one
+BACKLOG_METRICS = ["backlog_bytes", "backlog_records", "backlog_files"]
+# flow_progress has no input byte counter: a triggered update starts with everything it reads as backlog and
+# drains it, so the bytes a run read are the largest backlog_bytes it reported (none for materialized views)
+INPUT_BYTES_METRIC = "backlog_bytes"
+
+# Stateful streaming flows (e.g. the order dedup in orders_deduped) report their state operators with each
+# progress event, under metrics.state_operators with Structured Streaming's field names. Summed over the
+# operators: the state size is as of the event (the run keeps the last one), the drops are per event.
+STATE_METRICS = {
+    "state_rows_total": "numRowsTotal",
+    "state_memory_bytes": "memoryUsedBytes",
+    "dropped_duplicate_rows": "numDroppedDuplicateRows",
+    "late_rows_dropped": "numRowsDroppedByWatermark"
+}
+STATE_SIZE_METRICS = ["state_rows_total", "state_memory_bytes"]
+
+# A run regresses when its duration, executor time or input bytes exceed REGRESSION_THRESHOLD x the median of
+# the flow's previous BASELINE_RUNS completed runs (at least MIN_BASELINE_RUNS of them), by at least the metric's
+# REGRESSION_MIN_DELTA
+BASELINE_RUNS = 7
+MIN_BASELINE_RUNS = 3
+REGRESSION_THRESHOLD = 1.5
+MIN_DELTA_SECONDS = 10
+MIN_DELTA_BYTES = 1024 * 1024
+REGRESSION_MIN_DELTA = {
+    "duration_seconds": MIN_DELTA_SECONDS,
+    "executor_time_ms": MIN_DELTA_SECONDS * 1000,
+    "input_bytes": MIN_DELTA_BYTES
+}
+
+
+# ============================================
+# EVENTS -> FLOW RUNS
+# ============================================
+def _total(values):
+    return values.sum(min_count=1)
+
+
+def _details(value):
+    return json.loads(value) if isinstance(value, str) else (value or {})
+
+
+def parse_events(df_events):
+    """flow_progress and planning_information events as flat columns, one row per event
+
+    df_events has the event log's timestamp, event_type and details (the JSON
+    string) plus origin's pipeline_id, pipeline_name, update_id and flow_name.
+    """
+    details = df_events["details"].map(_details)
+    progress = details.map(lambda d: d.get("flow_progress") or {})
+    metrics = progress.map(lambda p: p.get("metrics") or {})
+    quality = progress.map(lambda p: p.get("data_quality") or {})
+
+    df = df_events[["pipeline_id", "pipeline_name", "update_id", "flow_name", "event_type"]].copy()
+    df["timestamp"] = pd.to_datetime(df_events["timestamp"], utc=True)
+    df["status"] = progress.map(lambda p: p.get("status"))
+    for metric in METRICS:
+        df[metric] = pd.to_numeric(metrics.map(lambda m: m.get(metric)), errors="coerce")
+    operators = metrics.map(lambda m: m.get("state_operators") or [])
+    for metric, field in STATE_METRICS.items():
+        df[metric] = operators.map(
+            lambda ops: sum(op.get(field) or 0 for op in ops) if ops else None
+        ).astype(float)
+    df["dropped_records"] = pd.to_numeric(quality.map(lambda q: q.get("dropped_records")), errors="coerce")
+    df["failed_expectation_records"] = quality.map(
+        lambda q: sum(e.get("failed_records") or 0 for e in q.get("expectations") or []) if q else None
+    ).astype(float)
+    # The maintenance technique the planner chose for a materialized view refresh
+    df["maintenance_type"] = details.map(lambda d: next(
+        (
+            technique.get("maintenance_type")
+            for technique in (d.get("planning_information") or {}).get("technique_information") or []
+            if technique.get("is_chosen")
+        ),
+        None
+    ))
+    return df
+
+
+def flow_runs(df_events):
+    """One row per pipeline update and flow: duration, rows, backlog, expectation drops and refresh technique
+
+    rows_in is what reached the flow's expectations: the rows it wrote plus
+    the rows they dropped. Progress metrics are per event and summed over the
+    update; the backlog and the state size are the last ones reported, and
+    input_bytes is the largest backlog (see INPUT_BYTES_METRIC).
+    """
+    df = parse_events(df_events)
+    keys = ["pipeline_id", "pipeline_name", "update_id", "flow_name"]
+    df_progress = df[df["event_type"] == "flow_progress"].sort_values("timestamp")
+
+    runs = df_progress.groupby(keys, as_index=False).agg(
+        first_event_at=("timestamp", "min"),
+        last_event_at=("timestamp", "max"),
+        **{metric: (metric, _total) for metric in METRICS if metric not in BACKLOG_METRICS},
+        **{metric: (metric, "last") for metric in BACKLOG_METRICS},
+        input_bytes=(INPUT_BYTES_METRIC, "max"),
+        **{metric: (metric, "last") for metric in STATE_SIZE_METRICS},
+        **{metric: (metric, _total) for metric in STATE_METRICS if metric not in STATE_SIZE_METRICS},
+        dropped_records=("dropped_records", _total),
+        failed_expectation_records=("failed_expectation_records", _total)
+    )
+    started = (
+        df_progress[df_progress["status"].isin(RUN_STATUSES)]
+        .groupby(keys, as_index=False)["timestamp"].min().rename(columns={"timestamp": "started_at"})
+    )
+    ended = (
+        df_progress[df_progress["status"].isin(TERMINAL_STATUSES)]
+        .groupby(keys, as_index=False)
+        .agg(ended_at=("timestamp", "max"), status=("status", "last"))
+    )
+    planned = (
+        df[df["maintenance_type"].notna()].sort_values("timestamp")
+        .groupby(keys, as_index=False)["maintenance_type"].last()
+    )
+
+    runs = runs.merge(started, on=keys, how="left").merge(ended, on=keys, how="left").merge(planned, on=keys, how="left")
+    runs["started_at"] = runs["started_at"].fillna(runs["first_event_at"])
+    runs["status"] = runs["status"].fillna("RUNNING")
+    runs["duration_seconds"] = (runs["ended_at"] - runs["started_at"]).dt.total_seconds()
+    runs["rows_in"] = runs["num_output_rows"] + runs["dropped_records"].fillna(0)
+    runs["is_incremental"] = runs["maintenance_type"].map(
+        lambda t: None if pd.isna(t) else t != "MAINTENANCE_TYPE_COMPLETE_RECOMPUTE"
+    )
+    return runs[[
+        *keys, "status", "started_at", "ended_at", "duration_seconds", "rows_in", "num_output_rows",
+        "num_upserted_rows", "num_deleted_rows", *BACKLOG_METRICS, "input_bytes", "executor_time_ms", *STATE_METRICS,
+        "dropped_records", "failed_expectation_records", "maintenance_type", "is_incremental", "last_event_at"
+    ]].sort_values(["pipeline_name", "flow_name", "started_at"], ignore_index=True)
+
+
+def flag_regressions(df_runs, baseline_runs=BASELINE_RUNS, threshold=REGRESSION_THRESHOLD):
+    """Completed runs with the median duration, executor time and input bytes of the flow's trailing baseline, and whether they regressed"""
+    df = df_runs[df_runs["status"] == "COMPLETED"].sort_values("started_at").copy()
+    by_flow = df.groupby(["pipeline_id", "flow_name"])
+
+    regressed = pd.Series(False, index=df.index)
+    for metric, min_delta in REGRESSION_MIN_DELTA.items():
+        df[f"baseline_{metric}"] = by_flow[metric].transform(
+            lambda s: s.shift(1).rolling(baseline_runs, min_periods=MIN_BASELINE_RUNS).median()
+        )
+        df[f"{metric}_ratio"] = (df[metric] / df[f"baseline_{metric}"]).round(2)
+        regressed |= (df[f"{metric}_ratio"] > threshold) & (df[metric] - df[f"baseline_{metric}"] >= min_delta)
+    df["baseline_runs"] = by_flow.cumcount().clip(upper=baseline_runs)
+    df["regressed"] = regressed
+    df["threshold"] = threshold
+    return df[[
+        "pipeline_id", "pipeline_name", "update_id", "flow_name", "started_at", "duration_seconds",
+        "baseline_duration_seconds", "duration_seconds_ratio", "executor_time_ms", "baseline_executor_time_ms",
+        "executor_time_ms_ratio", "input_bytes", "baseline_input_bytes", "input_bytes_ratio", "baseline_runs",
+        "maintenance_type", "threshold", "regressed"
+    ]].reset_index(drop=True)
+
+
+# ============================================
+# JOB TASK TIMINGS
+# ============================================
+def _ms_timestamp(value):
+    return pd.to_datetime(value, unit="ms", utc=True) if value else None
+
+
+def job_task_runs(run):
+    """One row per finished task of a job run (a databricks.sdk Run): state, start/end and phase durations
+
+    Condition tasks and the branches they skip show up too, so a quiet day
+    reads as skipped pipeline tasks with no setup or execution time.
+    """
+    rows = []
+    for task in run.tasks or []:
+        if not task.end_time:
+            continue
+        state = task.state
+        rows.append({
+            "job_id": run.job_id,
+            "job_run_id": run.run_id,
+            "task_key": task.task_key,
+            "task_run_id": task.run_id,
+            "life_cycle_state": state.life_cycle_state.value if state and state.life_cycle_state else None,
+            "result_state": state.result_state.value if state and state.result_state else None,
+            "started_at": _ms_timestamp(task.start_time),
+            "ended_at": _ms_timestamp(task.end_time),
+            "setup_seconds": (task.setup_duration or 0) / 1000,
+            "execution_seconds": (task.execution_duration or 0) / 1000,
+            "cleanup_seconds": (task.cleanup_duration or 0) / 1000
+        })
+    return pd.DataFrame(rows)
+
+
+# ============================================
+# SOURCES
+# ============================================
+EVENT_COLUMNS = ["pipeline_id", "pipeline_name", "update_id", "flow_name", "timestamp", "event_type", "details"]
+
+
+class EventLogSource:
+    """flow_progress and planning_information events of a pipeline from its event_log() table function"""
+
+    def __init__(self, spark):
+        self.spark = spark
+
+    def read(self, pipeline_id, since=None):
+        """Every event of the updates with an event after since, so an update still running last time is re-read whole"""
+        updates = "" if since is None else f"""
+            AND origin.update_id IN (
+                SELECT origin.update_id FROM event_log('{pipeline_id}') WHERE timestamp > '{since}'
+            )"""
+        return self.spark.sql(f"""
+            SELECT origin.pipeline_id, origin.pipeline_name, origin.update_id, origin.flow_name,
+                   timestamp, event_type, details
+            FROM event_log('{pipeline_id}')
+            WHERE event_type IN ('flow_progress', 'planning_information'){updates}
+        """).toPandas()
+
+
+def read_fixture(path):
+    """Event log rows saved as JSON lines (SELECT * FROM event_log(...), origin as a nested object)"""
+    df = pd.read_json(path, lines=True, dtype=False)
+    origin = pd.json_normalize(df["origin"].tolist())
+    return pd.concat([origin.reindex(columns=EVENT_COLUMNS[:4]), df[["timestamp", "event_type", "details"]]], axis=1)
+
+
+# ============================================
+# SINK
+# ============================================
+def _quoted(name):
+    return ".".join(f"`{part}`" for part in name.split("."))
+
+
+class DeltaTelemetrySink:
+    """perf.flow_runs and perf.job_task_runs, upserted, and perf.flow_regressions, rebuilt from flow_runs"""
+
+    def __init__(self, spark, schema):
+        self.spark = spark
+        self.runs_table = f"{schema}.flow_runs"
+        self.regressions_table = f"{schema}.flow_regressions"
+        self.task_runs_table = f"{schema}.job_task_runs"
+        spark.sql(f"CREATE SCHEMA IF NOT EXISTS {_quoted(schema)}")
+
+    def _upsert(self, table, df_rows, keys):
+        if df_rows.empty:
+            return
+        df = self.spark.createDataFrame(df_rows.astype(object).where(df_rows.notna(), None))
+        if not self.spark.catalog.tableExists(table):
+            df.write.format("delta").saveAsTable(table)
+            return
+
+        from delta.tables import DeltaTable
+        # Schema evolution adds columns introduced since the table was created
+        DeltaTable.forName(self.spark, table).alias("t").merge(
+            df.alias("s"), " AND ".join(f"t.`{key}` = s.`{key}`" for key in keys)
+        ).withSchemaEvolution().whenMatchedUpdateAll().whenNotMatchedInsertAll().execute()
+
+    def last_event_at(self):
+        if not self.spark.catalog.tableExists(self.runs_table):
+            return {}
+        rows = self.spark.table(self.runs_table).groupBy("pipeline_id").agg({"last_event_at": "max"}).collect()
+        return {row["pipeline_id"]: row["max(last_event_at)"] for row in rows}
+
+    def merge_runs(self, df_runs):
+        self._upsert(self.runs_table, df_runs, ["pipeline_id", "update_id", "flow_name"])
+
+    def merge_task_runs(self, df_task_runs):
+        self._upsert(self.task_runs_table, df_task_runs, ["job_run_id", "task_key"])
+
+    def runs(self):
+        return self.spark.table(self.runs_table).toPandas()
+
+    def overwrite_regressions(self, df_regressions):
+        self.spark.createDataFrame(df_regressions.astype(object).where(df_regressions.notna(), None)) \
+            .write.format("delta").mode("overwrite").option("overwriteSchema", "true") \
+            .saveAsTable(self.regressions_table)
+
+
+def resolve_pipeline_ids(workspace, pipelines=PIPELINES):
+    """PIPELINES with the ids of the pipelines deployed by name filled in; pipelines not found are left out"""
+    missing = [name for name, pipeline_id in pipelines.items() if pipeline_id is None]
+    found = {
+        pipeline.name: pipeline.pipeline_id
+        for name in missing
+        for pipeline in workspace.pipelines.list_pipelines(filter=f"name LIKE '{name}'")
+    }
+    return {name: pipeline_id or found[name] for name, pipeline_id in pipelines.items() if pipeline_id or name in found}
+
+
+def ingest(source, sink, pipelines, threshold=REGRESSION_THRESHOLD):
+    """Upsert the runs of each pipeline's new updates, then rebuild the regression flags; returns the new runs"""
+    marks = sink.last_event_at()
+    df_runs = pd.concat(
+        [flow_runs(source.read(pipeline_id, marks.get(pipeline_id))) for pipeline_id in pipelines.values()],
+        ignore_index=True
+    )
+    sink.merge_runs(df_runs)
+    sink.overwrite_regressions(flag_regressions(sink.runs(), threshold=threshold))
+    return df_runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the flow run and regression tables from the pipeline event logs")
+    parser.add_argument("--schema", default=None,
+                        help="ingest the live event logs into this schema (e.g. ws_dbxproject_catalog.perf) on Databricks")
+    parser.add_argument("--fixture", default=os.path.join(os.path.dirname(__file__), "fixtures", "event_log_sample.json"),
+                        help="saved event log (JSON lines) to build the tables from locally, without --schema")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--job-run-id", type=int, default=None,
+                        help="with --schema, also record the task timings of this job run (the calling run's own)")
+    args = parser.parse_args()
+
+    if args.schema:
+        from pyspark.sql import SparkSession
+        from databricks.sdk import WorkspaceClient
+
+        spark = SparkSession.builder.getOrCreate()
+        workspace = WorkspaceClient()
+        sink = DeltaTelemetrySink(spark, args.schema)
+        df_runs = ingest(EventLogSource(spark), sink, resolve_pipeline_ids(workspace), threshold=args.threshold)
+        print(f"Upserted {len(df_runs)} flow runs into {args.schema}.flow_runs")
+        if args.job_run_id is not None:
+            df_task_runs = job_task_runs(workspace.jobs.get_run(args.job_run_id))
+            sink.merge_task_runs(df_task_runs)
+            print(f"Upserted {len(df_task_runs)} task runs into {args.schema}.job_task_runs")
+        raise SystemExit
+
+    pd.set_option("display.width", 250)
+    pd.set_option("display.max_columns", 20)
+    df_runs = flow_runs(read_fixture(args.fixture))
+    print(df_runs.drop(columns=["pipeline_id", "update_id", "last_event_at"]).to_string(index=False))
+    df_regressions = flag_regressions(df_runs, threshold=args.threshold)
+    print()
+    print(df_regressions[df_regressions["regressed"]].drop(columns=["pipeline_id"]).to_string(index=False))
@@ -0,0 +1,362 @@
+"""Scale-factor benchmark of the silver and gold transformations on local PySpark
+
+Generates the synthetic dataset at each scale factor (SF1 = the default 500
+customers / 8000 orders, SFn = n times both) with 00_synthetic_data/03_run.py,
+then runs the pipeline sources themselves -- pipeline_transformation_orders.py
+and the pipeline_transformation_gold*.py files -- against it on a local SparkSession.
+`pyspark.pipelines` is replaced by LocalPipelines, which materializes every
+dataset as a local table in definition order; streaming reads become batch
+reads. The review SQL needs ai_query, so fact_reviews is built from the local
+classifier (review_classifier.py) alone.
+
+Per stage it appends one JSON line to the results file: wall time, output rows,
+shuffle read/write bytes and peak task execution memory from the Spark status
+API, and the driver JVM's peak heap so far.
+
+Usage (from the repo root; needs pyspark>=3.5 and Java):
+    python benchmarks/benchmark_pipeline.py --scale-factors 1 10
+    python benchmarks/benchmark_pipeline.py --scale-factors 100 --shards 8 --driver-memory 16g
+"""
+import os
+import sys
+import json
+import time
+import types
+import runpy
+import argparse
+import subprocess
+import urllib.request
+from datetime import datetime, timezone
+
+import pyspark
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(script_dir)
+GENERATOR = os.path.join(REPO_DIR, "00_synthetic_data", "03_run.py")
+PIPELINE_DIR = os.path.join(REPO_DIR, "pipeline_transformation_silver")
+
+SCALE_FACTORS = [1, 10, 100, 1000]
+SF1 = {"customers": 500, "orders": 8000}
+END_DATE = "2025-09-30"  # fixed, so a scale factor always generates the same orders
+LAYERS = ["01_bronze", "02_silver", "03_gold"]
+GOLD_SOURCES = [
+    "pipeline_transformation_gold.py", "pipeline_transformation_gold_sales.py", "pipeline_transformation_gold_reviews.py"
+]
+
+# Line items as the Event Hub producer sends them (04_eventhub_orders.py)
+EVENTHUB_ITEMS_SCHEMA = (
+    "ARRAY<STRUCT<item_id: STRING, name: STRING, category: STRING, quantity: INT, "
+    "unit_price: DOUBLE, subtotal: DOUBLE>>"
+)
+# The from_json schema of 02_silver.review_analysis (pipeline_transformation_silver.py)
+REVIEW_ANALYSIS_SCHEMA = (
+    "sentiment STRING, issue_delivery BOOLEAN, issue_delivery_reason STRING, "
+    "issue_food_quality BOOLEAN, issue_food_quality_reason STRING, issue_pricing BOOLEAN, issue_pricing_reason STRING, "
+    "issue_portion_size BOOLEAN, issue_portion_size_reason STRING"
+)
+
+
+# ============================================
+# LOCAL PIPELINE STAND-INS
+# ============================================
+def local_table_name(name):
+    """`layer`.`table` for a pipeline table name, without the Unity Catalog catalog"""
+    parts = name.split(".")
+    if len(parts) == 3:
+        parts = parts[1:]
+    return ".".join(f"`{part}`" for part in parts)
+
+
+class LocalReader:
+    """spark.read / spark.readStream over the local tables; a change feed read sees every row as an insert"""
+
+    def __init__(self, spark):
+        self._spark = spark
+        self._change_feed = False
+
+    def option(self, key, value):
+        if key == "readChangeFeed":
+            self._change_feed = str(value).lower() == "true"
+        return self
+
+    def table(self, name):
+        df = self._spark.read.table(local_table_name(name))
+        return df.withColumn("_change_type", F.lit("insert")) if self._change_feed else df
+
+
+class LocalSession:
+    """The pipeline sources' `spark` global: the local session, with table reads going through LocalReader"""
+
+    def __init__(self, spark):
+        self._spark = spark
+
+    def __getattr__(self, name):
+        return getattr(self._spark, name)
+
+    @property
+    def read(self):
+        return LocalReader(self._spark)
+
+    readStream = read
+
+
+class LocalPipelines(types.ModuleType):
+    """Stand-in for `pyspark.pipelines`: records dataset definitions in order; expectations are not evaluated"""
+
+    def __init__(self, spark):
+        super().__init__("pyspark.pipelines")
+        self.spark = spark
+        self.datasets = []
+
+    def table(self, name=None, **kwargs):
+        def decorator(fn):
+            self.datasets.append((name or fn.__name__, fn))
+            return fn
+        return decorator
+
+    materialized_view = table
+
+    def expect(self, *args, **kwargs):
+        return lambda fn: fn
+
+    expect_or_drop = expect_or_fail = expect
+
+    def read(self, name):
+        return self.spark.read.table(name)
+
+
+def load_pipeline_source(filename, session, dp):
+    """Run a pipeline source file against the stand-ins and return the datasets it defines"""
+    sys.modules["pyspark.pipelines"] = dp
+    pyspark.pipelines = dp
+    dp.datasets = []
+    runpy.run_path(os.path.join(PIPELINE_DIR, filename), init_globals={"spark": session})
+    return dp.datasets
+
+
+# ============================================
+# DATA
+# ============================================
+def ensure_dataset(data_dir, scale_factor, seed, shards):
+    """Generate data_dir/sf<N> with the synthetic data generator, unless it already holds the same parameters"""
+    path = os.path.join(data_dir, f"sf{scale_factor}")
+    marker = os.path.join(path, "_generated.json")
+    params = {
+        "customers": SF1["customers"] * scale_factor, "orders": SF1["orders"] * scale_factor,
+        "seed": seed, "end_date": END_DATE
+    }
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == params:
+                return path
+
+    print(f"Generating SF{scale_factor} into {os.path.relpath(path, REPO_DIR)}")
+    subprocess.run(
+        [
+            sys.executable, GENERATOR, "--format", "parquet", "--engine", "numpy",
+            "--customers", str(params["customers"]), "--orders", str(params["orders"]),
+            "--seed", str(seed), "--shards", str(shards), "--end-date", END_DATE
+        ],
+        env={**os.environ, "SYNTHETIC_DATA_DIR": path}, check=True, stdout=subprocess.DEVNULL
+    )
+    with open(marker, "w") as f:
+        json.dump(params, f)
+    return path
+
+
+def bronze_tables(spark, dataset_dir):
+    """01_bronze tables as the ingestion pipelines land them, read from the generated Parquet datasets"""
+    def parquet(name):
+        return spark.read.parquet(os.path.join(dataset_dir, name))
+
+    df_historical = parquet("historical_orders")
+    last_day = df_historical.agg(F.max("order_date")).first()[0]
+
+    return [
+        ("01_bronze.restaurants", parquet("restaurants")),
+        ("01_bronze.menu_items", parquet("menu_items")),
+        ("01_bronze.customers", parquet("customers")),
+        ("01_bronze.historical_orders", (
+            df_historical.drop("order_date").withColumnRenamed("timestamp", "order_timestamp")
+        )),
+        # Event Hub stand-in: the last day of historical orders again, shaped as the stream delivers them, so the
+        # silver dedup has cross-source duplicates to drop
+        ("01_bronze.orders", (
+            df_historical.filter(F.col("order_date") == last_day)
+            .select(
+                "order_id",
+                F.concat(F.date_format("timestamp", "yyyy-MM-dd'T'HH:mm:ss.SSSSSS"), F.lit("Z")).alias("timestamp"),
+                "restaurant_id", "customer_id", "order_type",
+                F.from_json("items", EVENTHUB_ITEMS_SCHEMA).alias("items"),
+                "total_amount", "payment_method", "order_status"
+            )
+        )),
+        ("01_bronze.reviews", parquet("customer_reviews").drop("review_date"))
+    ]
+
+
+def local_fact_reviews(session):
+    """02_silver.fact_reviews with every review analyzed by the local classifier; the ai_query tiers are skipped"""
+    return (
+        session.read.table("01_bronze.reviews")
+        .withColumn("local_analysis", F.expr("classify_review(review_text, rating)"))
+        .withColumn("analysis", F.from_json("local_analysis.analysis_json", REVIEW_ANALYSIS_SCHEMA))
+        .select(
+            "review_id", "order_id", "customer_id", "restaurant_id", "rating", "review_text",
+            F.col("local_analysis.analysis_json").alias("analysis_json"),
+            F.lit("local").alias("analysis_source"),
+            F.col("local_analysis.confidence").alias("local_confidence"),
+            "analysis.*",
+            F.col("review_timestamp").cast("timestamp").alias("review_timestamp")
+        )
+    )
+
+
+# ============================================
+# METRICS
+# ============================================
+def _get_json(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return json.load(response)
+
+
+def spark_metrics(spark, job_group, timeout=60):
+    """Shuffle bytes and peak task memory over the completed Spark stages of job_group, from the status REST API"""
+    sc = spark.sparkContext
+    api = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}"
+
+    # The status store is fed by an asynchronous listener; wait until it has seen the group's jobs finish
+    deadline = time.monotonic() + timeout
+    while True:
+        jobs = [job for job in _get_json(f"{api}/jobs") if job.get("jobGroup") == job_group]
+        if (jobs and all(job["status"] != "RUNNING" for job in jobs)) or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+
+    metrics = {"shuffle_read_bytes": 0, "shuffle_write_bytes": 0, "peak_task_memory_bytes": 0}
+    for stage_id in sorted({stage_id for job in jobs for stage_id in job["stageIds"]}):
+        for attempt in _get_json(f"{api}/stages/{stage_id}"):
+            if attempt["status"] != "COMPLETE":
+                continue
+            metrics["shuffle_read_bytes"] += attempt["shuffleReadBytes"]
+            metrics["shuffle_write_bytes"] += attempt["shuffleWriteBytes"]
+            summary = _get_json(f"{api}/stages/{stage_id}/{attempt['attemptId']}/taskSummary?quantiles=1.0")
+            metrics["peak_task_memory_bytes"] = max(
+                metrics["peak_task_memory_bytes"], int(summary["peakExecutionMemory"][0])
+            )
+
+    driver = next(e for e in _get_json(f"{api}/executors") if e["id"] == "driver")
+    metrics["jvm_heap_peak_bytes"] = driver.get("peakMemoryMetrics", {}).get("JVMHeapMemory")
+    return metrics
+
+
+def run_stage(spark, name, df, job_group):
+    """Materialize one dataset as a local table and measure it"""
+    spark.sparkContext.setJobGroup(job_group, name)
+    started = time.perf_counter()
+    df.write.mode("overwrite").format("parquet").saveAsTable(local_table_name(name))
+    wall_seconds = time.perf_counter() - started
+
+    spark.sparkContext.setJobGroup(f"{job_group}:count", name)
+    output_rows = spark.read.table(local_table_name(name)).count()
+    return {
+        "stage": name,
+        "wall_seconds": round(wall_seconds, 3),
+        "output_rows": output_rows,
+        **spark_metrics(spark, job_group)
+    }
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+def benchmark_scale_factor(spark, dataset_dir, scale_factor):
+    """Bronze load, silver orders and reviews, then gold, each dataset as one measured stage"""
+    session = LocalSession(spark)
+    dp = LocalPipelines(session)
+
+    def stages():
+        yield from bronze_tables(spark, dataset_dir)
+        for name, define in load_pipeline_source("pipeline_transformation_orders.py", session, dp):
+            yield name, define()
+        runpy.run_path(os.path.join(PIPELINE_DIR, "review_classifier.py"), init_globals={"spark": session})
+        yield "02_silver.fact_reviews", local_fact_reviews(session)
+        for filename in GOLD_SOURCES:
+            for name, define in load_pipeline_source(filename, session, dp):
+                yield name, define()
+
+    results = []
+    # Each dataset is defined only after the ones before it are materialized, as the pipeline would
+    for name, df in stages():
+        result = run_stage(spark, name, df, job_group=f"sf{scale_factor}:{name}")
+        print(
+            f"SF{scale_factor:<5} {name:<36} {result['wall_seconds']:>9.2f}s {result['output_rows']:>12,} rows "
+            f"{result['shuffle_write_bytes'] / 2**20:>10.1f} MiB shuffled"
+        )
+        results.append({"scale_factor": scale_factor, **result})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_spark(master, driver_memory, shuffle_partitions, warehouse_dir):
+    builder = (
+        SparkSession.builder
+        .master(master)
+        .appName("pipeline-benchmark")
+        .config("spark.driver.memory", driver_memory)
+        .config("spark.sql.warehouse.dir", warehouse_dir)
+        .config("spark.sql.session.timeZone", "UTC")
+        .config("spark.ui.enabled", "true")
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+    )
+    if shuffle_partitions:
+        builder = builder.config("spark.sql.shuffle.partitions", shuffle_partitions)
+    return builder.getOrCreate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the silver and gold transformations at scale factors")
+    parser.add_argument("--scale-factors", type=int, nargs="+", choices=SCALE_FACTORS, default=[1, 10])
+    parser.add_argument("--data-dir", default=os.path.join(script_dir, "data"),
+                        help="generated datasets, one sf<N>/ per scale factor, reused across runs")
+    parser.add_argument("--results", default=os.path.join(script_dir, "results", "benchmark_results.jsonl"),
+                        help="JSON lines file the stage results are appended to")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="generator worker processes")
+    parser.add_argument("--master", default="local[*]")
+    parser.add_argument("--driver-memory", default="4g")
+    parser.add_argument("--shuffle-partitions", type=int, default=None, help="spark.sql.shuffle.partitions")
+    args = parser.parse_args()
+
+    spark = build_spark(args.master, args.driver_memory, args.shuffle_partitions,
+                        os.path.join(args.data_dir, "spark-warehouse"))
+    for layer in LAYERS:
+        spark.sql(f"CREATE DATABASE IF NOT EXISTS `{layer}`")
+
+    run = {
+        "run_id": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "git_commit": git_commit(),
+        "spark_version": spark.version,
+        "master": args.master,
+        "shuffle_partitions": spark.conf.get("spark.sql.shuffle.partitions")
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    for scale_factor in args.scale_factors:
+        dataset_dir = ensure_dataset(args.data_dir, scale_factor, args.seed, args.shards)
+        results = benchmark_scale_factor(spark, dataset_dir, scale_factor)
+        with open(args.results, "a") as f:
+            for result in results:
+                f.write(json.dumps({**run, **result}) + "\n")
+
+    print(f"Results appended to {os.path.relpath(os.path.abspath(args.results), REPO_DIR)}")
+    spark.stop()
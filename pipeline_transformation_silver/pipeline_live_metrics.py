@@ -0,0 +1,79 @@
+from pyspark import pipelines as dp
+from pyspark.sql import functions as F
+
+# Live trading metrics straight from the Event Hub orders in 01_bronze.orders. This file is its own pipeline in
+# continuous mode, next to the triggered silver/gold pipelines of workflow_daily_pipeline, so a window is
+# published shortly after it closes instead of after the next daily run.
+
+# A window is emitted once the watermark passes its end, i.e. this long after the latest order_timestamp seen.
+# Orders arriving later than that are dropped; the state held is the open windows plus the order_ids seen
+# within the watermark, so it stays bounded however long the pipeline runs.
+LIVE_WATERMARK = spark.conf.get("gold.live_metrics.watermark", "30 seconds")
+
+ITEMS_SCHEMA = "ARRAY<STRUCT<item_id: STRING, quantity: INT, subtotal: DECIMAL(10,2)>>"
+
+
+def live_orders():
+    """Event Hub orders deduplicated on order_id within the watermark, with the item quantity per order"""
+    df = spark.readStream.table("ws_dbxproject_catalog.01_bronze.orders")
+    # Brought to ITEMS_SCHEMA whichever form bronze has (a JSON string, or a struct array with inferred types,
+    # e.g. a BIGINT quantity), as the orders stage does, so the sum below has one type
+    items_json = F.col("items") if dict(df.dtypes)["items"] == "string" else F.to_json("items")
+    items = F.from_json(items_json, ITEMS_SCHEMA)
+    return (
+        df.select(
+            F.col("order_id"),
+            F.to_timestamp("timestamp").alias("order_timestamp"),
+            F.col("restaurant_id"),
+            F.col("order_type"),
+            F.col("total_amount").cast("decimal(10,2)").alias("total_amount"),
+            F.aggregate(
+                items, F.lit(0).cast("bigint"),
+                lambda acc, item: acc + F.coalesce(item.quantity.cast("bigint"), F.lit(0).cast("bigint"))
+            )
+            .alias("items_sold")
+        )
+        .withWatermark("order_timestamp", LIVE_WATERMARK)
+        .dropDuplicatesWithinWatermark(["order_id"])
+    )
+
+
+def windowed_metrics(window_duration):
+    return (
+        live_orders()
+        .groupBy(F.window("order_timestamp", window_duration), "restaurant_id", "order_type")
+        .agg(
+            F.count("*").alias("total_orders"),
+            F.sum("total_amount").alias("total_revenue"),
+            F.sum("items_sold").alias("items_sold")
+        )
+        .select(
+            F.col("window.start").alias("window_start"),
+            F.col("window.end").alias("window_end"),
+            F.col("restaurant_id"),
+            F.col("order_type"),
+            F.col("total_orders"),
+            F.col("total_revenue").cast("decimal(12,2)").alias("total_revenue"),
+            (F.col("total_revenue") / F.col("total_orders")).cast("decimal(10,2)").alias("avg_order_value"),
+            F.col("items_sold").cast("bigint").alias("items_sold"),
+            F.current_timestamp().alias("_published_at")
+        )
+    )
+
+
+@dp.table(
+    name="03_gold.live_restaurant_metrics_1m",
+    comment="Orders, revenue, AOV and items sold per restaurant and order type in tumbling 1-minute windows",
+    table_properties={"quality": "gold"}
+)
+def live_restaurant_metrics_1m():
+    return windowed_metrics("1 minute")
+
+
+@dp.table(
+    name="03_gold.live_restaurant_metrics_15m",
+    comment="Orders, revenue, AOV and items sold per restaurant and order type in tumbling 15-minute windows",
+    table_properties={"quality": "gold"}
+)
+def live_restaurant_metrics_15m():
+    return windowed_metrics("15 minutes")
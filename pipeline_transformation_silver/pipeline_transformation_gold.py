@@ -1,6 +1,51 @@
 from pyspark import pipelines as dp
 from pyspark.sql import functions as F
-from pyspark.sql.window import Window
+
+# Customer 360 is built from per-customer running aggregates. Each one is a plain group-by with count/sum/max,
+# so the pipeline refreshes it incrementally: only the groups touched by new silver rows are recomputed.
+# The favorites are max_by over those small tables rather than a row_number() sort over all orders.
+@dp.materialized_view(
+    name="03_gold.customer_restaurant_stats",
+    table_properties={"quality": "gold"}
+)
+def customer_restaurant_stats():
+    return (
+        dp.read("02_silver.fact_orders")
+        .groupBy("customer_id", "restaurant_id")
+        .agg(
+            F.count("*").alias("order_ct"),
+            F.sum("total_amount").alias("spend"),
+            F.max("order_date").alias("last_order_date")
+        )
+    )
+
+
+@dp.materialized_view(
+    name="03_gold.customer_item_stats",
+    table_properties={"quality": "gold"}
+)
+def customer_item_stats():
+    return (
+        dp.read("02_silver.fact_order_items")
+        .groupBy("customer_id", "item_name")
+        .agg(F.sum("quantity").alias("item_qty"))
+    )
+
+
+@dp.materialized_view(
+    name="03_gold.customer_review_stats",
+    table_properties={"quality": "gold"}
+)
+def customer_review_stats():
+    return (
+        dp.read("02_silver.fact_reviews")
+        .groupBy("customer_id")
+        .agg(
+            F.count("*").alias("total_reviews"),
+            F.sum("rating").alias("rating_sum")
+        )
+    )
+
 
 @dp.materialized_view(
     name="03_gold.d_customer_360",
@@ -9,55 +54,48 @@ from pyspark.sql.window import Window
 def d_customer_360():
     df_customers = dp.read("01_bronze.customers")
     df_restaurants = dp.read("01_bronze.restaurants")
-    df_orders = dp.read("02_silver.fact_orders")
-    df_order_items = dp.read("02_silver.fact_order_items")
-    df_reviews = dp.read("02_silver.fact_reviews")
 
+    # One pass over the customer x restaurant aggregates for the order stats and favorite restaurant
     df_order_stats = (
-        df_orders
+        dp.read("03_gold.customer_restaurant_stats")
         .groupBy("customer_id")
         .agg(
-            F.countDistinct("order_id").alias("total_orders"),
-            F.sum("total_amount").alias("lifetime_spend"),
-            F.round(F.avg("total_amount"), 2).alias("avg_order_value"),
-            F.max("order_date").alias("last_order_date"),
+            F.sum("order_ct").alias("total_orders"),
+            F.sum("spend").alias("lifetime_spend"),
+            F.round(F.sum("spend") / F.sum("order_ct"), 2).alias("avg_order_value"),
+            F.max("last_order_date").alias("last_order_date"),
+            F.max_by("restaurant_id", "order_ct").alias("favorite_restaurant_id")
         )
-    )
-
-    df_review_stats = (
-        df_reviews
-        .groupBy("customer_id")
-        .agg(
-            F.countDistinct("review_id").alias("total_reviews"),
-            F.round(F.avg("rating"), 2).alias("avg_rating_given")
+        .join(
+            df_restaurants.select(
+                F.col("restaurant_id").alias("favorite_restaurant_id"),
+                F.col("name").alias("favorite_restaurant")
+            ),
+            "favorite_restaurant_id", "left"
         )
+        .drop("favorite_restaurant_id")
     )
 
-    df_fav_restaurant = (
-        df_orders
-        .groupBy("customer_id", "restaurant_id")
-        .agg(F.countDistinct("order_id").alias("order_ct"))
-        .withColumn("rn", F.row_number().over(Window.partitionBy("customer_id").orderBy(F.desc("order_ct"))))
-        .filter(F.col("rn") == 1)
-        .join(df_restaurants, "restaurant_id", "left")
-        .select(F.col("customer_id"), F.col("name").alias("favorite_restaurant"))
+    df_fav_item = (
+        dp.read("03_gold.customer_item_stats")
+        .groupBy("customer_id")
+        .agg(F.max_by("item_name", "item_qty").alias("favorite_item"))
     )
 
-    df_fav_item = (
-        df_orders.join(df_order_items, "order_id", "inner")
-        .groupBy(df_orders.customer_id, df_order_items.item_name)
-        .agg(F.sum("quantity").alias("item_qty"))
-        .withColumn("rn", F.row_number().over(Window.partitionBy("customer_id").orderBy(F.desc("item_qty"))))
-        .filter(F.col("rn") == 1)
-        .select("customer_id", F.col("item_name").alias("favorite_item"))
+    df_review_stats = (
+        dp.read("03_gold.customer_review_stats")
+        .select(
+            "customer_id",
+            "total_reviews",
+            F.round(F.col("rating_sum") / F.col("total_reviews"), 2).alias("avg_rating_given")
+        )
     )
 
     df_c360 = (
         df_customers
         .join(df_order_stats, "customer_id", "left")
         .join(df_review_stats, "customer_id", "left")
-        .join(df_fav_restaurant, "customer_id", "left")
-        .join(df_fav_item, "customer_id", "left")    
+        .join(df_fav_item, "customer_id", "left")
         .select(
             F.col("customer_id"),
             F.col("name").alias("customer_name"),
@@ -91,4 +129,4 @@ def d_customer_360():
             ).otherwise(False).alias("is_vip")
         )
     )
-    return df_c360
\ No newline at end of file
+    return df_c360
@@ -0,0 +1,67 @@
+from pyspark import pipelines as dp
+from pyspark.sql import functions as F
+
+@dp.materialized_view(
+    name="03_gold.d_restaurant_reviews",
+    table_properties={"quality": "gold"}
+)
+def d_restaurant_reviews():
+    df_restaurants = dp.read("01_bronze.restaurants")
+
+    df_review_stats = (
+        dp.read("02_silver.fact_reviews")
+        .groupBy("restaurant_id")
+        .agg(
+            F.count("*").alias("total_reviews"),
+            F.sum("rating").alias("rating_sum"),
+            *[F.count_if(F.col("rating") == rating).alias(f"rating_{rating}_count") for rating in (5, 4, 3, 2, 1)],
+            *[
+                F.count_if(F.col("sentiment") == sentiment).alias(f"sentiment_{sentiment}_count")
+                for sentiment in ("positive", "neutral", "negative")
+            ]
+        )
+    )
+
+    return (
+        df_restaurants
+        .join(df_review_stats, "restaurant_id", "left")
+        .select(
+            F.col("restaurant_id"),
+            F.col("name").alias("restaurant_name"),
+            F.col("city"),
+            F.coalesce(F.col("total_reviews"), F.lit(0)).cast("bigint").alias("total_reviews"),
+            (F.col("rating_sum") / F.col("total_reviews")).cast("decimal(3,2)").alias("avg_rating"),
+            *[
+                F.coalesce(F.col(f"rating_{rating}_count"), F.lit(0)).cast("bigint").alias(f"rating_{rating}_count")
+                for rating in (5, 4, 3, 2, 1)
+            ],
+            *[
+                F.coalesce(F.col(f"sentiment_{sentiment}_count"), F.lit(0)).cast("bigint").alias(f"sentiment_{sentiment}_count")
+                for sentiment in ("positive", "neutral", "negative")
+            ]
+        )
+    )
+
+
+# Rollup behind the Review Insights tiles in sql/Dashboard.sql, refreshed incrementally like the ones in
+# pipeline_transformation_gold_sales.py
+@dp.materialized_view(
+    name="03_gold.review_daily_sentiment",
+    comment="Reviews and raised issues per review_date, restaurant and sentiment",
+    table_properties={"quality": "gold"},
+    cluster_by=["review_date", "restaurant_id"]
+)
+def review_daily_sentiment():
+    # fact_reviews holds at most one review per order, so these counts equal the distinct order counts
+    return (
+        dp.read("02_silver.fact_reviews")
+        .groupBy(F.to_date("review_timestamp").alias("review_date"), "restaurant_id", "sentiment")
+        .agg(
+            F.count("*").alias("review_count"),
+            F.sum("rating").alias("rating_sum"),
+            *[
+                F.count_if(F.col(issue)).alias(f"{issue}_count")
+                for issue in ("issue_delivery", "issue_food_quality", "issue_pricing", "issue_portion_size")
+            ]
+        )
+    )
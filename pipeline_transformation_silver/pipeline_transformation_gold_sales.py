@@ -0,0 +1,116 @@
+from pyspark import pipelines as dp
+from pyspark.sql import functions as F
+
+# Daily sales come from per (order_date, restaurant) and per (order_date, customer) aggregates, refreshed
+# incrementally like the customer stats in pipeline_transformation_gold.py; the unique counts are the number of rows per day in each.
+# restaurant_daily_sales also keeps HLL sketches of the day's customers and orders (lgConfigK = HLL_LG_K), which
+# merge across any date range and restaurant set; see sql/gold_sketch_queries.sql.
+HLL_LG_K = 12  # 4096 registers: about 1.6% relative standard error, a few KB per sketch
+
+
+@dp.materialized_view(
+    name="03_gold.restaurant_daily_sales",
+    table_properties={"quality": "gold"}
+)
+def restaurant_daily_sales():
+    return (
+        dp.read("02_silver.fact_orders")
+        .groupBy("order_date", "restaurant_id")
+        .agg(
+            F.count("*").alias("total_orders"),
+            F.sum("total_amount").alias("total_revenue"),
+            F.count_if(F.col("order_type") == "dine_in").alias("dine_in_orders"),
+            F.count_if(F.col("order_type") == "takeaway").alias("takeaway_orders"),
+            F.count_if(F.col("order_type") == "delivery").alias("delivery_orders"),
+            F.hll_sketch_agg("customer_id", HLL_LG_K).alias("customers_sketch"),
+            F.hll_sketch_agg("order_id", HLL_LG_K).alias("orders_sketch")
+        )
+    )
+
+
+@dp.materialized_view(
+    name="03_gold.customer_daily_orders",
+    table_properties={"quality": "gold"}
+)
+def customer_daily_orders():
+    return (
+        dp.read("02_silver.fact_orders")
+        .groupBy("order_date", "customer_id")
+        .agg(F.count("*").alias("total_orders"))
+    )
+
+
+@dp.materialized_view(
+    name="03_gold.d_sales_summary",
+    table_properties={"quality": "gold"}
+)
+def d_sales_summary():
+    df_unique_customers = (
+        dp.read("03_gold.customer_daily_orders")
+        .groupBy("order_date")
+        .agg(F.count("*").alias("unique_customers"))
+    )
+
+    return (
+        dp.read("03_gold.restaurant_daily_sales")
+        .groupBy("order_date")
+        .agg(
+            F.sum("total_orders").alias("total_orders"),
+            F.sum("total_revenue").alias("total_revenue"),
+            F.count("*").alias("unique_restaurants"),
+            F.sum("dine_in_orders").alias("dine_in_orders"),
+            F.sum("takeaway_orders").alias("takeaway_orders"),
+            F.sum("delivery_orders").alias("delivery_orders")
+        )
+        .join(df_unique_customers, "order_date", "left")
+        .select(
+            F.col("order_date"),
+            F.col("total_orders").cast("bigint").alias("total_orders"),
+            F.col("total_revenue").cast("decimal(12,2)").alias("total_revenue"),
+            (F.col("total_revenue") / F.col("total_orders")).cast("decimal(10,2)").alias("avg_order_value"),
+            F.coalesce(F.col("unique_customers"), F.lit(0)).cast("bigint").alias("unique_customers"),
+            F.col("unique_restaurants").cast("bigint").alias("unique_restaurants"),
+            F.col("dine_in_orders").cast("bigint").alias("dine_in_orders"),
+            F.col("takeaway_orders").cast("bigint").alias("takeaway_orders"),
+            F.col("delivery_orders").cast("bigint").alias("delivery_orders")
+        )
+    )
+
+
+# Rollups behind the Restaurant Performance dashboard (sql/Dashboard.sql). They are plain group-bys over the
+# silver facts, refreshed incrementally, so a tile reads one small row per group and day instead of scanning
+# the facts for every :DATE_RANGE. Hour-of-day order counts need their own rollup: an order
+# spans several item rows, so they cannot be summed back from the item grain.
+@dp.materialized_view(
+    name="03_gold.order_items_hourly",
+    comment="Quantity and revenue per order_date, hour, restaurant, order type and menu item",
+    table_properties={"quality": "gold"},
+    cluster_by=["order_date", "restaurant_id"]
+)
+def order_items_hourly():
+    return (
+        dp.read("02_silver.fact_order_items")
+        .groupBy("order_date", "order_hour", "day_of_week", "restaurant_id", "order_type", "category", "item_name")
+        .agg(
+            F.count("*").alias("order_lines"),
+            F.sum("quantity").alias("total_qty"),
+            F.sum("subtotal").alias("total_revenue")
+        )
+    )
+
+
+@dp.materialized_view(
+    name="03_gold.orders_hourly",
+    comment="Orders and revenue per order_date, hour, restaurant and order type",
+    table_properties={"quality": "gold"},
+    cluster_by=["order_date", "restaurant_id"]
+)
+def orders_hourly():
+    return (
+        dp.read("02_silver.fact_orders")
+        .groupBy("order_date", "order_hour", "day_of_week", "restaurant_id", "order_type")
+        .agg(
+            F.count("*").alias("total_orders"),
+            F.sum("total_amount").alias("total_revenue")
+        )
+    )
@@ -0,0 +1,161 @@
+from pyspark import pipelines as dp
+from pyspark.sql import functions as F
+
+# Order line items as both sources carry them: a JSON string in the Azure SQL historical orders,
+# a JSON array in the Event Hub orders. Both are brought to a JSON string and parsed once with this schema.
+ITEMS_SCHEMA = (
+    "ARRAY<STRUCT<item_id: STRING, name: STRING, category: STRING, quantity: INT, "
+    "unit_price: DECIMAL(10,2), subtotal: DECIMAL(10,2)>>"
+)
+
+# Event Hub delivers at least once and the daily historical load lands up to a day behind the stream, so an
+# order_id is remembered for this long past its order_timestamp; older state is dropped, keeping it bounded.
+DEDUP_WATERMARK = spark.conf.get("silver.orders.dedup_watermark", "2 days")
+
+
+def normalize_orders(df, timestamp_column, source):
+    """Common order columns for both bronze sources, with items as a JSON string"""
+    items = F.col("items") if dict(df.dtypes)["items"] == "string" else F.to_json("items")
+    return df.select(
+        F.col("order_id"),
+        F.to_timestamp(timestamp_column).alias("order_timestamp"),
+        F.col("restaurant_id"),
+        F.col("customer_id"),
+        F.col("order_type"),
+        items.alias("items_json"),
+        F.col("total_amount").cast("decimal(10,2)").alias("total_amount"),
+        F.col("payment_method"),
+        F.col("order_status"),
+        F.lit(source).alias("_source")
+    )
+
+
+def with_order_items(df_orders):
+    """Slim historical orders (generated with --items table) with items rebuilt from 01_bronze.order_items
+
+    The lines are read as of each micro-batch: bronze ingestion loads the orders and their lines in the same
+    run, before this pipeline. order_items carries no names, so they come from menu_items, keyed by the
+    order's restaurant (item ids repeat across restaurants). Orders without lines keep NULL items.
+    """
+    df_lines = (
+        spark.read.table("ws_dbxproject_catalog.01_bronze.order_items")
+        .groupBy("order_id")
+        .agg(F.collect_list(F.struct("item_id", "quantity", "unit_price", "subtotal")).alias("_lines"))
+    )
+    df_menu = spark.read.table("ws_dbxproject_catalog.01_bronze.menu_items").agg(
+        F.map_from_entries(F.collect_list(F.struct(
+            F.concat_ws("|", "restaurant_id", "item_id"), F.struct("name", "category")
+        ))).alias("_menu")
+    )
+
+    def item(line):
+        menu_item = F.col("_menu")[F.concat_ws("|", F.col("restaurant_id"), line["item_id"])]
+        return F.struct(
+            line["item_id"].alias("item_id"),
+            menu_item["name"].alias("name"),
+            menu_item["category"].alias("category"),
+            line["quantity"].alias("quantity"),
+            line["unit_price"].alias("unit_price"),
+            line["subtotal"].alias("subtotal")
+        )
+
+    return (
+        df_orders.join(df_lines, "order_id", "left")
+        .crossJoin(df_menu)
+        .withColumn("items", F.transform("_lines", item))
+        .drop("_lines", "_menu")
+    )
+
+
+# Persisted rather than a temporary view: both facts read it, and a view would run the dedup once per reading
+# flow, each with its own state store and watermark, so state memory doubles and fact_orders and
+# fact_order_items could disagree on which late rows were dropped. Its dedup state and drops (state rows and
+# memory, duplicate and late rows dropped) are recorded per update from the event log by pipeline_telemetry.py.
+@dp.table(
+    name="02_silver.orders_deduped",
+    comment="Historical and streaming orders, deduplicated on order_id within the watermark, items parsed once",
+    table_properties={"quality": "silver"}
+)
+@dp.expect("items_parsed", "items IS NOT NULL")
+def orders_deduped():
+    # The bronze load rewrites historical_orders (overwrite or MERGE), so read its change feed: new and
+    # updated rows arrive as inserts/post-images. Rows re-inserted by a full overwrite are dropped by the
+    # dedup below, as duplicates or as rows older than the watermark
+    df_historical = (
+        spark.readStream
+        .option("readChangeFeed", "true")
+        .table("ws_dbxproject_catalog.01_bronze.historical_orders")
+        .filter(F.col("_change_type").isin("insert", "update_postimage"))
+    )
+    if "items" not in df_historical.columns:
+        df_historical = with_order_items(df_historical)
+    df_streaming = spark.readStream.table("ws_dbxproject_catalog.01_bronze.orders")
+
+    return (
+        normalize_orders(df_historical, "order_timestamp", "historical")
+        .unionByName(normalize_orders(df_streaming, "timestamp", "eventhub"))
+        .withWatermark("order_timestamp", DEDUP_WATERMARK)
+        .dropDuplicatesWithinWatermark(["order_id"])
+        .withColumn("items", F.from_json("items_json", ITEMS_SCHEMA))
+        .drop("items_json")
+        .withColumn("_ingestion_timestamp", F.current_timestamp())
+    )
+
+
+@dp.table(
+    name="02_silver.fact_orders",
+    table_properties={"quality": "silver"},
+    cluster_by=["order_date", "restaurant_id"]
+)
+def fact_orders():
+    return (
+        spark.readStream.table("02_silver.orders_deduped")
+        .select(
+            F.col("order_id"),
+            F.col("order_timestamp"),
+            F.to_date("order_timestamp").alias("order_date"),
+            F.hour("order_timestamp").alias("order_hour"),
+            F.date_format("order_timestamp", "EEEE").alias("day_of_week"),
+            F.dayofweek("order_timestamp").isin(1, 7).alias("is_weekend"),
+            F.col("restaurant_id"),
+            F.col("customer_id"),
+            F.col("order_type"),
+            F.size("items").alias("item_count"),
+            F.col("total_amount"),
+            F.col("payment_method"),
+            F.col("order_status"),
+            F.col("_ingestion_timestamp")
+        )
+    )
+
+
+@dp.table(
+    name="02_silver.fact_order_items",
+    table_properties={"quality": "silver"},
+    cluster_by=["order_date", "restaurant_id"]
+)
+def fact_order_items():
+    return (
+        spark.readStream.table("02_silver.orders_deduped")
+        .select(
+            "order_id", "restaurant_id", "customer_id", "order_type", "order_timestamp", "_ingestion_timestamp",
+            F.explode("items").alias("item")
+        )
+        .select(
+            F.col("order_id"),
+            F.col("item.item_id").alias("item_id"),
+            F.col("restaurant_id"),
+            F.col("customer_id"),
+            F.col("order_type"),
+            F.col("order_timestamp"),
+            F.to_date("order_timestamp").alias("order_date"),
+            F.hour("order_timestamp").alias("order_hour"),
+            F.date_format("order_timestamp", "EEEE").alias("day_of_week"),
+            F.col("item.name").alias("item_name"),
+            F.col("item.category").alias("category"),
+            F.col("item.quantity").alias("quantity"),
+            F.col("item.unit_price").alias("unit_price"),
+            F.col("item.subtotal").alias("subtotal"),
+            F.col("_ingestion_timestamp")
+        )
+    )
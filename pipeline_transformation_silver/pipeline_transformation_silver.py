@@ -1,9 +1,52 @@
+-- Review analysis is tiered, cheapest first:
+--   local: the CPU classifier in review_classifier.py, for reviews it is confident about
+--   cache: 02_silver.review_analysis_cache (see sql/review_analysis_cache.sql), for texts the model already analyzed
+--   model: ai_query through analyze_review, once per distinct text among the remaining misses, merged into the
+--          cache by the review_model_calls sink; those reviews are then served from the cache as well
+--          (reviews_cache_tier, both in review_classifier.py)
+-- Each review is read once from the bronze change feed and classified locally in reviews_classified (review_classifier.py).
+
+-- Every review with its analysis, parsed once into a typed struct. Model output that is not a JSON object
+-- matching the schema keeps its raw text in analysis._malformed and goes to fact_reviews_quarantine.
+-- Materialized here so fact_reviews and the quarantine share one pass over the tiers.
+CREATE OR REFRESH STREAMING TABLE `02_silver`.review_analysis
+AS
+SELECT
+  *,
+  from_json(
+    regexp_extract(analysis_json, '(?s)\\{.*\\}', 0),
+    'sentiment STRING, issue_delivery BOOLEAN, issue_delivery_reason STRING, '
+    'issue_food_quality BOOLEAN, issue_food_quality_reason STRING, issue_pricing BOOLEAN, issue_pricing_reason STRING, '
+    'issue_portion_size BOOLEAN, issue_portion_size_reason STRING, _malformed STRING',
+    map('columnNameOfCorruptRecord', '_malformed')
+  ) AS analysis
+FROM (
+  -- Confident local classifications
+  SELECT
+    r.* EXCEPT (local_analysis),
+    r.local_analysis.analysis_json AS analysis_json,
+    'local' AS analysis_source,
+    r.local_analysis.confidence AS local_confidence
+  FROM STREAM(reviews_classified) r
+  WHERE r.local_analysis.confident
+
+  UNION ALL
+
+  -- Everything else, once its text is in the cache: cached before, or analyzed by the model for this review
+  SELECT
+    r.* EXCEPT (local_analysis),
+    'cache' AS analysis_source,
+    r.local_analysis.confidence AS local_confidence
+  FROM STREAM(reviews_cache_tier) r
+);
+
 CREATE OR REFRESH STREAMING TABLE `02_silver`.fact_reviews (
   CONSTRAINT valid_sentiment EXPECT (sentiment IN ('positive', 'neutral', 'negative')) ON VIOLATION DROP ROW,
   CONSTRAINT non_negative_rating EXPECT (rating >= 0) ON VIOLATION DROP ROW
 )
+CLUSTER BY (review_timestamp, restaurant_id)
 AS
-SELECT 
+SELECT
   review_id,
   order_id,
   customer_id,
@@ -11,38 +54,69 @@ SELECT
   rating,
   review_text,
   analysis_json,
-  get_json_object(analysis_json, '$.sentiment') AS sentiment,
-  get_json_object(analysis_json, '$.issue_delivery') AS issue_delivery,
-  get_json_object(analysis_json, '$.issue_delivery_reason') AS issue_delivery_reason,
-  get_json_object(analysis_json, '$.issue_food_quality') AS issue_food_quality,
-  get_json_object(analysis_json, '$.issue_food_quality_reason') AS issue_food_quality_reason,
-  get_json_object(analysis_json, '$.issue_pricing') AS issue_pricing,
-  get_json_object(analysis_json, '$.issue_pricing_reason') AS issue_pricing_reason,
-  get_json_object(analysis_json, '$.issue_portion_size') AS issue_portion_size,
-  get_json_object(analysis_json, '$.issue_portion_size_reason') AS issue_portion_size_reason,
+  analysis_key,
+  analysis_source,
+  local_confidence,
+  analysis.sentiment,
+  analysis.issue_delivery,
+  analysis.issue_delivery_reason,
+  analysis.issue_food_quality,
+  analysis.issue_food_quality_reason,
+  analysis.issue_pricing,
+  analysis.issue_pricing_reason,
+  analysis.issue_portion_size,
+  analysis.issue_portion_size_reason,
   review_timestamp
+FROM STREAM(`02_silver`.review_analysis)
+WHERE analysis._malformed IS NULL
+  AND analysis.sentiment IN ('positive', 'neutral', 'negative');
+
+-- Reviews whose analysis could not be parsed or has no valid sentiment, with the raw model output
+CREATE OR REFRESH STREAMING TABLE `02_silver`.fact_reviews_quarantine
+AS
+SELECT
+  review_id,
+  order_id,
+  customer_id,
+  restaurant_id,
+  rating,
+  review_text,
+  analysis_json,
+  analysis_key,
+  analysis_source,
+  CASE
+    WHEN analysis IS NULL OR analysis._malformed IS NOT NULL THEN 'malformed_json'
+    ELSE 'invalid_sentiment'
+  END AS quarantine_reason,
+  review_timestamp,
+  current_timestamp() AS _quarantined_at
+FROM STREAM(`02_silver`.review_analysis)
+WHERE NOT coalesce(analysis._malformed IS NULL AND analysis.sentiment IN ('positive', 'neutral', 'negative'), false);
+
+-- Reviews per analysis tier per review day, and the model calls made for them: one per distinct text, dated by
+-- the first review that needed it; llm_avoided_pct is the share of reviews that needed no call of their own
+CREATE OR REFRESH MATERIALIZED VIEW `02_silver`.review_analysis_hit_rate
+AS
+SELECT
+  t.review_date,
+  t.reviews,
+  t.local_classified,
+  t.cache_tier_reviews,
+  coalesce(m.model_calls, 0) AS model_calls,
+  round(100 * (t.cache_tier_reviews - coalesce(m.model_calls, 0)) / nullif(t.cache_tier_reviews, 0), 2) AS hit_rate_pct,
+  round(100 * (t.reviews - coalesce(m.model_calls, 0)) / t.reviews, 2) AS llm_avoided_pct
 FROM (
   SELECT
-    *,
-    review_text,
-    ai_query(
-      'databricks-gpt-oss-20b',
-      CONCAT(
-        'Analyze the following review and return ONLY a valid JSON object with this exact structure: ',
-        '{"sentiment": "<positive/neutral/negative>", ',
-        '"issue_delivery": <true/false>, ',
-        '"issue_delivery_reason": "<reason or empty string>", ',
-        '"issue_food_quality": <true/false>, ',
-        '"issue_food_quality_reason": "<reason or empty string>", ',
-        '"issue_pricing": <true/false>, ',
-        '"issue_pricing_reason": "<reason or empty string>", ',
-        '"issue_portion_size": <true/false>, ',
-        '"issue_portion_size_reason": "<reason or empty string>"}. ',
-        'Rules: sentiment must be exactly one of: positive, neutral, negative. ',
-        'Each issue field is true/false only. ',
-        'Each reason field should contain a brief explanation if the issue is true, otherwise empty string. ',
-        'Review text: ', review_text
-      )
-    ) AS analysis_json
-  FROM STREAM(`ws_dbxproject_catalog`.`01_bronze`.reviews)
-);
\ No newline at end of file
+    date(review_timestamp) AS review_date,
+    count(*) AS reviews,
+    count_if(analysis_source = 'local') AS local_classified,
+    count_if(analysis_source = 'cache') AS cache_tier_reviews
+  FROM `02_silver`.review_analysis
+  GROUP BY 1
+) t
+LEFT JOIN (
+  SELECT date(review_timestamp) AS review_date, count(*) AS model_calls
+  FROM `ws_dbxproject_catalog`.`02_silver`.review_analysis_cache
+  GROUP BY 1
+) m
+  ON t.review_date = m.review_date;
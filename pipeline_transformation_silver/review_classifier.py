@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+from pyspark import pipelines as dp
+from pyspark.sql import functions as F
+from pyspark.sql.functions import pandas_udf
+
+# ============================================
+# LOCAL FIRST-PASS REVIEW CLASSIFIER
+# ============================================
+# A lexicon over the review text plus the star rating. It emits the same JSON
+# as the ai_query prompt in review_analysis_cache.sql, with a confidence;
+# fact_reviews only sends rows below MIN_CONFIDENCE to the model.
+MIN_CONFIDENCE = 0.8
+
+POSITIVE_TERMS = (
+    r"amazing|outstanding|exceptional|incredible|excellent|fantastic|perfect|delicious|divine|wonderful|"
+    r"best|great|(?<!not )good|tasty|enjoyed|satisfied|recommend|flavorful|generous|memorable|beautifully|standout|"
+    r"order again"
+)
+NEGATIVE_TERMS = (
+    r"terrible|horrible|worst|disaster|appalling|shocking|disgusting|disappointed|disappointing|unsatisfactory|"
+    r"poor|subpar|underwhelming|unacceptable|inedible|unhappy|waste|never ordering|won't order|not worth|not good|"
+    r"awful|(?<!not )bad|not really"
+)
+NEUTRAL_TERMS = r"okay|average|decent|mediocre|acceptable|forgettable|mixed feelings|nothing special|not bad|edible"
+
+# Phrases that raise an issue; the first match becomes the reason
+ISSUE_TERMS = {
+    "issue_delivery": (
+        r"delay|arrived late|late and cold|cold when it arrived|arrived lukewarm|arrived ice cold|packaging|all wrong"
+    ),
+    "issue_food_quality": (
+        r"lacked the punch|bit bland|needed more seasoning|could be better|cold|overcooked|dry|barely any flavor|"
+        r"not fresh|reheated|burnt|oily|greasy|stomach upset|inedible|spoiled|made me sick|stale|weird smell|raw inside|"
+        r"no resemblance|health hazard|poor quality"
+    ),
+    "issue_pricing": r"for the price|not worth the money|waste of money|refund|overpriced|expensive",
+    "issue_portion_size": r"portion was small|small portion|tiny portion|portions? (?:were|was) (?:too )?small"
+}
+
+RATING_SCORE = {5: 2.0, 4: 1.0, 3: 0.0, 2: -1.0, 1: -2.0}
+
+
+def _count(text, terms):
+    return text.str.count(rf"\b(?:{terms})\b").to_numpy(dtype=float)
+
+
+def _json_string(values):
+    return '"' + values.str.replace("\\", "\\\\", regex=False).str.replace('"', '\\"', regex=False) + '"'
+
+
+def classify_reviews(review_text, rating):
+    """Sentiment, the four issue flags with reasons, analysis_json and confidence for each review
+
+    Works on whole pandas Series at once (regex counts, NumPy scoring), so it
+    runs as-is inside a pandas UDF batch. Confidence is high when the rating
+    and the wording agree; text that contradicts the rating or that the
+    lexicon does not recognize, positive reviews raising several issues and
+    negative reviews naming none score low.
+    """
+    text = review_text.fillna("").str.lower()
+    rating_score = rating.map(RATING_SCORE).fillna(0.0).to_numpy(dtype=float)
+    positive = _count(text, POSITIVE_TERMS)
+    negative = _count(text, NEGATIVE_TERMS)
+    neutral = _count(text, NEUTRAL_TERMS)
+
+    lexicon_score = np.clip(positive - negative, -2, 2) - np.sign(positive - negative) * np.minimum(neutral, 1)
+    score = rating_score + 0.5 * lexicon_score
+    sentiment = np.select([score >= 1, score <= -1], ["positive", "negative"], "neutral")
+
+    # Agreement between the rating and the wording, and how far the score is from a class boundary. Wording
+    # only agrees when the lexicon recognized something and it does not pull both ways.
+    hits = positive + negative + neutral
+    mixed = (positive > 0) & (negative > 0)
+    agrees = (np.sign(rating_score) == np.sign(lexicon_score)) & (hits > 0) & ~mixed
+    margin = np.where(sentiment == "neutral", 1 - np.abs(score), np.abs(score) - 0.5)
+    confidence = 0.55 + 0.2 * agrees + 0.2 * np.clip(margin, 0, 1)
+
+    result = pd.DataFrame({"sentiment": sentiment}, index=review_text.index)
+    issues_found = np.zeros(len(text))
+    for issue, terms in ISSUE_TERMS.items():
+        match = text.str.extract(rf"\b({terms})\b", expand=False)
+        result[issue] = match.notna().to_numpy()
+        result[f"{issue}_reason"] = ("Review mentions: " + match).fillna("")
+        issues_found += result[issue].to_numpy()
+
+    # Issues in a positive review or none in a negative one are the model's call
+    confidence -= 0.2 * ((sentiment == "positive") & (issues_found > 1))
+    confidence -= 0.15 * ((sentiment == "negative") & (issues_found == 0))
+    result["confidence"] = np.round(np.clip(confidence, 0, 1), 2)
+
+    def flag(issue):
+        return np.where(result[issue], "true", "false")
+
+    result["analysis_json"] = (
+        '{"sentiment": "' + result["sentiment"] + '", '
+        + '"issue_delivery": ' + flag("issue_delivery") + ', '
+        + '"issue_delivery_reason": ' + _json_string(result["issue_delivery_reason"]) + ', '
+        + '"issue_food_quality": ' + flag("issue_food_quality") + ', '
+        + '"issue_food_quality_reason": ' + _json_string(result["issue_food_quality_reason"]) + ', '
+        + '"issue_pricing": ' + flag("issue_pricing") + ', '
+        + '"issue_pricing_reason": ' + _json_string(result["issue_pricing_reason"]) + ', '
+        + '"issue_portion_size": ' + flag("issue_portion_size") + ', '
+        + '"issue_portion_size_reason": ' + _json_string(result["issue_portion_size_reason"]) + '}'
+    )
+    return result
+
+
+# ============================================
+# PIPELINE UDF
+# ============================================
+@pandas_udf("analysis_json STRING, confidence DOUBLE, confident BOOLEAN")
+def classify_review(review_text: pd.Series, rating: pd.Series) -> pd.DataFrame:
+    result = classify_reviews(review_text, rating)
+    return pd.DataFrame({
+        "analysis_json": result["analysis_json"],
+        "confidence": result["confidence"],
+        "confident": result["confidence"] >= MIN_CONFIDENCE
+    })
+
+
+# Registered for the SQL source of this pipeline (pipeline_transformation_silver.py)
+spark.udf.register("classify_review", classify_review)
+
+
+# ============================================
+# BRONZE REVIEWS
+# ============================================
+# The bronze load MERGEs changed reviews into 01_bronze.reviews, so its commits are not append-only and the
+# table is read through its change feed. Only inserts are taken: a new review reaches silver once, and a
+# review edited in the source after that keeps the analysis of its first version. A full bronze reload
+# (the first load, or change tracking falling back) re-inserts every review, so after one this pipeline
+# needs a full refresh.
+@dp.temporary_view(name="reviews_classified")
+def reviews_classified():
+    return (
+        spark.readStream
+        .option("readChangeFeed", "true")
+        .table("ws_dbxproject_catalog.01_bronze.reviews")
+        .filter(F.col("_change_type") == "insert")
+        .drop("_change_type", "_commit_version", "_commit_timestamp")
+        .withColumn("analysis_key", F.expr("`ws_dbxproject_catalog`.`02_silver`.review_analysis_key(review_text)"))
+        .withColumn("local_analysis", classify_review("review_text", "rating"))
+    )
+
+
+# ============================================
+# MODEL CALLS FOR CACHE MISSES
+# ============================================
+# The reviews neither the classifier nor review_analysis_cache can answer are analyzed by the review_model_calls
+# sink, once per distinct text of each micro-batch (template-generated reviews repeat the same text many times),
+# and the results are merged into the cache. The reviews themselves get their analysis from the cache in
+# reviews_cache_tier, whichever of the review and its cache entry lands first. No review is dropped on the way:
+# a text the model returned nothing for is kept in review_analysis_retry and sent again with the next batch.
+ANALYSIS_CACHE = "ws_dbxproject_catalog.`02_silver`.review_analysis_cache"
+ANALYSIS_RETRY = "ws_dbxproject_catalog.`02_silver`.review_analysis_retry"
+
+
+@dp.foreach_batch_sink(name="review_model_calls")
+def review_model_calls(df, batch_id):
+    """Analyze each uncached text of the batch (and the texts still awaiting a retry) once, adding the results to the cache
+
+    Every attempt is appended to review_analysis_retry, so each text is sent to the model once per batch
+    however the result is used; texts with output then move to review_analysis_cache and leave the retry table.
+    """
+    session = df.sparkSession
+    df_cached = session.read.table(ANALYSIS_CACHE).select("analysis_key")
+    df_waiting = session.read.table(ANALYSIS_RETRY).select("analysis_key", "review_text", "review_timestamp")
+    (
+        df.select("analysis_key", "review_text", "review_timestamp")
+        .unionByName(df_waiting)
+        .groupBy("analysis_key")
+        .agg(
+            F.min_by("review_text", "review_timestamp").alias("review_text"),
+            F.min("review_timestamp").alias("review_timestamp")
+        )
+        .join(df_cached, "analysis_key", "left_anti")
+        .withColumn("analysis_json", F.expr("`ws_dbxproject_catalog`.`02_silver`.analyze_review(review_text)"))
+        .withColumn("attempted_at", F.current_timestamp())
+        .write.mode("append").saveAsTable(ANALYSIS_RETRY)
+    )
+
+    # Insert-only, so the cache stays append-only for the stream reading it in reviews_cache_tier; schema
+    # evolution adds review_timestamp to caches created without it
+    session.sql(f"""
+        MERGE WITH SCHEMA EVOLUTION INTO {ANALYSIS_CACHE} AS c
+        USING (
+          SELECT
+            analysis_key,
+            min_by(review_text, review_timestamp) AS review_text,
+            min(review_timestamp) AS review_timestamp,
+            max_by(analysis_json, attempted_at) AS analysis_json
+          FROM {ANALYSIS_RETRY}
+          WHERE analysis_json IS NOT NULL
+          GROUP BY analysis_key
+        ) AS s
+        ON c.analysis_key = s.analysis_key
+        WHEN NOT MATCHED THEN INSERT (analysis_key, review_text, review_timestamp, analysis_json, cached_at)
+          VALUES (s.analysis_key, s.review_text, s.review_timestamp, s.analysis_json, current_timestamp())
+    """)
+    session.sql(f"DELETE FROM {ANALYSIS_RETRY} WHERE analysis_key IN (SELECT analysis_key FROM {ANALYSIS_CACHE})")
+
+
+@dp.append_flow(target="review_model_calls")
+def review_cache_misses():
+    df_cache = spark.read.table(ANALYSIS_CACHE).select("analysis_key")
+    return (
+        spark.readStream.table("reviews_classified")
+        .where(~F.col("local_analysis.confident"))
+        .join(df_cache, "analysis_key", "left_anti")
+        .select("analysis_key", "review_text", "review_timestamp")
+    )
+
+
+# A stream-stream join: a review waits in the join state until its text is in the cache, and a cache entry
+# stays there for the later reviews with the same text, so the order the two arrive in does not matter.
+# Neither side has a watermark, as that would drop late reviews again: the state holds the reviews the local
+# classifier was not confident about and one row per cached text.
+@dp.temporary_view(name="reviews_cache_tier")
+def reviews_cache_tier():
+    df_cache = (
+        spark.readStream
+        .option("skipChangeCommits", "true")
+        .table(ANALYSIS_CACHE)
+        .select(F.col("analysis_key").alias("_cached_key"), "analysis_json")
+    )
+    # Joined on a renamed key so the review columns keep their order, with analysis_json last as in the local tier
+    return (
+        spark.readStream.table("reviews_classified")
+        .where(~F.col("local_analysis.confident"))
+        .join(df_cache, F.col("analysis_key") == F.col("_cached_key"))
+        .drop("_cached_key")
+    )